@@ -0,0 +1,132 @@
+"""
+Benchmark du stockage du catalogue : entries/vod_info contre Catalog
+
+Usage :
+    python benchmarks/bench_catalog.py [nombre_d_entrees]
+"""
+import os
+import gc
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.catalog import Catalog
+from src.core.metadata import LANGUAGES, QUALITIES, extract
+
+CATEGORIES = [f"Films {lang}" for lang in ("FR", "EN", "DE", "ES", "IT", "PT")] + \
+    [f"Séries {lang}" for lang in ("FR", "EN", "DE")] + ["Documentaires", "Enfants", "4K UHD"]
+
+def generate_fields(count, seed=42):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = (f"Film {i} ({rng.randint(1970, 2024)}) {rng.choice(['FR', 'VOSTFR', 'MULTI'])} "
+                f"{rng.choice(['4K', '1080p', '720p', ''])}").strip()
+        yield (
+            name,
+            f"http://provider.example.com/movie/user/pass/{i}.mp4",
+            str(i),
+            f"http://img.example.com/posters/{i}.jpg",
+            # Copie pour simuler des chaînes distinctes issues du parsing
+            "".join(rng.choice(CATEGORIES))
+        )
+
+def build_legacy(fields):
+    entries = []
+    vod_info = {}
+    seen_entries = set()
+    for name, url, xui_id, logo, group_title in fields:
+        entry_key = (name, url)
+        if entry_key in seen_entries:
+            continue
+        seen_entries.add(entry_key)
+        vod_info[name] = {'xui_id': xui_id, 'tvg_logo': logo, 'group_title': group_title, 'url': url}
+        entries.append(entry_key)
+    return entries, vod_info, seen_entries
+
+def build_catalog(fields):
+    catalog = Catalog()
+    for name, url, xui_id, logo, group_title in fields:
+        catalog.add(name, url, xui_id, logo, group_title)
+    return catalog
+
+def measure_memory(builder, count):
+    gc.collect()
+    tracemalloc.start()
+    result = builder(generate_fields(count))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def per_call(func, items, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items)
+
+def best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    (entries, vod_info, seen_entries), legacy_bytes = measure_memory(build_legacy, count)
+    catalog, catalog_bytes = measure_memory(build_catalog, count)
+
+    rng = random.Random(1)
+    names = [entries[rng.randrange(len(entries))][0] for _ in range(10_000)]
+    category = "Films FR"
+
+    legacy_lookup = per_call(lambda name: vod_info[name]['url'], names)
+    legacy_scan = per_call(lambda name: next(url for name_, url in entries if name_ == name), names[:20], repeat=1)
+    catalog_lookup = per_call(lambda name: catalog.url(catalog.find_name(name)), names)
+
+    def legacy_filter():
+        return [name for name, _ in entries if vod_info[name]['group_title'] == category]
+
+    def catalog_filter():
+        code = catalog.category_code(category)
+        codes = catalog.category_codes
+        return [catalog.names[row] for row in catalog.rows() if codes[row] == code]
+
+    assert legacy_filter() == catalog_filter()
+
+    print(f"{count} entrées")
+    print(f"{'structure':<36} {'mémoire':>10} {'nom -> URL':>12} {'filtre catégorie':>18}")
+    print(f"{'entries + vod_info + seen_entries':<36} {legacy_bytes / 1e6:>7.1f} Mo "
+          f"{legacy_lookup * 1e6:>9.2f} µs {best_of(legacy_filter) * 1e3:>15.1f} ms")
+    print(f"{'Catalog':<36} {catalog_bytes / 1e6:>7.1f} Mo "
+          f"{catalog_lookup * 1e6:>9.2f} µs {best_of(catalog_filter) * 1e3:>15.1f} ms")
+    print(f"Ancienne recherche linéaire dans entries (DownloadTab) : {legacy_scan * 1e3:.1f} ms par VOD")
+
+    # Facettes : extraction au chargement, puis "FR 1080p de 2023" par croisement des listes de lignes
+    start = time.perf_counter()
+    catalog.enable_facets()
+    print(f"\nFacettes extraites en {time.perf_counter() - start:.2f} s")
+    quality, language = QUALITIES.index("1080p"), LANGUAGES.index("FR")
+
+    def facet_scan():
+        return [row for row in catalog.rows()
+                if (lambda m: m.year == 2023 and m.quality == quality and m.language == language)(
+                    extract(catalog.names[row], catalog.category(row)))]
+
+    def facet_index():
+        rows = set(catalog.facet_rows('year', 2023)) & set(catalog.facet_rows('quality', quality))
+        return sorted(rows.intersection(catalog.facet_rows('language', language)))
+
+    assert facet_scan() == facet_index()
+    print(f"FR 1080p 2023 ({len(facet_index())} lignes) : extraction à chaque filtre "
+          f"{best_of(facet_scan, 1) * 1e3:.1f} ms, index {best_of(facet_index) * 1e3:.1f} ms")
+
+if __name__ == "__main__":
+    main()
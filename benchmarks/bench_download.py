@@ -0,0 +1,148 @@
+"""
+Benchmark de l'écriture des téléchargements : iter_content + write contre
+lecture dans un pool de tampons + thread d'écriture positionnelle
+
+Un serveur HTTP local (processus séparé, son CPU n'est pas compté) sert un
+fichier de la taille demandée. --rate limite son débit (Mo/s) pour simuler le
+réseau, --disk-latency ajoute un temps d'écriture (ms par Mo) pour simuler un
+disque lent : le pipeline recouvre alors réception et écriture.
+
+Usage :
+    python benchmarks/bench_download.py [taille_en_mo] [--rate MO_S] [--disk-latency MS_PAR_MO]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.http import body_reader, get_session
+from src.core.disk_writer import WRITE_QUEUE_SIZE, BufferPool, DiskWriter, preallocate
+
+MB = 1024 * 1024
+# Taille de lecture de l'ancienne boucle (connexion unique)
+LEGACY_CHUNK_SIZE = 1024 * 1024
+
+def serve(port, size, rate, ready):
+    block = os.urandom(64 * 1024)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            sent = 0
+            view = memoryview(block)
+            deadline = time.perf_counter()
+            while sent < size:
+                part = view[:min(len(block), size - sent)]
+                self.wfile.write(part)
+                sent += len(part)
+                if rate:
+                    # Pas de rattrapage après une attente du client : le débit reste plafonné
+                    deadline = max(deadline, time.perf_counter()) + len(part) / (rate * MB)
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    ready.set()
+    server.serve_forever()
+
+def slow_disk(latency, size):
+    if latency:
+        time.sleep(latency / 1000 * size / MB)
+
+def download_legacy(url, path, size, latency):
+    """Boucle d'avant : un objet bytes par bloc, écriture dans le thread de lecture"""
+    with open(path, 'wb') as f:
+        f.truncate(size)
+    with get_session().get(url, stream=True) as response, open(path, 'r+b', buffering=0) as f:
+        for chunk in response.iter_content(LEGACY_CHUNK_SIZE):
+            f.write(memoryview(chunk))
+            slow_disk(latency, len(chunk))
+
+class SlowDiskWriter(DiskWriter):
+    latency = 0
+
+    def _write(self, view, offset):
+        super()._write(view, offset)
+        slow_disk(self.latency, len(view))
+
+def download_pipeline(url, path, size, latency):
+    """Lecture dans les tampons du pool, écriture par le thread DiskWriter"""
+    preallocate(path, size)
+    pool = BufferPool(WRITE_QUEUE_SIZE + 1)
+    writer = SlowDiskWriter(path, pool, lambda token, offset, length: None)
+    writer.latency = latency
+    writer.start()
+    try:
+        with get_session().get(url, stream=True) as response:
+            readinto = body_reader(response)
+            offset = 0
+            while offset < size:
+                buffer = pool.acquire()
+                count = readinto(memoryview(buffer)[:min(pool.size, size - offset)])
+                if not count:
+                    pool.release(buffer)
+                    break
+                writer.submit(buffer, count, offset)
+                offset += count
+    finally:
+        writer.close()
+    if writer.error is not None:
+        raise writer.error
+
+def measure(download, url, path, size, latency, repeat):
+    best = None
+    for _ in range(repeat):
+        if os.path.exists(path):
+            os.remove(path)
+        wall, cpu = time.perf_counter(), time.process_time()
+        download(url, path, size, latency)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        assert os.path.getsize(path) == size
+        if best is None or wall < best[0]:
+            best = (wall, cpu)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('size', nargs='?', type=int, default=512, help="taille du fichier (Mo)")
+    parser.add_argument('--rate', type=float, default=0, help="débit du serveur (Mo/s, 0 = illimité)")
+    parser.add_argument('--disk-latency', type=float, default=0, help="temps d'écriture ajouté (ms par Mo)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    size = args.size * MB
+    port = 8790
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, size, args.rate, ready), daemon=True)
+    server.start()
+    ready.wait()
+    url = f"http://127.0.0.1:{port}/bench.mp4"
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.mp4.part')
+    try:
+        print(f"{args.size} Mo, serveur {args.rate or 'illimité'} Mo/s, disque +{args.disk_latency:g} ms/Mo")
+        print(f"{'méthode':<34} {'débit':>11} {'CPU par Go':>12}")
+        for label, download in (("iter_content + write", download_legacy),
+                                ("readinto + DiskWriter", download_pipeline)):
+            wall, cpu = measure(download, url, path, size, args.disk_latency, args.repeat)
+            print(f"{label:<34} {size / MB / wall:>7.0f} Mo/s {cpu * 1024 / args.size:>10.2f} s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
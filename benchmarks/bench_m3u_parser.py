@@ -0,0 +1,118 @@
+"""
+Benchmark du parsing M3U : ancien motif regex contre le tokenizer #EXTINF
+
+Deux mesures par disposition : l'extraction des champs seule (même format de
+sortie pour les deux méthodes), puis le parsing complet, l'ancien avec ses
+dictionnaires vod_info et parse_content avec le rangement dans un Catalog.
+
+Usage :
+    python benchmarks/bench_m3u_parser.py [nombre_d_entrees]
+"""
+import os
+import re
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.m3u import M3UParser
+
+# Motif utilisé avant l'introduction du tokenizer
+LEGACY_PATTERN = r'#EXTINF:-1\s+(?:.*?xui-id="([^"]*)")?\s*(?:tvg-name="([^"]*)")?\s*(?:tvg-logo="([^"]*)")?\s*(?:group-title="([^"]*)")?,([^\n]*)\n(http[^\n]+)'
+
+CATEGORIES = ["Films FR", "Films EN", "Séries FR", "Documentaires", "Enfants", "4K UHD"]
+
+def generate_playlist(count, layout, seed=42):
+    """Génère une playlist synthétique selon une disposition d'attributs"""
+    rng = random.Random(seed)
+    lines = ["#EXTM3U"]
+    for i in range(count):
+        name = f"Film {i} ({rng.randint(1970, 2024)}) {rng.choice(['FR', 'VOSTFR', 'MULTI'])}"
+        attributes = [
+            ('xui-id', str(i)),
+            ('tvg-name', name),
+            ('tvg-logo', f"http://img.example.com/posters/{i}.jpg"),
+            ('group-title', rng.choice(CATEGORIES)),
+        ]
+        if layout == "xtream":
+            attributes = [('tvg-id', '')] + attributes[1:]
+        elif layout == "shuffled":
+            rng.shuffle(attributes)
+        header = " ".join(f'{key}="{value}"' for key, value in attributes)
+        lines.append(f"#EXTINF:-1 {header},{name}")
+        lines.append(f"http://provider.example.com/movie/user/pass/{i}.mp4")
+    return "\n".join(lines) + "\n"
+
+def legacy_parse(content):
+    """Reproduction de l'ancien parse_content (regex + dédoublonnage)"""
+    entries = []
+    vod_info = {}
+    seen_entries = set()
+    for match in re.finditer(LEGACY_PATTERN, content, re.MULTILINE):
+        xui_id, tvg_name, tvg_logo, group_title, title, url = match.groups()
+        name = tvg_name or title.strip()
+        entry_key = (name, url)
+        if entry_key in seen_entries:
+            continue
+        seen_entries.add(entry_key)
+        vod_info[name] = {'xui_id': xui_id, 'tvg_logo': tvg_logo, 'group_title': group_title, 'url': url}
+        entries.append(entry_key)
+    return entries, vod_info
+
+def legacy_fields(content):
+    """Champs extraits par l'ancien motif, au format de M3UParser.make_fields"""
+    return [
+        (tvg_name or title.strip(), url, xui_id or None, tvg_name or None, tvg_logo or None, group_title or None, None)
+        for xui_id, tvg_name, tvg_logo, group_title, title, url in re.findall(LEGACY_PATTERN, content, re.MULTILINE)
+    ]
+
+def summarize(result):
+    """Nombre d'entrées et d'entrées avec catégorie, pour chaque format de résultat"""
+    if isinstance(result, list):
+        return len(result), sum(1 for fields in result if fields[5])
+    if isinstance(result, tuple):
+        entries, vod_info = result
+        return len(entries), sum(1 for info in vod_info.values() if info['group_title'])
+    return len(result), sum(1 for code in result.category_codes if code)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    logging.disable(logging.CRITICAL)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    parser = M3UParser()
+
+    methods = (
+        ("champs, regex", legacy_fields),
+        ("champs, tokenizer", lambda text: list(parser._iter_content_fields(text))),
+        ("complet, regex", legacy_parse),
+        ("complet, parse_content", parser.parse_content),
+    )
+
+    print(f"{count} entrées par playlist")
+    print(f"{'disposition':<10} {'méthode':<22} {'temps (s)':>10} {'entrées':>10} {'catégories':>11}")
+    for layout in ("ordered", "xtream", "shuffled"):
+        content = generate_playlist(count, layout)
+        for label, func in methods:
+            result, elapsed = timed(func, content)
+            entries, with_category = summarize(result)
+            print(f"{layout:<10} {label:<22} {elapsed:>10.2f} {entries:>10} {with_category:>11}")
+        del content
+
+    # Passage à l'échelle du mode multi-processus
+    content = generate_playlist(count, "shuffled")
+    cores = os.cpu_count() or 1
+    print(f"\nParsing multi-processus ({cores} cœurs disponibles)")
+    workers = 1
+    while workers <= cores:
+        result, elapsed = timed(parser.parse_content_parallel, content, workers)
+        print(f"{workers:>3} processus {elapsed:>10.2f} s {len(result):>10} entrées")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark de la recherche : parcours linéaire de DownloadTab contre SearchIndex
+
+Usage :
+    python benchmarks/bench_search.py [nombre_d_entrees]
+"""
+import os
+import gc
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.catalog import Catalog
+from src.core.search import matches
+from src.utils.text import tokenize
+
+WORDS = (
+    "le la les des du de seigneur anneaux retour roi guerre étoiles empire contre attaque "
+    "harry potter école sorciers chambre secrets matrix reloaded revolutions alien prométhée "
+    "amélie poulain fabuleux destin pokémon naruto shippuden cité peur être ou ne pas "
+    "mission impossible fantôme protocole fast furious tokyo drift hobbs shaw"
+).split()
+
+QUERIES = ["seigneur", "amelie poul", "pokemon 2001", "or", "harry chambre 4k", "xyzzy"]
+# Requêtes mal orthographiées pour la recherche approximative
+FUZZY_QUERIES = ["siegneur", "amelei poulain", "pokemn 2001", "harri poter", "prometee"]
+
+def generate_names(count, seed=42):
+    rng = random.Random(seed)
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+        yield f"{title.title()} {i % 50} ({rng.randint(1970, 2024)}) {rng.choice(['FR', 'VOSTFR', 'MULTI', '4K'])}"
+
+CATEGORIES = [f"Films {language}" for language in ("FR", "EN", "DE", "ES", "IT")] + ["Documentaires", "Enfants"]
+
+def build_catalog(count):
+    catalog = Catalog()
+    for i, name in enumerate(generate_names(count)):
+        catalog.add(name, f"http://provider.example.com/movie/user/pass/{i}.mp4", str(i),
+                    group_title=CATEGORIES[i % len(CATEGORIES)])
+    return catalog
+
+def best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    catalog = build_catalog(count)
+    names = catalog.names
+
+    start = time.perf_counter()
+    catalog.enable_search()
+    build_time = time.perf_counter() - start
+
+    # Mémoire mesurée sur une seconde construction, tracemalloc faussant le temps
+    catalog.search_index = None
+    gc.collect()
+    tracemalloc.start()
+    catalog.enable_search()
+    gc.collect()
+    index_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{count} entrées, index construit en {build_time:.2f} s, {index_bytes / 1e6:.1f} Mo, "
+          f"{len(catalog.search_index)} mots")
+    print(f"{'requête':<20} {'résultats':>10} {'lower() in':>12} {'normalisé':>12} {'index':>10}")
+    for query in QUERIES:
+        lowered = query.lower()
+        fragments = tokenize(query)
+
+        def legacy():
+            return [name for name in names if lowered in name.lower()]
+
+        def linear():
+            return [row for row in catalog.rows() if matches(fragments, names[row])]
+
+        def indexed():
+            return catalog.search(query)
+
+        assert linear() == indexed()
+        print(f"{query:<20} {len(indexed()):>10} {best_of(legacy, 1) * 1e3:>9.1f} ms "
+              f"{best_of(linear, 1) * 1e3:>9.1f} ms {best_of(indexed) * 1e3:>7.1f} ms")
+
+    # Recherche approximative : candidats par trigrammes puis distance d'édition
+    print(f"\n{'requête approchée':<20} {'résultats':>10} {'exacts':>8} {'approximative':>14}")
+    for query in FUZZY_QUERIES:
+        def fuzzy():
+            return catalog.fuzzy_search(query)
+
+        print(f"{query:<20} {len(fuzzy()):>10} {len(catalog.search(query)):>8} {best_of(fuzzy) * 1e3:>11.1f} ms")
+
+    # Tri des résultats : noms retriés à chaque filtre contre ordre naturel précalculé
+    start = time.perf_counter()
+    catalog.enable_sorting()
+    print(f"\nOrdre de tri naturel calculé en {time.perf_counter() - start:.2f} s")
+    print(f"{'sélection':<20} {'lignes':>10} {'sort() des noms':>16} {'ordre précalculé':>17}")
+    for label, rows in (("tout le catalogue", list(catalog.rows())),
+                        ("seigneur", catalog.search("seigneur")),
+                        ("pokemon 2001", catalog.search("pokemon 2001"))):
+        def legacy_sort():
+            return sorted(names[row] for row in rows)
+
+        def precomputed():
+            return catalog.sorted_rows(rows)
+
+        print(f"{label:<20} {len(rows):>10} {best_of(legacy_sort) * 1e3:>13.1f} ms "
+              f"{best_of(precomputed) * 1e3:>14.1f} ms")
+
+    # Filtre de catégorie : comparaison des codes sur tout le catalogue contre liste de lignes par catégorie
+    code = catalog.category_code("Enfants")
+    category_codes = catalog.category_codes
+
+    def scan():
+        return [row for row in catalog.rows() if category_codes[row] == code]
+
+    def posting():
+        return list(catalog.category_rows(code))
+
+    assert scan() == posting()
+    print(f"\nCatégorie Enfants ({len(posting())} lignes) : parcours {best_of(scan) * 1e3:.1f} ms, "
+          f"liste par catégorie {best_of(posting) * 1e3:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Moteur de téléchargement asyncio
+
+Tous les téléchargements et toutes leurs connexions tournent dans une seule
+boucle asyncio, sur un thread dédié : une connexion est une coroutine (quelques
+Ko) et non plus un thread système. Les écritures sur disque passent par un
+unique thread d'écriture partagé, pour ne jamais bloquer la boucle.
+
+AsyncDownload reprend l'interface de DownloadThread (signaux progress,
+finished et error, start/stop/pause/resume/wait) : DownloadManager et
+l'interface l'utilisent sans distinction. Les plages, la reprise, la limite de
+bande passante et le nombre de connexions par hôte sont les mêmes (TransferState).
+
+Activé par l'option de configuration 'async_downloads'.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from PyQt5.QtCore import QObject, pyqtSignal
+from src.core.async_http import AsyncHttpClient
+from src.core.bandwidth import TokenBucket
+from src.core.connections import HostConnectionController, is_throttling_error
+from src.core.disk_writer import BUFFER_SIZE, write_at
+from src.core.download import (
+    MAX_SEGMENT_ERRORS, SEGMENT_BUFFER_SIZE, SEGMENT_RETRY_DELAY, SEGMENT_TIMEOUT,
+    WORKER_POLL_INTERVAL, TransferState
+)
+
+logger = logging.getLogger(__name__)
+
+# Attente entre deux vérifications de la pause
+PAUSE_POLL_INTERVAL = 0.2
+# Tampons de lecture libres conservés pour chaque taille de bloc
+MAX_FREE_BUFFERS = 16
+
+class EventLoopThread(threading.Thread):
+    """Thread qui fait tourner une boucle asyncio jusqu'à la fin du programme"""
+
+    def __init__(self):
+        super().__init__(name="download-loop", daemon=True)
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+
+    def submit(self, coroutine) -> concurrent.futures.Future:
+        """Exécuter une coroutine dans la boucle depuis n'importe quel thread"""
+        self._ready.wait()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+_loop_thread: Optional[EventLoopThread] = None
+_loop_lock = threading.Lock()
+_client: Optional[AsyncHttpClient] = None
+# Un seul thread d'écriture : write_at sans pwrite (Windows) déplace la position du fichier
+_disk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="download-disk")
+# Préparation des .part (préallocation de tout le fichier, parfois longue) : à part, pour ne pas
+# retenir derrière elle les écritures des autres téléchargements
+_prepare_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="download-prepare")
+
+class LoopBufferPool:
+    """Tampons de lecture réutilisés d'un bloc à l'autre par les coroutines de la boucle
+
+    Équivalent de disk_writer.BufferPool pour la boucle des téléchargements :
+    utilisé depuis ce seul thread, sans verrou ni attente. Un tampon manquant
+    est alloué ; au plus MAX_FREE_BUFFERS tampons rendus sont gardés par taille.
+    """
+
+    def __init__(self, max_free=MAX_FREE_BUFFERS):
+        self.max_free = max_free
+        self._free: Dict[int, List[bytearray]] = {}
+
+    def acquire(self, size) -> bytearray:
+        free = self._free.get(size)
+        return free.pop() if free else bytearray(size)
+
+    def release(self, buffer):
+        free = self._free.setdefault(len(buffer), [])
+        if len(free) < self.max_free:
+            free.append(buffer)
+
+_buffer_pool = LoopBufferPool()
+
+def get_loop_thread() -> EventLoopThread:
+    """Thread de la boucle des téléchargements, démarré au premier appel"""
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is None:
+            _loop_thread = EventLoopThread()
+            _loop_thread.start()
+        return _loop_thread
+
+def get_client() -> AsyncHttpClient:
+    """Client HTTP partagé par les téléchargements (depuis la boucle uniquement)"""
+    global _client
+    if _client is None:
+        _client = AsyncHttpClient(timeout=SEGMENT_TIMEOUT)
+    return _client
+
+class AsyncDownload(QObject, TransferState):
+    """Téléchargement d'un fichier dans la boucle asyncio partagée
+
+    Même fonctionnement que DownloadThread (fichier .part, reprise, segments
+    avec partage du travail, connexions par hôte) ; les signaux sont émis
+    depuis le thread de la boucle et reçus dans celui de l'interface.
+    """
+    progress = pyqtSignal(str, int, float)  # entry_id, progress, speed in KB/s
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, name, url, bandwidth_limit=None, config=None, limiter: Optional[TokenBucket] = None,
+                 controller: Optional[HostConnectionController] = None, entry_id=None):
+        super().__init__()
+        self.init_transfer(name, url, bandwidth_limit, config, limiter, controller, entry_id)
+        self._future: Optional[concurrent.futures.Future] = None
+        self._fd = None
+        self._state_write: Optional[asyncio.Future] = None
+
+    def start(self):
+        self._future = get_loop_thread().submit(self._run())
+
+    def wait(self, timeout=None) -> bool:
+        """Attendre la fin du téléchargement (comme QThread.wait)"""
+        if self._future is None:
+            return True
+        done, _ = concurrent.futures.wait([self._future], timeout)
+        return bool(done)
+
+    def isRunning(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def stop(self):
+        self.stop_flag = True
+        self.paused = False
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        holding = False
+        response = None
+        try:
+            self.start_time = time.time()
+            if not await self._acquire_connection():
+                return
+            holding = True
+            response = await get_client().get(self.url)
+            response.raise_for_status()
+            filename = await loop.run_in_executor(_prepare_executor, self.prepare, response.headers)
+            self._fd = os.open(self.part_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+
+            if self.single_stream:
+                # Un seul flux : la réponse déjà ouverte est lue jusqu'au bout
+                self.segments[0].claimed = True
+                await self._read_response(response, self.segments[0], BUFFER_SIZE)
+            else:
+                # Les plages sont demandées sur de nouvelles connexions
+                response.close()
+                self.release_connection()
+                holding = False
+                await self._download_segmented()
+            # Attendre l'écriture des derniers blocs
+            await self._close_file()
+            if self.stop_flag:
+                await self._flush_state()
+                return
+            if self._segment_error is not None:
+                raise self._segment_error
+
+            # Après les écritures de l'état déjà confiées au thread d'écriture
+            await loop.run_in_executor(_disk_executor, self.complete, filename)
+            self.finished.emit()
+
+        except Exception as e:
+            if self.controller is not None and is_throttling_error(e):
+                self.controller.record_error(self.host)
+            await self._close_file()
+            if self.segments:
+                await self._flush_state()
+            self.error.emit(str(e))
+        finally:
+            if response is not None:
+                response.close()
+            if holding:
+                self.release_connection()
+
+    async def _close_file(self):
+        """Fermer le .part après les écritures déjà confiées au thread d'écriture"""
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            await asyncio.get_running_loop().run_in_executor(_disk_executor, os.close, fd)
+
+    def _save_state(self):
+        """Depuis la boucle, l'état est écrit par le thread d'écriture, après les blocs déjà confiés
+
+        record_progress() l'appelle toutes les STATE_SAVE_INTERVAL secondes ;
+        prepare() l'appelle depuis le thread de préparation, qui écrit lui-même.
+        """
+        state = self._state()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_state(state)
+            return
+        self.last_state_save = time.time()
+        self._state_write = loop.run_in_executor(_disk_executor, self._write_state, state)
+
+    async def _flush_state(self):
+        """Enregistrer l'état et attendre son écriture"""
+        self.save_state()
+        await self._state_write
+
+    async def _acquire_connection(self, blocking=True) -> bool:
+        """Comme acquire_connection, sans bloquer la boucle pendant l'attente"""
+        while not self.acquire_connection(blocking=False):
+            if not blocking or self.stop_flag:
+                return False
+            await asyncio.sleep(WORKER_POLL_INTERVAL)
+        return True
+
+    async def _download_segmented(self):
+        """Télécharger les plages restantes, une coroutine par connexion (voir DownloadThread.download_segmented)"""
+        self.segment_count = max(1, self.planned_segments())
+        self._segment_error = None
+        self._segment_errors = 0
+        if self.segment_count > 1:
+            logger.info(f"Téléchargement de {self.name} en {self.segment_count} segments au plus")
+
+        workers = set()
+        try:
+            while not self.stop_flag and self._segment_error is None:
+                workers = {worker for worker in workers if not worker.done()}
+                if not self._has_work():
+                    if not workers:
+                        break
+                elif len(workers) < self.segment_count and await self._acquire_connection(blocking=not workers):
+                    workers.add(asyncio.ensure_future(self._segment_worker()))
+                    continue
+                await asyncio.sleep(WORKER_POLL_INTERVAL)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _segment_worker(self):
+        """Télécharger des plages sur une connexion déjà réservée, puis la rendre"""
+        segment = None
+        try:
+            segment = self._next_segment()
+            while segment is not None and not self.stop_flag and self._segment_error is None:
+                await self._fetch_segment(segment)
+                if self.controller is not None and self.controller.over_limit(self.host):
+                    break
+                segment = self._next_segment()
+        except Exception as e:
+            with self._lock:
+                self._segment_errors += 1
+                retry = (segment is not None and is_throttling_error(e)
+                         and self._segment_errors <= MAX_SEGMENT_ERRORS)
+                if retry:
+                    # La plage reprendra à sa position sur une autre connexion
+                    segment.claimed = False
+            if retry:
+                logger.warning(f"Connexion refusée sur un segment de {self.name}: {str(e)}")
+                if self.controller is not None:
+                    self.controller.record_error(self.host)
+                await asyncio.sleep(SEGMENT_RETRY_DELAY)
+            else:
+                logger.error(f"Erreur sur un segment de {self.name}: {str(e)}")
+                self._segment_error = e
+        finally:
+            self.release_connection()
+
+    async def _fetch_segment(self, segment):
+        """Télécharger une plage par une requête Range"""
+        with self._lock:
+            start, end = segment.fetched, segment.end
+        if start >= end:
+            return
+        headers = {'Range': f"bytes={start}-{end - 1}"}
+        async with await get_client().get(self.url, headers=headers) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise Exception("Le serveur ne respecte pas les requêtes partielles")
+            await self._read_response(response, segment, SEGMENT_BUFFER_SIZE)
+
+    async def _read_response(self, response, segment, block_size):
+        """Lire une réponse à partir de segment.fetched et écrire chaque bloc à sa position
+
+        Les blocs sont lus dans un tampon du pool, rendu à la fin de la réponse.
+        """
+        loop = asyncio.get_running_loop()
+        buffer = _buffer_pool.acquire(block_size)
+        view = memoryview(buffer)
+        write = None
+        try:
+            while not self.stop_flag and self._segment_error is None:
+                if self.paused:
+                    await asyncio.sleep(PAUSE_POLL_INTERVAL)
+                    continue
+                with self._lock:
+                    offset = segment.fetched
+                    size = min(block_size, segment.unfetched)
+                size = self.limiter.chunk_size(size)
+                if size <= 0:
+                    return
+                length = await response.readinto(view[:size])
+                if not length:
+                    return
+                # Limiter la bande passante, en commun avec les autres transferts
+                await self._consume(length)
+                with self._lock:
+                    segment.fetched = offset + length
+                write = loop.run_in_executor(_disk_executor, write_at, self._fd, view[:length], offset)
+                await write
+                write = None
+                self.record_progress(segment, offset, length)
+        finally:
+            if write is not None and not write.done():
+                # Coroutine annulée pendant l'écriture : le tampon est rendu une fois écrit
+                write.add_done_callback(lambda _: _buffer_pool.release(buffer))
+            else:
+                _buffer_pool.release(buffer)
+
+    async def _consume(self, size):
+        while size > 0 and not self.stop_flag:
+            portion = min(size, self.limiter.burst)
+            wait = self.limiter.try_consume(portion)
+            if wait:
+                await asyncio.sleep(wait)
+            else:
+                size -= portion
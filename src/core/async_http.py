@@ -0,0 +1,354 @@
+"""
+Client HTTP/1.1 minimal pour asyncio, utilisé par le moteur de téléchargement asyncio
+
+Juste ce qu'il faut pour télécharger des fichiers : requêtes GET (Range
+comprises), redirections, corps délimités par Content-Length et connexions
+persistantes réutilisées par hôte. Une connexion ouverte ne coûte qu'un
+socket et quelques tampons, sans thread. Les erreurs sont celles de requests
+(HTTPError, ConnectionError, Timeout, ChunkedEncodingError) afin que la
+détection des refus (connections.is_throttling_error) reste la même.
+
+Non pris en charge : proxys, compression, corps en Transfer-Encoding: chunked.
+Quand un proxy s'applique à une URL (uses_proxy), DownloadManager la
+télécharge avec DownloadThread.
+"""
+import os
+import ssl
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, select_proxy
+from src.core.http import USER_AGENT, get_session, install_dns_cache
+
+# Délai de connexion et d'attente de données (secondes)
+DEFAULT_TIMEOUT = 30
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Connexions inactives conservées par hôte
+POOL_SIZE = 32
+# Taille maximale des en-têtes d'une réponse
+MAX_HEADER_SIZE = 64 * 1024
+# Tampon de réception des en-têtes (le corps est reçu dans le tampon du lecteur)
+RECEIVE_SIZE = 64 * 1024
+
+def ssl_context() -> ssl.SSLContext:
+    """Contexte TLS avec les mêmes certificats que requests (variables d'environnement comprises)"""
+    cafile = os.environ.get('REQUESTS_CA_BUNDLE') or os.environ.get('CURL_CA_BUNDLE') or DEFAULT_CA_BUNDLE_PATH
+    return ssl.create_default_context(cafile=cafile)
+
+def uses_proxy(url) -> bool:
+    """Vrai si requests passerait par un proxy pour cette URL (HTTP(S)_PROXY, ALL_PROXY, hors NO_PROXY)"""
+    session = get_session()
+    proxies = session.merge_environment_settings(url, {}, None, None, None)['proxies']
+    return bool(select_proxy(url, proxies))
+
+class HttpProtocol(asyncio.BufferedProtocol):
+    """Réception d'une connexion : en-têtes dans un tampon interne, corps directement dans le tampon du lecteur
+
+    Pendant un readinto(), get_buffer() rend la partie encore libre du tampon
+    fourni : le corps y est reçu (déchiffré, en HTTPS) sans copie
+    intermédiaire. Entre deux lectures du corps, la réception est suspendue et
+    les données attendent dans le socket.
+    """
+
+    def __init__(self):
+        self.transport: Optional[asyncio.Transport] = None
+        # Octets reçus hors d'un readinto() et pas encore lus (en-têtes, début du corps)
+        self._pending = bytearray()
+        # Toujours rendu sous forme de memoryview : la lecture TLS (asyncio.sslproto)
+        # complète le tampon par tranches buffer[offset:], une copie pour un bytearray
+        self._scratch = memoryview(bytearray(RECEIVE_SIZE))
+        self._target: Optional[memoryview] = None
+        self._received = 0
+        self._exact = False
+        self._waiter: Optional[asyncio.Future] = None
+        self._eof = False
+        self._exception: Optional[Exception] = None
+        self._paused = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self._exception = exc
+        self._eof = True
+        self._wake()
+
+    def eof_received(self):
+        self._eof = True
+        self._wake()
+        return False
+
+    def get_buffer(self, sizehint):
+        if self._target is not None:
+            return self._target[self._received:]
+        return self._scratch
+
+    def buffer_updated(self, nbytes):
+        if self._target is not None:
+            self._received += nbytes
+            if not self._exact or self._received == len(self._target):
+                self._target = None
+                self._pause()
+        else:
+            self._pending += self._scratch[:nbytes]
+            if len(self._pending) > MAX_HEADER_SIZE:
+                self._pause()
+        self._wake()
+
+    def at_eof(self) -> bool:
+        return self._eof and not self._pending
+
+    def is_closing(self) -> bool:
+        return self.transport is None or self.transport.is_closing()
+
+    def _pause(self):
+        if not self._paused and not self._eof:
+            self._paused = True
+            self.transport.pause_reading()
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            self.transport.resume_reading()
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _wait(self):
+        if self._exception is not None:
+            raise self._exception
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    async def readuntil(self, separator: bytes) -> bytes:
+        """Octets reçus jusqu'au séparateur compris (en-têtes d'une réponse)"""
+        self.resume()
+        while True:
+            position = self._pending.find(separator)
+            if position >= 0:
+                end = position + len(separator)
+                data = bytes(self._pending[:end])
+                del self._pending[:end]
+                return data
+            if len(self._pending) > MAX_HEADER_SIZE:
+                raise ValueError("En-têtes trop longs")
+            if self._eof:
+                raise asyncio.IncompleteReadError(bytes(self._pending), None)
+            await self._wait()
+
+    async def readinto(self, view: memoryview, exact: bool) -> int:
+        """Remplir view (exact) ou y copier ce qui arrive en premier ; 0 une fois la connexion fermée"""
+        filled = min(len(self._pending), len(view))
+        if filled:
+            view[:filled] = memoryview(self._pending)[:filled]
+            del self._pending[:filled]
+            if not exact or filled == len(view):
+                return filled
+        if self._eof:
+            return filled
+        self._target, self._received, self._exact = view[filled:], 0, exact
+        self.resume()
+        try:
+            while self._target is not None and not self._eof:
+                await self._wait()
+        finally:
+            self._target = None
+        return filled + self._received
+
+class AsyncResponse:
+    """Réponse dont le corps est lu au fur et à mesure avec readinto()
+
+    close() rend la connexion au client si le corps a été lu entièrement,
+    la ferme sinon.
+    """
+
+    def __init__(self, client, key, url, connection, status_code, reason, headers, timeout):
+        self.client = client
+        self.key = key
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.timeout = timeout
+        self._connection: Optional[HttpProtocol] = connection
+        length = headers.get('content-length')
+        self._remaining = int(length) if length is not None else None
+        self._keep_alive = (headers.get('connection', '').lower() != 'close'
+                            and self._remaining is not None
+                            and 'chunked' not in headers.get('transfer-encoding', '').lower())
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}", response=self
+            )
+
+    async def readinto(self, buffer) -> int:
+        """Lire la suite du corps dans buffer ; retourne le nombre d'octets lus, 0 une fois le corps entièrement lu
+
+        Avec Content-Length, attend que le tampon soit plein (ou le corps
+        terminé) : moins de blocs à traiter qu'en rendant ce que chaque
+        réception du socket apporte. Le tampon peut être réutilisé d'un bloc à l'autre.
+        """
+        if self._connection is None:
+            return 0
+        view = memoryview(buffer)
+        if self._remaining is not None:
+            view = view[:self._remaining]
+            if not view:
+                self.close()
+                return 0
+        try:
+            size = await asyncio.wait_for(
+                self._connection.readinto(view, exact=self._remaining is not None), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.close()
+            raise requests.exceptions.ConnectionError(f"Délai de lecture dépassé pour {self.url}")
+        except OSError as e:
+            self.close()
+            raise requests.exceptions.ConnectionError(e)
+        if not size:
+            remaining = self._remaining
+            self._keep_alive = False
+            self.close()
+            if remaining:
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Connexion fermée avant la fin de la réponse ({remaining} octets manquants)"
+                )
+            return 0
+        if self._remaining is not None:
+            self._remaining -= size
+        return size
+
+    def close(self):
+        if self._connection is None:
+            return
+        if self._keep_alive and self._remaining == 0:
+            self.client._release(self.key, self._connection)
+        else:
+            self._connection.transport.close()
+        self._connection = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+class AsyncHttpClient:
+    """Requêtes GET en streaming, connexions persistantes par hôte
+
+    À utiliser depuis une seule boucle asyncio.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        install_dns_cache()
+        self.timeout = timeout
+        self._ssl = None
+        # (schéma, hôte, port) -> connexions inactives
+        self._idle: Dict[Tuple[str, str, int], List[HttpProtocol]] = {}
+
+    async def get(self, url, headers: Optional[dict] = None, timeout=None) -> AsyncResponse:
+        """Envoyer une requête GET et lire les en-têtes de la réponse, redirections suivies"""
+        timeout = timeout or self.timeout
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request(url, headers or {}, timeout)
+            location = response.headers.get('location')
+            if response.status_code not in REDIRECT_STATUSES or not location:
+                return response
+            response.close()
+            url = urljoin(url, location)
+        raise requests.exceptions.TooManyRedirects(f"Plus de {MAX_REDIRECTS} redirections pour {url}")
+
+    async def _request(self, url, headers, timeout) -> AsyncResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise requests.exceptions.InvalidURL(f"URL non prise en charge: {url}")
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        host = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host}", f"User-Agent: {USER_AGENT}",
+                 "Accept: */*", "Accept-Encoding: identity", "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+        while True:
+            connection, reused = await self._connection(key, timeout)
+            try:
+                connection.transport.write(request)
+                status_code, reason, response_headers = await asyncio.wait_for(self._read_head(connection), timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                connection.transport.close()
+                if reused and not isinstance(e, asyncio.TimeoutError):
+                    # Connexion fermée par le serveur pendant son inactivité : en ouvrir une autre
+                    continue
+                if isinstance(e, asyncio.TimeoutError):
+                    raise requests.exceptions.ReadTimeout(f"Pas de réponse de {parts.hostname}")
+                raise requests.exceptions.ConnectionError(e)
+            except ValueError as e:
+                connection.transport.close()
+                raise requests.exceptions.ConnectionError(f"Réponse HTTP invalide de {parts.hostname}: {e}")
+            return AsyncResponse(self, key, url, connection, status_code, reason, response_headers, timeout)
+
+    async def _connection(self, key, timeout):
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if not connection.is_closing() and not connection.at_eof():
+                return connection, True
+            connection.transport.close()
+        scheme, hostname, port = key
+        if scheme == 'https' and self._ssl is None:
+            self._ssl = ssl_context()
+        try:
+            _, connection = await asyncio.wait_for(
+                asyncio.get_running_loop().create_connection(
+                    HttpProtocol, hostname, port, ssl=self._ssl if scheme == 'https' else None
+                ),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            raise requests.exceptions.ConnectTimeout(f"Délai de connexion dépassé pour {hostname}")
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(e)
+        return connection, False
+
+    async def _read_head(self, connection):
+        head = await connection.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode('latin-1').split("\r\n")
+        version, status, *reason = status_line.split(" ", 2)
+        if not version.startswith("HTTP/"):
+            raise ValueError(status_line)
+        headers = CaseInsensitiveDict()
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip()] = value.strip()
+        return int(status), reason[0] if reason else "", headers
+
+    def _release(self, key, connection):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < POOL_SIZE and not connection.is_closing():
+            # Réception reprise pour voir la fermeture par le serveur d'une connexion inactive
+            connection.resume()
+            idle.append(connection)
+        else:
+            connection.transport.close()
+
+    def close(self):
+        """Fermer les connexions inactives"""
+        for idle in self._idle.values():
+            for connection in idle:
+                connection.transport.close()
+        self._idle.clear()
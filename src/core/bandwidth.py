@@ -0,0 +1,110 @@
+"""
+Limitation de bande passante commune à tous les transferts
+
+Un seau à jetons unique est partagé par les téléchargements et la mise à jour
+de l'application : la limite configurée s'applique au débit total, quel que
+soit le nombre de connexions ouvertes. Les jetons se remplissent au débit
+configuré jusqu'à la rafale autorisée ; un transfert prend des jetons par
+petites portions avant d'écrire ce qu'il a reçu, ce qui lisse le trafic au lieu
+d'alterner pleine vitesse et longues pauses.
+"""
+import time
+import threading
+from typing import Callable, Optional
+
+# Rafale par défaut : un quart de seconde de débit, au moins 16 Ko
+DEFAULT_BURST_SECONDS = 0.25
+MIN_BURST = 16 * 1024
+# Attente maximale avant de revérifier l'arrêt ou un changement de limite
+MAX_WAIT = 0.1
+
+class TokenBucket:
+    """Seau à jetons utilisable depuis plusieurs threads (1 jeton = 1 octet)
+
+    rate vaut 0 pour un débit illimité. La limite et la rafale peuvent changer
+    pendant les transferts : les threads en attente le prennent en compte dans
+    les MAX_WAIT secondes.
+    """
+
+    def __init__(self, rate=0, burst=None):
+        self._condition = threading.Condition()
+        self.rate = 0
+        self.burst = MIN_BURST
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        """Changer le débit (octets/s, 0 = illimité) et la rafale (octets, None = automatique)"""
+        with self._condition:
+            self._refill()
+            self.rate = max(0, int(rate))
+            self.burst = int(burst) if burst else max(MIN_BURST, int(self.rate * DEFAULT_BURST_SECONDS))
+            self._tokens = min(self._tokens, self.burst)
+            self._condition.notify_all()
+
+    @property
+    def limited(self) -> bool:
+        return self.rate > 0
+
+    def chunk_size(self, size) -> int:
+        """Taille de lecture adaptée à la limite : jamais plus d'une rafale à la fois"""
+        return min(size, self.burst) if self.rate else size
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def consume(self, size, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """Attendre que size octets soient autorisés
+
+        Retourne False si should_stop() devient vrai pendant l'attente.
+        """
+        while size > 0:
+            with self._condition:
+                if not self.rate:
+                    return True
+                self._refill()
+                portion = min(size, self.burst)
+                if self._tokens >= portion:
+                    self._tokens -= portion
+                    size -= portion
+                    continue
+                wait = min(MAX_WAIT, (portion - self._tokens) / self.rate)
+                self._condition.wait(wait)
+            if should_stop is not None and should_stop():
+                return False
+        return True
+
+    def try_consume(self, size) -> float:
+        """Prendre size octets (au plus une rafale) sans attendre
+
+        Retourne 0 si c'est fait, sinon le temps à attendre avant de réessayer
+        (pour les transferts asyncio, qui ne doivent pas bloquer la boucle).
+        """
+        with self._condition:
+            if not self.rate:
+                return 0
+            self._refill()
+            size = min(size, self.burst)
+            if self._tokens >= size:
+                self._tokens -= size
+                return 0
+            return min(MAX_WAIT, (size - self._tokens) / self.rate)
+
+# Seau partagé par tous les transferts de l'application
+_shared_limiter = TokenBucket()
+
+def shared_limiter() -> TokenBucket:
+    """Seau à jetons commun à tous les transferts"""
+    return _shared_limiter
+
+def apply_bandwidth_config(config):
+    """Appliquer la limite de la configuration (Ko/s) au seau partagé, transferts en cours compris"""
+    burst_kb = config.get("bandwidth_burst", 0)
+    _shared_limiter.set_rate(
+        config.get("bandwidth_limit", 0) * 1024,
+        burst_kb * 1024 if burst_kb else None
+    )
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import logging
+from typing import Optional, Dict
+from src.core.config import get_config_dir
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter à chaque changement de la structure des catalogues sérialisés
+CACHE_FORMAT_VERSION = 12
+
+def get_cache_dir():
+    """Retourne le répertoire du cache des playlists"""
+    cache_dir = os.path.join(get_config_dir(), 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+class PlaylistCache:
+    """Cache disque des catalogues M3U analysés, indexé par URL
+
+    Chaque playlist est stockée dans deux fichiers : un petit fichier JSON avec
+    les validateurs HTTP (ETag / Last-Modified) et un fichier pickle binaire
+    contenant le catalogue déjà analysé, rechargeable sans nouveau parsing.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or get_cache_dir()
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.bin'
+
+    def read_meta(self, url) -> Optional[Dict]:
+        """Lire les métadonnées du cache pour cette URL"""
+        meta_path, data_path = self._paths(url)
+        if not os.path.exists(meta_path) or not os.path.exists(data_path):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Métadonnées de cache illisibles pour {url}: {e}")
+            return None
+        if meta.get('version') != CACHE_FORMAT_VERSION or meta.get('url') != url:
+            return None
+        return meta
+
+    def get_validators(self, url) -> Dict[str, str]:
+        """En-têtes de requête conditionnelle pour revalider la playlist"""
+        meta = self.read_meta(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load(self, url):
+        """Charger le catalogue en cache, ou None s'il est absent ou invalide"""
+        if self.read_meta(url) is None:
+            return None
+        _, data_path = self._paths(url)
+        start = time.time()
+        try:
+            with open(data_path, 'rb') as f:
+                result = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Cache illisible pour {url}, il sera ignoré: {e}")
+            return None
+        logger.debug(f"Catalogue chargé depuis le cache en {(time.time() - start) * 1000:.0f} ms")
+        return result
+
+    def store(self, url, result, etag=None, last_modified=None):
+        """Enregistrer un catalogue analysé avec ses validateurs HTTP"""
+        meta_path, data_path = self._paths(url)
+        meta = {
+            'version': CACHE_FORMAT_VERSION,
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'saved_at': time.time()
+        }
+        try:
+            # Invalider l'ancienne entrée tant que les nouvelles données ne sont pas écrites
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            # Écriture dans des fichiers temporaires puis renommage atomique
+            with open(data_path + '.tmp', 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(data_path + '.tmp', data_path)
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + '.tmp', meta_path)
+            logger.debug(f"Catalogue mis en cache pour {url}")
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache pour {url}: {e}")
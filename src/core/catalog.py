@@ -0,0 +1,723 @@
+"""
+Catalogue VOD stocké en colonnes
+
+Chaque entrée est une ligne identifiée par un entier. Les colonnes répétitives
+sont compactées : les catégories sont codées sur 2 octets dans un array et les
+identifiants xui-id numériques sur 8 octets, au lieu d'un dictionnaire de
+4 clés par entrée.
+
+Mesures (benchmarks/bench_catalog.py, 300 000 entrées, Python 3.11) :
+
+    structure                          mémoire     nom -> URL    filtre catégorie
+    entries + vod_info + seen_entries   205.4 Mo      1.32 µs         142.1 ms
+    Catalog                             113.9 Mo      1.61 µs          26.4 ms
+
+L'ancienne recherche de l'URL dans DownloadTab parcourait entries : 11.2 ms par VOD.
+"""
+import sys
+import hashlib
+from array import array
+from copy import copy
+from itertools import compress
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from src.core.metadata import FACETS, FILTER_FACETS, Metadata, extract_values, series_title
+from src.core.search import SearchIndex
+from src.utils.text import normalize, natural_key
+
+# Code de catégorie réservé aux entrées sans group-title
+NO_CATEGORY = 0
+# Valeur de la colonne xui_ids pour les entrées sans identifiant numérique
+NO_XUI_ID = -1
+# Plus grand identifiant représentable dans la colonne xui_ids
+MAX_XUI_ID = 2 ** 63 - 1
+# Type des colonnes de facettes : années, saisons et épisodes sur 2 octets, codes sur 1 octet
+FACET_TYPECODES = {'year': 'H', 'quality': 'B', 'language': 'B', 'season': 'H', 'episode': 'H'}
+
+def url_id(url) -> str:
+    """Identifiant d'une entrée sans xui-id, dérivé de son URL"""
+    return 'url-' + hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+
+def source_id(source) -> str:
+    """Préfixe des identifiants des entrées d'une playlist, dérivé de son URL"""
+    return hashlib.blake2b(source.encode('utf-8'), digest_size=4).hexdigest()
+
+def _numeric_id(value) -> Optional[int]:
+    """Identifiant sous forme d'entier si la conversion est réversible, sinon None"""
+    if not value or not value.isascii() or not value.isdigit():
+        return None
+    if len(value) > 1 and value[0] == '0':
+        return None
+    number = int(value)
+    return number if number <= MAX_XUI_ID else None
+
+@dataclass
+class CatalogDiff:
+    """Différences entre deux catalogues des mêmes playlists"""
+    new: 'Catalog'
+    added: List[int] = field(default_factory=list)  # Lignes du nouveau catalogue
+    removed: List[int] = field(default_factory=list)  # Lignes de l'ancien catalogue
+    changed: List[Tuple[int, int]] = field(default_factory=list)  # (ancienne ligne, nouvelle ligne)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+class Catalog:
+    """Catalogue des entrées d'une playlist, indexé par numéro de ligne
+
+    Les lignes supprimées lors d'une actualisation restent en place mais sont
+    marquées comme mortes dans la colonne alive, pour que les numéros de ligne
+    des autres entrées (et les index qui y font référence) restent valides.
+    Elles sont ignorées à la lecture des listes de lignes (catégories,
+    facettes, saisons, recherche), puis compact() les retire de ces listes en
+    une passe par liste concernée.
+
+    Les numéros de ligne ne valent que pour un catalogue donné. Chaque entrée a
+    aussi un identifiant stable d'un chargement à l'autre, qui reprend la clé
+    d'actualisation (keyed_rows) : un hachage de l'URL de sa playlist, puis son
+    xui-id ou un hachage de son URL, suivis de "#2", "#3"... pour les doublons
+    de la même playlist. Il ne dépend donc pas de l'ordre de fusion des sources.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.urls: List[str] = []
+        self.logos: List[Optional[str]] = []
+        self.xui_ids = array('q')
+        self.entry_ids: List[str] = []
+        self.category_codes = array('H')
+        self.category_names: List[Optional[str]] = [None]
+        self._category_index: Dict[str, int] = {}
+        # Lignes vivantes de chaque catégorie, indexées par code (NO_CATEGORY compris)
+        self._category_rows: List[array] = [array('I')]
+        # Playlist d'origine de chaque entrée (URL de la source), codée comme les catégories
+        self.source_codes = array('H')
+        self.source_names: List[Optional[str]] = [None]
+        self._source_index: Dict[str, int] = {}
+        self._source_ids: List[str] = ['']
+        # Colonnes creuses : identifiants non numériques et attributs non reconnus
+        self._text_xui_ids: Dict[int, str] = {}
+        self._attributes: Dict[int, Dict[str, str]] = {}
+        # Index de recherche et de dédoublonnage
+        self._id_index: Dict[str, int] = {}
+        self._url_index: Dict[str, int] = {}
+        self._name_index: Dict[str, int] = {}
+        self._extra_keys = set()
+        # Index plein texte des noms, maintenu à chaque modification une fois activé
+        self.search_index: Optional[SearchIndex] = None
+        # Facettes extraites des titres (une colonne par facette) et lignes de chaque valeur
+        # des facettes filtrables, maintenues à chaque modification une fois activées
+        self.facets: Optional[Dict[str, array]] = None
+        self._facet_rows: Dict[str, Dict[int, array]] = {}
+        # Épisodes regroupés par (série normalisée, saison), activés avec les facettes
+        self._season_rows: Dict[Tuple[str, int], array] = {}
+        # Ordre alphabétique naturel de toutes les lignes et rang de chaque ligne dans cet ordre.
+        # _sorted_count vaut len(names) quand l'ordre couvre toutes les lignes.
+        self._sort_order: Optional[array] = None
+        self._sort_ranks: Optional[array] = None
+        self._sorted_count = 0
+        # Lignes vivantes (1) ou supprimées (0) et nouveautés de la dernière actualisation
+        self.alive = bytearray()
+        self.removed_count = 0
+        self.new_rows: List[int] = []
+        # Lignes supprimées encore présentes dans les listes de lignes, en attente de compact()
+        self._dead_rows: List[int] = []
+
+    def __len__(self):
+        return len(self.names) - self.removed_count
+
+    def rows(self):
+        """Numéros de ligne de toutes les entrées vivantes"""
+        if not self.removed_count:
+            return range(len(self.names))
+        return list(compress(range(len(self.names)), self.alive))
+
+    def is_alive(self, row) -> bool:
+        return bool(self.alive[row])
+
+    def _live(self, rows):
+        """Lignes vivantes d'une liste de lignes, tant que des lignes supprimées n'ont pas été compactées"""
+        if not self._dead_rows:
+            return rows
+        alive = self.alive
+        return array('I', compress(rows, map(alive.__getitem__, rows)))
+
+    @staticmethod
+    def _intern_code(value, names, index):
+        """Code d'une valeur répétitive, créé à la première occurrence (0 pour une valeur vide)"""
+        if not value:
+            return 0
+        code = index.get(value)
+        if code is None:
+            code = len(names)
+            value = sys.intern(value)
+            names.append(value)
+            index[value] = code
+        return code
+
+    def _category_code(self, group_title):
+        code = self._intern_code(group_title, self.category_names, self._category_index)
+        if code == len(self._category_rows):
+            self._category_rows.append(array('I'))
+        return code
+
+    def _source_code(self, source):
+        code = self._intern_code(source, self.source_names, self._source_index)
+        if code == len(self._source_ids):
+            self._source_ids.append(source_id(source) + ':')
+        return code
+
+    def add(self, name, url, xui_id=None, tvg_logo=None, group_title=None, attributes=None,
+            source=None) -> Optional[int]:
+        """Ajouter une entrée et retourner son numéro de ligne, ou None si (nom, URL) existe déjà"""
+        existing = self._url_index.get(url)
+        if existing is not None:
+            if self.names[existing] == name or (name, url) in self._extra_keys:
+                return None
+            # Même URL sous un autre nom : conservée comme l'ancien dédoublonnage
+            self._extra_keys.add((name, url))
+
+        row = len(self.names)
+        self.alive.append(1)
+        self.urls.append(url)
+        self.logos.append(tvg_logo)
+        category_code = self._category_code(group_title)
+        self.category_codes.append(category_code)
+        self._category_rows[category_code].append(row)
+        source_code = self._source_code(source)
+        self.source_codes.append(source_code)
+        numeric_id = _numeric_id(xui_id)
+        if numeric_id is not None:
+            self.xui_ids.append(numeric_id)
+        else:
+            self.xui_ids.append(NO_XUI_ID)
+            if xui_id:
+                self._text_xui_ids[row] = xui_id
+        if attributes:
+            self._attributes[row] = {sys.intern(key): value for key, value in attributes.items()}
+        entry_id = self._new_entry_id(self._source_ids[source_code] + (xui_id or url_id(url)))
+        self.entry_ids.append(entry_id)
+        self._id_index[entry_id] = row
+        # La colonne des noms est complétée en dernier : une ligne comptée dans len(names)
+        # est lisible en entier depuis l'interface pendant un chargement en streaming
+        self.names.append(name)
+
+        if existing is None:
+            self._url_index[url] = row
+        self._name_index.setdefault(name, row)
+        if self.search_index is not None:
+            self.search_index.add(row, name)
+        if self.facets is not None:
+            self._add_facets(row, extract_values(name, group_title))
+        return row
+
+    def _new_entry_id(self, base):
+        """Identifiant libre : base, ou base suivi du rang du doublon"""
+        if base not in self._id_index:
+            return base
+        occurrence = 2
+        while f"{base}#{occurrence}" in self._id_index:
+            occurrence += 1
+        return f"{base}#{occurrence}"
+
+    def enable_search(self):
+        """Construire l'index de recherche des noms s'il n'existe pas encore"""
+        if self.search_index is not None:
+            return self.search_index
+        index = SearchIndex(self.names)
+        for row in self.rows():
+            index.add(row, self.names[row])
+        self.search_index = index
+        return index
+
+    def prepare(self):
+        """Construire l'index de recherche, l'ordre de tri et les facettes
+
+        Chaque nom n'est normalisé qu'une seule fois pour l'index et le tri.
+        """
+        names = self.names
+        normalized = [normalize(name) for name in names]
+        if self.search_index is None:
+            index = SearchIndex(names)
+            for row in self.rows():
+                index.add_normalized(row, normalized[row])
+            self.search_index = index
+        self._build_sort_order(normalized)
+        self.enable_facets()
+
+    def enable_facets(self):
+        """Extraire les facettes de tous les titres si ce n'est pas encore fait"""
+        if self.facets is not None:
+            return
+        category_names = self.category_names
+        values = [extract_values(name, category_names[code]) for name, code in zip(self.names, self.category_codes)]
+        self.facets = {
+            facet: array(FACET_TYPECODES[facet], column)
+            for facet, column in zip(FACETS, zip(*values) if values else [()] * len(FACETS))
+        }
+        self._facet_rows = {}
+        rows = self.rows()
+        for facet in FILTER_FACETS:
+            column = self.facets[facet]
+            postings = self._facet_rows[facet] = {}
+            for row in rows:
+                value = column[row]
+                if value:
+                    posting = postings.get(value)
+                    if posting is None:
+                        posting = postings[value] = array('I')
+                    posting.append(row)
+        self._season_rows = {}
+        seasons = self.facets['season']
+        for row in rows:
+            if seasons[row]:
+                self._season_rows.setdefault(self._season_key(row), array('I')).append(row)
+
+    def _reset_facets(self):
+        self.facets = {facet: array(FACET_TYPECODES[facet]) for facet in FACETS}
+        self._facet_rows = {facet: {} for facet in FILTER_FACETS}
+        self._season_rows = {}
+
+    def _season_key(self, row) -> Tuple[str, int]:
+        return normalize(series_title(self.names[row])), self.facets['season'][row]
+
+    def _add_facets(self, row, values, alive=True):
+        """Ajouter les facettes d'une nouvelle ligne (ou d'une ligne supprimée, sans l'indexer)"""
+        facets = self.facets
+        for facet, value in zip(FACETS, values):
+            facets[facet].append(value)
+        if alive:
+            self._index_facets(row)
+
+    def _index_facets(self, row):
+        for facet in FILTER_FACETS:
+            value = self.facets[facet][row]
+            if value:
+                self._facet_rows[facet].setdefault(value, array('I')).append(row)
+        if self.facets['season'][row]:
+            self._season_rows.setdefault(self._season_key(row), array('I')).append(row)
+
+    def enable_sorting(self):
+        """Calculer l'ordre de tri naturel s'il ne couvre pas toutes les lignes"""
+        if self._sort_order is None or self._sorted_count != len(self.names):
+            self._build_sort_order([normalize(name) for name in self.names])
+
+    def _build_sort_order(self, normalized):
+        names = self.names
+        keys = [natural_key(text) + '\0' + name for text, name in zip(normalized, names)]
+        order = array('I', sorted(range(len(keys)), key=keys.__getitem__))
+        self._sort_order = order
+        self._sort_ranks = None
+        self._sorted_count = len(keys)
+
+    def sort_key(self, row):
+        """Clé de tri naturel d'une ligne, sans accents ni casse, le nom exact départageant"""
+        name = self.names[row]
+        return natural_key(normalize(name)) + '\0' + name
+
+    def sort_ranks(self) -> array:
+        """Rang de chaque ligne dans l'ordre de tri naturel"""
+        self.enable_sorting()
+        ranks = self._sort_ranks
+        if ranks is None or len(ranks) != self._sorted_count:
+            ranks = array('I', bytes(4 * self._sorted_count))
+            for rank, row in enumerate(self._sort_order):
+                ranks[row] = rank
+            self._sort_ranks = ranks
+        return ranks
+
+    def sorted_rows(self, rows=None, descending=False) -> List[int]:
+        """Lignes vivantes (ou les lignes données) dans l'ordre de tri naturel
+
+        Une sélection importante est obtenue en filtrant l'ordre précalculé,
+        une petite en triant ses lignes par rang : aucune comparaison de noms.
+        """
+        self.enable_sorting()
+        order = self._sort_order
+        if rows is None:
+            result = list(compress(order, map(self.alive.__getitem__, order)))
+        elif len(rows) * 8 >= len(order):
+            # Indexé par numéro de ligne : l'ordre compacté ne couvre plus les lignes supprimées
+            selected = bytearray(len(self.names))
+            for row in rows:
+                selected[row] = 1
+            result = list(compress(order, map(selected.__getitem__, order)))
+        else:
+            result = sorted(rows, key=self.sort_ranks().__getitem__)
+        if descending:
+            result.reverse()
+        return result
+
+    def _insert_sorted(self, rows):
+        """Placer des lignes dans l'ordre de tri précalculé, reconstruit en une seule passe"""
+        order = self._sort_order
+        sort_key = self.sort_key
+        # Les premières étapes de la dichotomie retombent sur les mêmes lignes
+        keys = {}
+
+        def key_of(row):
+            key = keys.get(row)
+            if key is None:
+                key = keys[row] = sort_key(row)
+            return key
+
+        result = array('I')
+        start = 0
+        for key, row in sorted((sort_key(row), row) for row in rows):
+            low, high = start, len(order)
+            while low < high:
+                middle = (low + high) // 2
+                if key_of(order[middle]) <= key:
+                    low = middle + 1
+                else:
+                    high = middle
+            result.extend(order[start:low])
+            result.append(row)
+            start = low
+        result.extend(order[start:])
+        self._sort_order = result
+
+    def search(self, query) -> Optional[List[int]]:
+        """Lignes dont le nom correspond à la requête, ou None sans index ou sans requête"""
+        if self.search_index is None:
+            return None
+        return self.search_index.search(query)
+
+    def fuzzy_search(self, query) -> Optional[Dict[int, int]]:
+        """Lignes proches de la requête avec leur nombre de fautes, ou None sans index ou sans requête"""
+        if self.search_index is None:
+            return None
+        return self.search_index.fuzzy_search(query)
+
+    def _set_xui_id(self, row, xui_id):
+        numeric_id = _numeric_id(xui_id)
+        if numeric_id is not None:
+            self.xui_ids[row] = numeric_id
+            self._text_xui_ids.pop(row, None)
+        else:
+            self.xui_ids[row] = NO_XUI_ID
+            if xui_id:
+                self._text_xui_ids[row] = xui_id
+            else:
+                self._text_xui_ids.pop(row, None)
+
+    def entry_id(self, row) -> str:
+        return self.entry_ids[row]
+
+    def name(self, row) -> str:
+        return self.names[row]
+
+    def url(self, row) -> str:
+        return self.urls[row]
+
+    def logo(self, row) -> Optional[str]:
+        return self.logos[row]
+
+    def category(self, row) -> Optional[str]:
+        return self.category_names[self.category_codes[row]]
+
+    def source(self, row) -> Optional[str]:
+        return self.source_names[self.source_codes[row]]
+
+    def sources(self) -> List[str]:
+        """Sources présentes dans le catalogue, dans l'ordre d'apparition"""
+        return self.source_names[1:]
+
+    def xui_id(self, row) -> Optional[str]:
+        value = self.xui_ids[row]
+        if value == NO_XUI_ID:
+            return self._text_xui_ids.get(row)
+        return str(value)
+
+    def attributes(self, row) -> Dict[str, str]:
+        return self._attributes.get(row, {})
+
+    def info(self, row) -> Dict:
+        """Informations d'une entrée, au format des anciens dictionnaires vod_info"""
+        return {
+            'id': self.entry_ids[row],
+            'xui_id': self.xui_id(row),
+            'tvg_logo': self.logo(row),
+            'group_title': self.category(row),
+            'url': self.url(row),
+            'attributes': self._attributes.get(row),
+            'source': self.source(row)
+        }
+
+    def metadata(self, row) -> Metadata:
+        """Facettes extraites du titre d'une ligne"""
+        if self.facets is None:
+            return Metadata(*extract_values(self.names[row], self.category(row)))
+        return Metadata(*(self.facets[facet][row] for facet in FACETS))
+
+    def season_rows(self, row) -> List[int]:
+        """Épisodes de la même saison de la même série qu'une ligne, par numéro d'épisode
+
+        Un épisode présent dans plusieurs sources n'est retenu qu'une fois.
+        Retourne une liste vide pour une entrée qui n'est pas un épisode, ou
+        tant que les facettes ne sont pas extraites (chargement en cours).
+        """
+        if self.facets is None or not self.facets['season'][row]:
+            return []
+        episodes = self.facets['episode']
+        rows = sorted(self._live(self._season_rows.get(self._season_key(row), ())),
+                      key=lambda other: (episodes[other], self.sort_key(other)))
+        result, seen = [], set()
+        for other in rows:
+            episode = episodes[other]
+            if episode and episode in seen:
+                continue
+            seen.add(episode)
+            result.append(other)
+        return result
+
+    def series_title(self, row) -> str:
+        return series_title(self.names[row])
+
+    def facet_rows(self, facet, value) -> array:
+        """Lignes vivantes dont la facette a cette valeur (facettes activées)"""
+        return self._live(self._facet_rows[facet].get(value, array('I')))
+
+    def facet_counts(self, facet) -> List[Tuple[int, int]]:
+        """Valeurs présentes d'une facette filtrable avec leur nombre d'entrées, triées par valeur"""
+        if self.facets is None:
+            return []
+        counts = ((value, len(self._live(rows))) for value, rows in self._facet_rows[facet].items())
+        return sorted((value, count) for value, count in counts if count)
+
+    def find_id(self, entry_id) -> Optional[int]:
+        """Ligne vivante portant cet identifiant"""
+        return self._id_index.get(entry_id)
+
+    def find_name(self, name) -> Optional[int]:
+        """Première ligne portant ce nom"""
+        return self._name_index.get(name)
+
+    def find_url(self, url) -> Optional[int]:
+        """Première ligne pointant vers cette URL"""
+        return self._url_index.get(url)
+
+    def category_code(self, group_title) -> Optional[int]:
+        """Code d'une catégorie existante, ou None si elle est inconnue"""
+        if not group_title:
+            return NO_CATEGORY
+        return self._category_index.get(group_title)
+
+    def categories(self) -> List[str]:
+        """Liste triée des catégories du catalogue"""
+        return [name for name, _ in self.category_counts()]
+
+    def category_rows(self, code) -> array:
+        """Lignes vivantes d'une catégorie, sans parcourir le catalogue"""
+        return self._live(self._category_rows[code])
+
+    def category_count(self, code) -> int:
+        return len(self.category_rows(code))
+
+    def category_counts(self) -> List[Tuple[str, int]]:
+        """Catégories non vides triées par nom, avec leur nombre d'entrées"""
+        counts = ((name, self.category_count(code)) for name, code in self._category_index.items())
+        return sorted((name, count) for name, count in counts if count)
+
+    @classmethod
+    def merge(cls, parts: List[Tuple[str, 'Catalog']]) -> 'Catalog':
+        """Fusionner les catalogues de plusieurs sources, dans l'ordre donné"""
+        merged = cls()
+        row_maps = []
+        for source, catalog in parts:
+            row_map = {}
+            for row in catalog.rows():
+                values = catalog.fields(row)
+                merged_row = merged.add(*values[:-1], source=values[-1] or source)
+                if merged_row is not None:
+                    row_map[row] = merged_row
+            row_maps.append(row_map)
+
+        # Réutiliser les index des sources plutôt que de renormaliser tous les noms
+        if all(catalog.search_index is not None for _, catalog in parts):
+            merged.search_index = SearchIndex(merged.names)
+            for (_, catalog), row_map in zip(parts, row_maps):
+                merged.search_index.extend(catalog.search_index, row_map)
+        elif any(catalog.search_index is not None for _, catalog in parts):
+            merged.enable_search()
+
+        # Les facettes sont recopiées plutôt qu'extraites une seconde fois
+        if all(catalog.facets is not None for _, catalog in parts):
+            merged._reset_facets()
+            for facet, column in merged.facets.items():
+                merged.facets[facet] = array(column.typecode, bytes(column.itemsize * len(merged.names)))
+            for (_, catalog), row_map in zip(parts, row_maps):
+                for facet in FACETS:
+                    column, merged_column = catalog.facets[facet], merged.facets[facet]
+                    for row, merged_row in row_map.items():
+                        merged_column[merged_row] = column[row]
+            for row in merged.rows():
+                merged._index_facets(row)
+        elif any(catalog.facets is not None for _, catalog in parts):
+            merged.enable_facets()
+        return merged
+
+    def fields(self, row) -> Tuple:
+        """Champs comparés lors d'une actualisation, dans l'ordre des arguments de add()"""
+        return (self.names[row], self.urls[row], self.xui_id(row), self.logos[row],
+                self.category(row), self._attributes.get(row), self.source(row))
+
+    def keyed_rows(self) -> Dict[Tuple, int]:
+        """Lignes vivantes indexées par clé stable : la source et le xui-id s'il existe, sinon l'URL
+
+        Le dernier élément de la clé numérote les doublons d'une même clé dans
+        l'ordre de la playlist.
+        """
+        keyed = {}
+        occurrences = {}
+        for row in self.rows():
+            key = (self.source(row), self.xui_id(row) or self.urls[row])
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            keyed[key + (occurrence,)] = row
+        return keyed
+
+    def diff(self, new: 'Catalog') -> CatalogDiff:
+        """Calculer les entrées ajoutées, supprimées et modifiées dans new"""
+        result = CatalogDiff(new)
+        old_keyed = self.keyed_rows()
+        for key, new_row in new.keyed_rows().items():
+            old_row = old_keyed.pop(key, None)
+            if old_row is None:
+                result.added.append(new_row)
+            elif self.fields(old_row) != new.fields(new_row):
+                result.changed.append((old_row, new_row))
+        result.removed = sorted(old_keyed.values())
+        return result
+
+    def _unindex(self, row):
+        url, name = self.urls[row], self.names[row]
+        if self._id_index.get(self.entry_ids[row]) == row:
+            del self._id_index[self.entry_ids[row]]
+        if self._url_index.get(url) == row:
+            del self._url_index[url]
+        if self._name_index.get(name) == row:
+            del self._name_index[name]
+        self._extra_keys.discard((name, url))
+
+    def remove(self, row):
+        """Marquer une ligne comme supprimée ; les listes de lignes sont nettoyées par compact()"""
+        if not self.alive[row]:
+            return
+        self._unindex(row)
+        if self.search_index is not None:
+            self.search_index.remove(row, self.names[row])
+        self.alive[row] = 0
+        self.removed_count += 1
+        self._dead_rows.append(row)
+
+    def update(self, row, source: 'Catalog', source_row) -> Optional[int]:
+        """Remplacer une ligne par une ligne d'un autre catalogue et retourner la ligne qui la remplace
+
+        L'ancienne ligne est supprimée et l'entrée ajoutée à la fin avec les
+        nouveaux champs, sous le même identifiant : aucune liste de lignes n'est
+        parcourue. Retourne None si l'entrée fait doublon avec une autre.
+        """
+        entry_id = self.entry_ids[row]
+        self.remove(row)
+        new_row = self.add(*source.fields(source_row))
+        if new_row is not None and self.entry_ids[new_row] != entry_id:
+            # Même clé d'actualisation (xui-id ou URL) : l'identifiant de l'entrée ne change pas
+            if self._id_index.get(self.entry_ids[new_row]) == new_row:
+                del self._id_index[self.entry_ids[new_row]]
+            self.entry_ids[new_row] = entry_id
+            self._id_index[entry_id] = new_row
+        return new_row
+
+    def compact(self):
+        """Retirer les lignes supprimées des listes de lignes, en une passe par liste concernée"""
+        dead = self._dead_rows
+        if dead:
+            self._dead_rows = []
+            alive = self.alive
+
+            def live(rows):
+                return array('I', compress(rows, map(alive.__getitem__, rows)))
+
+            for code in {self.category_codes[row] for row in dead}:
+                self._category_rows[code] = live(self._category_rows[code])
+            if self.facets is not None:
+                for facet in FILTER_FACETS:
+                    column, postings = self.facets[facet], self._facet_rows[facet]
+                    for value in {column[row] for row in dead}:
+                        rows = postings.get(value)
+                        if rows is not None:
+                            rows = live(rows)
+                            if rows:
+                                postings[value] = rows
+                            else:
+                                del postings[value]
+                seasons = self.facets['season']
+                for key in {self._season_key(row) for row in dead if seasons[row]}:
+                    rows = self._season_rows.get(key)
+                    if rows is not None:
+                        rows = live(rows)
+                        if rows:
+                            self._season_rows[key] = rows
+                        else:
+                            del self._season_rows[key]
+            if self._sort_order is not None:
+                self._sort_order = live(self._sort_order)
+                self._sort_ranks = None
+        if self.search_index is not None:
+            self.search_index.compact()
+
+    def copy(self) -> 'Catalog':
+        """Copie indépendante aux mêmes numéros de ligne, modifiable sans toucher à l'original
+
+        Les dictionnaires d'attributs des entrées, jamais modifiés sur place, sont partagés.
+        """
+        other = Catalog.__new__(Catalog)
+        for attribute, value in self.__dict__.items():
+            setattr(other, attribute, copy(value))
+        other._category_rows = [array('I', rows) for rows in self._category_rows]
+        other._season_rows = {key: array('I', rows) for key, rows in self._season_rows.items()}
+        other._facet_rows = {
+            facet: {value: array('I', rows) for value, rows in postings.items()}
+            for facet, postings in self._facet_rows.items()
+        }
+        if self.facets is not None:
+            other.facets = {facet: array(column.typecode, column) for facet, column in self.facets.items()}
+        if self.search_index is not None:
+            other.search_index = self.search_index.copy(other.names)
+        return other
+
+    def apply_diff(self, diff: CatalogDiff) -> Tuple[List[int], List[int], List[Tuple[int, int]]]:
+        """Appliquer une actualisation sur place
+
+        Retourne les lignes ajoutées, les lignes supprimées et les couples
+        (ancienne ligne, nouvelle ligne) des entrées modifiées. Le coût ne
+        dépend que du nombre de différences, plus une passe sur chaque liste
+        de lignes touchée ; l'ordre de tri est complété sans être recalculé.
+        """
+        new = diff.new
+        keep_order = self._sort_order is not None and self._sorted_count == len(self.names)
+        removed = list(diff.removed)
+        for row in removed:
+            self.remove(row)
+        changed = []
+        for row, new_row in diff.changed:
+            replacement = self.update(row, new, new_row)
+            if replacement is not None:
+                changed.append((row, replacement))
+            else:
+                removed.append(row)
+        added = []
+        for new_row in diff.added:
+            row = self.add(*new.fields(new_row))
+            if row is not None:
+                added.append(row)
+        self.compact()
+        if keep_order:
+            self._insert_sorted(added + [row for _, row in changed])
+            self._sorted_count = len(self.names)
+            # Rangs recalculés ici plutôt qu'à la première recherche
+            self._sort_ranks = None
+            self.sort_ranks()
+        self.new_rows = added
+        return added, removed, changed
@@ -55,10 +55,24 @@ def load_config():
     """Charger la configuration depuis le fichier"""
     default_config = {
         "m3u_url": "",
+        "m3u_sources": [],
+        "m3u_max_parallel_fetches": 3,
+        "m3u_streaming": True,
+        "m3u_cache_stale_while_revalidate": True,
+        "m3u_parse_workers": 0,
         "bandwidth_limit": 0,
+        "bandwidth_burst": 0,
+        "max_concurrent_downloads": 1,
+        "download_segments": 1,
+        "adaptive_connections": False,
+        "async_downloads": False,
+        "http_prewarm": True,
         "dark_mode": False,
         "download_dir": get_default_downloads_dir(),
         "auto_check_updates": True,
+        "download_queue": [],
+        "show_logos": True,
+        "logo_cache_max_mb": 100,
         "stats": {
             "total_downloads": 0,
             "total_size": 0,
@@ -75,6 +89,10 @@ def load_config():
                 for key, value in default_config.items():
                     if key not in config:
                         config[key] = value
+
+                # Les anciennes configurations n'ont qu'une URL
+                if not config["m3u_sources"] and config["m3u_url"]:
+                    config["m3u_sources"] = [config["m3u_url"]]
                 
                 # Valider le dossier de téléchargement
                 is_valid, result = validate_download_dir(config["download_dir"])
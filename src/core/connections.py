@@ -0,0 +1,224 @@
+"""
+Nombre de connexions adapté à chaque serveur
+
+On ne sait pas combien de connexions simultanées un fournisseur tolère avant
+de brider le débit ou de répondre 403/509. HostConnectionController apprend ce
+nombre par hôte, à la manière d'AIMD : tant que toutes les connexions permises
+sont utilisées et que le débit total progresse, il en autorise une de plus ;
+une erreur divise le nombre par deux, un débit qui stagne le réduit d'un quart.
+Le niveau qui a donné le meilleur débit sans refus est conservé dans
+hosts.json et sert de point de départ aux sessions suivantes.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+import requests
+from src.core.config import get_config_dir
+
+logger = logging.getLogger(__name__)
+
+HOSTS_FILE = os.path.join(get_config_dir(), "hosts.json")
+
+# Bornes du nombre de connexions par hôte
+MIN_CONNECTIONS = 1
+MAX_CONNECTIONS = 16
+# Durée d'une mesure de débit (secondes)
+EVALUATION_WINDOW = 5.0
+# Gain de débit minimal pour qu'une connexion supplémentaire soit jugée utile
+MIN_GAIN = 0.05
+# Réduction après une stagnation du débit
+PLATEAU_DECREASE = 0.75
+# Mesures sans nouvel essai d'augmentation après une réduction
+HOLD_WINDOWS = 6
+# Codes HTTP signalant que le serveur limite les connexions
+THROTTLING_STATUSES = {403, 429, 503, 509}
+
+def host_of(url) -> str:
+    return urlparse(url).hostname or ''
+
+def is_throttling_error(error) -> bool:
+    """Erreur indiquant probablement trop de connexions (et non une ressource absente)"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          requests.exceptions.ChunkedEncodingError)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in THROTTLING_STATUSES
+
+class _HostState:
+    def __init__(self, connections=MIN_CONNECTIONS, best_throughput=0.0):
+        self.connections = connections
+        self.best_throughput = best_throughput
+        self.best_connections = connections  # Niveau du meilleur débit, enregistré
+        self.active = 0
+        self.window_start = time.monotonic()
+        self.window_bytes = 0
+        self.window_saturated = False  # Toutes les connexions permises ont servi pendant la mesure
+        self.baseline = 0.0  # Débit mesuré au niveau précédent
+        self.probing = False  # Une connexion vient d'être ajoutée, son effet est en cours de mesure
+        self.warmup = False  # Mesure en cours faussée par l'ouverture de la nouvelle connexion
+        self.hold = 0
+        self.last_decrease = 0.0
+
+class HostConnectionController:
+    """Connexions permises par hôte, ajustées selon le débit et les erreurs
+
+    Chaque connexion ouverte vers un hôte prend une place avec acquire() et la
+    rend avec release() ; record() compte les octets reçus et record_error() les
+    refus du serveur. Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, path=HOSTS_FILE, max_connections=MAX_CONNECTIONS):
+        self.path = path
+        self.max_connections = max_connections
+        self._condition = threading.Condition()
+        self._hosts: Dict[str, _HostState] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            for host, values in saved.items():
+                connections = max(MIN_CONNECTIONS, min(self.max_connections, int(values['connections'])))
+                self._hosts[host] = _HostState(connections, float(values.get('throughput', 0)))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Impossible de lire {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        saved = {
+            host: {'connections': state.best_connections, 'throughput': round(state.best_throughput)}
+            for host, state in self._hosts.items()
+        }
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(saved, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer {self.path}: {e}")
+
+    def _state(self, host) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def connections(self, host) -> int:
+        """Nombre de connexions actuellement permises vers cet hôte"""
+        with self._condition:
+            return self._state(host).connections
+
+    def active(self, host) -> int:
+        with self._condition:
+            return self._state(host).active
+
+    def acquire(self, host, blocking=True, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """Prendre une place de connexion ; False si aucune n'est libre (ou si should_stop() devient vrai)"""
+        with self._condition:
+            state = self._state(host)
+            while state.active >= state.connections:
+                if not blocking or (should_stop is not None and should_stop()):
+                    return False
+                self._condition.wait(0.5)
+            state.active += 1
+            if state.active >= state.connections:
+                state.window_saturated = True
+            return True
+
+    def release(self, host):
+        with self._condition:
+            state = self._state(host)
+            state.active = max(0, state.active - 1)
+            self._condition.notify_all()
+
+    def over_limit(self, host) -> bool:
+        """Plus de connexions ouvertes que permis : une connexion qui se libère doit être rendue"""
+        with self._condition:
+            state = self._state(host)
+            return state.active > state.connections
+
+    def record(self, host, size):
+        """Compter des octets reçus et réévaluer le niveau à la fin de chaque mesure"""
+        with self._condition:
+            state = self._state(host)
+            state.window_bytes += size
+            if state.active >= state.connections:
+                state.window_saturated = True
+            elapsed = time.monotonic() - state.window_start
+            if elapsed >= EVALUATION_WINDOW:
+                self._evaluate(host, state, state.window_bytes / elapsed)
+
+    def _evaluate(self, host, state, throughput):
+        saturated = state.window_saturated
+        state.window_start = time.monotonic()
+        state.window_bytes = 0
+        state.window_saturated = state.active >= state.connections
+        if state.warmup:
+            # Comparer au débit d'avant l'ajout une mesure où la connexion a servi tout du long
+            state.warmup = False
+            return
+        if state.hold:
+            state.hold -= 1
+            state.baseline = throughput
+            return
+        if not saturated:
+            # Des connexions permises sont restées inutilisées : rien à apprendre
+            state.probing = False
+            state.baseline = max(state.baseline, throughput)
+            return
+
+        changed = False
+        if state.probing and throughput < state.baseline * (1 + MIN_GAIN):
+            # La dernière connexion ajoutée n'a rien apporté
+            self._decrease(host, state, PLATEAU_DECREASE, "débit stable")
+            changed = True
+        else:
+            if throughput > state.best_throughput:
+                state.best_throughput = throughput
+                state.best_connections = state.connections
+                changed = True
+            if state.connections < self.max_connections:
+                state.connections += 1
+                state.probing = True
+                state.warmup = True
+                changed = True
+                self._condition.notify_all()
+                logger.debug(f"{host}: {state.connections} connexions ({throughput / 1024:.0f} Ko/s)")
+        # Débit du niveau qui vient d'être mesuré : référence de la prochaine connexion ajoutée
+        state.baseline = throughput
+        if changed:
+            self._save()
+
+    def _decrease(self, host, state, factor, reason):
+        state.connections = max(MIN_CONNECTIONS, min(state.connections - 1, int(state.connections * factor)))
+        state.probing = False
+        state.warmup = False
+        state.hold = HOLD_WINDOWS
+        state.last_decrease = time.monotonic()
+        logger.info(f"{host}: {reason}, {state.connections} connexion(s) permise(s)")
+
+    def record_error(self, host):
+        """Le serveur refuse ou coupe des connexions : diviser le nombre permis par deux
+
+        Les refus qui suivent de près une réduction viennent des connexions
+        ouvertes avant elle et ne la répètent pas.
+        """
+        with self._condition:
+            state = self._state(host)
+            recent = time.monotonic() - state.last_decrease < EVALUATION_WINDOW
+            if state.connections > MIN_CONNECTIONS and not recent:
+                # Le niveau refusé ne sera plus proposé au démarrage
+                state.best_connections = max(MIN_CONNECTIONS, min(state.best_connections, state.connections - 1))
+                self._decrease(host, state, 0.5, "refus du serveur")
+                self._save()
+            state.window_start = time.monotonic()
+            state.window_bytes = 0
+            state.window_saturated = False
@@ -0,0 +1,138 @@
+"""
+Écriture des téléchargements sur disque, découplée de la lecture réseau
+
+Les connexions lisent directement dans des tampons préalloués (BufferPool) et
+les confient à un thread d'écriture (DiskWriter) qui les écrit à leur position
+dans le fichier, préalloué à sa taille finale. La file entre les deux est
+bornée, comme le nombre de tampons : un disque lent finit par ralentir la
+lecture, mais ne la bloque plus à chaque bloc, et aucun objet bytes n'est alloué
+par bloc reçu.
+
+Mesures : voir benchmarks/bench_download.py.
+"""
+import os
+import queue
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Taille d'un tampon de lecture par défaut ; ne doit pas dépasser MIN_SEGMENT_SIZE (download.py)
+BUFFER_SIZE = 1024 * 1024
+# Tampons en attente d'écriture au plus
+WRITE_QUEUE_SIZE = 8
+
+def preallocate(path, size):
+    """Créer le fichier à sa taille finale, en réservant l'espace disque quand c'est possible
+
+    posix_fallocate réserve réellement les blocs (pas de fichier creux, pas
+    d'erreur "disque plein" en fin de téléchargement) ; à défaut, le fichier est
+    simplement étendu.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, size)
+                return
+            except OSError as e:
+                logger.debug(f"posix_fallocate indisponible pour {path}: {e}")
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+def write_at(fd, data, offset):
+    """Écrire tout data à la position offset du fichier
+
+    Sans pwrite (Windows), la position du fichier est déplacée : un seul
+    thread doit alors écrire dans ce fichier.
+    """
+    view = memoryview(data)
+    while view:
+        if hasattr(os, 'pwrite'):
+            written = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+class BufferPool:
+    """Tampons de lecture réutilisés d'un bloc à l'autre
+
+    acquire() attend qu'un tampon soit rendu quand tous sont en cours
+    d'utilisation : c'est ce qui limite la mémoire et propage la contre-pression
+    du disque vers le réseau.
+    """
+
+    def __init__(self, count, size=BUFFER_SIZE):
+        self.size = size
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put(bytearray(size))
+
+    def acquire(self, should_stop: Optional[Callable[[], bool]] = None) -> Optional[bytearray]:
+        """Un tampon libre, ou None si should_stop() devient vrai pendant l'attente"""
+        while True:
+            try:
+                return self._free.get(timeout=0.2)
+            except queue.Empty:
+                if should_stop is not None and should_stop():
+                    return None
+
+    def release(self, buffer):
+        self._free.put(buffer)
+
+class DiskWriter(threading.Thread):
+    """Thread d'écriture positionnelle dans un fichier existant
+
+    Les blocs sont écrits dans l'ordre de soumission, à leur position ; après
+    chaque écriture, on_written(token, offset, length) est appelé et le tampon
+    rendu au pool. Les blocs d'une même connexion restent donc ordonnés.
+    """
+
+    def __init__(self, path, pool: BufferPool, on_written: Callable, queue_size=WRITE_QUEUE_SIZE):
+        super().__init__(daemon=True)
+        self.pool = pool
+        self.on_written = on_written
+        self.error: Optional[Exception] = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+        self._closed = False
+
+    def submit(self, buffer, length, offset, token=None):
+        """Confier un bloc au thread d'écriture ; bloque si la file est pleine"""
+        if self.error is not None:
+            self.pool.release(buffer)
+            raise self.error
+        self._queue.put((buffer, length, offset, token))
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            buffer, length, offset, token = item
+            try:
+                if self.error is None:
+                    self._write(memoryview(buffer)[:length], offset)
+                    self.on_written(token, offset, length)
+            except Exception as e:
+                logger.error(f"Erreur d'écriture sur disque: {str(e)}")
+                self.error = e
+            finally:
+                self.pool.release(buffer)
+
+    def _write(self, view, offset):
+        write_at(self._fd, view, offset)
+
+    def close(self):
+        """Écrire les blocs en attente, arrêter le thread et fermer le fichier"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.is_alive():
+            self._queue.put(None)
+            self.join()
+        os.close(self._fd)
@@ -1,28 +1,92 @@
 import os
+import json
+import hashlib
 import time
-import requests
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 from PyQt5.QtCore import QThread, QObject, pyqtSignal, QWaitCondition, QMutex, QMutexLocker
 from src.core.config import save_config, get_default_downloads_dir
+from src.core.bandwidth import TokenBucket, apply_bandwidth_config, shared_limiter
+from src.core.connections import HostConnectionController, host_of, is_throttling_error
+from src.core.http import body_reader, get_session
+from src.core.disk_writer import BUFFER_SIZE, WRITE_QUEUE_SIZE, BufferPool, DiskWriter, preallocate
 
-class DownloadThread(QThread):
-    progress = pyqtSignal(str, int, float)  # name, progress, speed in KB/s
-    finished = pyqtSignal()
-    error = pyqtSignal(str)
+# Téléchargements simultanés par défaut : beaucoup d'abonnements n'autorisent qu'une connexion
+DEFAULT_MAX_CONCURRENT_DOWNLOADS = 1
 
-    def __init__(self, name, url, bandwidth_limit=None, config=None):
-        super().__init__()
+# Connexions par fichier en mode segmenté (1 = un seul flux, comme avant)
+DEFAULT_DOWNLOAD_SEGMENTS = 1
+# En dessous, un fichier n'est pas découpé ; un segment n'est pas redivisé en parts plus petites.
+# Ne doit pas être inférieur à la taille d'un tampon de lecture (disk_writer.BUFFER_SIZE)
+MIN_SEGMENT_SIZE = 1024 * 1024
+# Lecture par petits blocs en mode segmenté : une connexion lente rend compte de sa progression plus souvent
+SEGMENT_BUFFER_SIZE = 256 * 1024
+SEGMENT_TIMEOUT = 30
+# Erreurs de connexion tolérées sur les segments d'un fichier avant d'abandonner
+MAX_SEGMENT_ERRORS = 5
+SEGMENT_RETRY_DELAY = 1.0
+# Intervalle de vérification des connexions disponibles pour de nouveaux segments
+WORKER_POLL_INTERVAL = 0.2
+
+# Fichier en cours de téléchargement et état permettant de le reprendre
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.json'
+# Intervalle minimal entre deux sauvegardes de l'état (secondes)
+STATE_SAVE_INTERVAL = 1.0
+
+@dataclass
+class Segment:
+    """Plage d'octets [pos, end) restant à écrire
+
+    pos avance quand les octets sont écrits sur disque, fetched quand ils sont
+    reçus du réseau : l'écart correspond aux blocs en attente d'écriture.
+    """
+    pos: int
+    end: int
+    claimed: bool = False  # Un worker télécharge déjà cette plage
+    fetched: int = -1
+
+    def __post_init__(self):
+        if self.fetched < 0:
+            self.fetched = self.pos
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.pos
+
+    @property
+    def unfetched(self) -> int:
+        return self.end - self.fetched
+
+class TransferState:
+    """Plages, reprise et progression d'un téléchargement, communes aux deux moteurs
+
+    Partagé par DownloadThread et AsyncDownload (async_download.py) : les
+    classes qui l'utilisent appellent init_transfer() dans leur constructeur et
+    définissent un signal progress(str, int, float).
+    """
+
+    def init_transfer(self, name, url, bandwidth_limit=None, config=None, limiter: Optional[TokenBucket] = None,
+                      controller: Optional[HostConnectionController] = None, entry_id=None):
         self.name = name
         self.url = url
+        # Clé du téléchargement dans DownloadManager et dans le signal progress (le nom par défaut)
+        self.entry_id = entry_id if entry_id is not None else name
+        # Conservée dans la file d'attente ; le débit est limité par le seau partagé
         self.bandwidth_limit = bandwidth_limit
+        self.limiter = limiter or shared_limiter()
+        self.controller = controller
+        self.host = host_of(url)
         self.config = config or {}
         self.stop_flag = False
         self.paused = False
-        self.pause_condition = QWaitCondition()
-        self.pause_mutex = QMutex()
         
         # Attributs pour les statistiques
         self.total_size = 0
         self.downloaded_size = 0
+        self.resumed_size = 0  # Octets déjà présents dans le .part au démarrage
         self.start_time = 0
         self.download_time = 0
         self.current_speed = 0
@@ -30,70 +94,409 @@ class DownloadThread(QThread):
         self.bytes_since_last_update = 0
         self.last_update_time = time.time()
 
-    def run(self):
+        # Plages restantes et reprise
+        self.segments: List[Segment] = []
+        self.segment_count = 1  # Connexions parallèles au plus
+        self.part_path = None
+        self.state_path = None
+        self.validators = {}
+        self.last_state_save = 0
+        self._lock = threading.Lock()  # Protège les segments, les compteurs et l'état
+        self._segment_error = None
+        self._segment_errors = 0
+
+    def prepare(self, headers) -> str:
+        """Préparer le .part et les plages à télécharger d'après les en-têtes de la première réponse
+
+        Retourne le chemin du fichier final. Reprend les plages enregistrées si
+        le serveur accepte les requêtes Range et que le fichier distant n'a pas changé.
+        """
+        # Obtenir la taille totale du fichier
+        self.total_size = int(headers.get('content-length', 0))
+        if self.total_size == 0:
+            raise Exception("Impossible de déterminer la taille du fichier")
+        
+        # Utiliser le dossier configuré ou le dossier par défaut du système
+        download_dir = self.config.get("download_dir", get_default_downloads_dir())
+        os.makedirs(download_dir, exist_ok=True)
+        filename = os.path.join(download_dir, f"{self.name}.mp4")
+        self.part_path = filename + PART_SUFFIX
+        self.state_path = self.part_path + STATE_SUFFIX
+        self.validators = {
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+        }
+        accepts_ranges = headers.get('accept-ranges', '').lower() == 'bytes'
+
+        segments = self.load_state() if accepts_ranges else None
+        if segments is not None:
+            # Reprise : seules les plages manquantes sont demandées
+            self.resumed_size = self.total_size - sum(segment.remaining for segment in segments)
+            logging.info(f"Reprise de {self.name} à {self.resumed_size * 100 // self.total_size}%")
+        else:
+            count = self.planned_segments() if accepts_ranges else 1
+            size = self.total_size // count
+            segments = [
+                Segment(i * size, self.total_size if i == count - 1 else (i + 1) * size)
+                for i in range(count)
+            ]
+            # Préallouer le fichier pour écrire chaque plage à sa position
+            preallocate(self.part_path, self.total_size)
+        self.segments = segments
+        self.downloaded_size = self.resumed_size
+        self.last_update_time = time.time()
+        self.bytes_since_last_update = 0
+        self.save_state()
+        return filename
+
+    @property
+    def single_stream(self) -> bool:
+        """Nouveau téléchargement d'une seule plage : la première réponse est lue jusqu'au bout"""
+        return self.resumed_size == 0 and len(self.segments) == 1
+
+    def complete(self, filename):
+        """Vérifier que toutes les plages sont écrites et renommer le .part"""
+        if any(segment.remaining > 0 for segment in self.segments):
+            raise Exception("Téléchargement incomplet")
+        os.replace(self.part_path, filename)
+        self.remove_state()
+        self.download_time = time.time() - self.start_time
+
+    def acquire_connection(self, blocking=True) -> bool:
+        """Prendre une place de connexion vers l'hôte (toujours accordée sans contrôleur)"""
+        if self.controller is None:
+            return True
+        return self.controller.acquire(self.host, blocking, lambda: self.stop_flag)
+
+    def release_connection(self):
+        if self.controller is not None:
+            self.controller.release(self.host)
+
+    def planned_segments(self) -> int:
+        """Nombre de connexions à utiliser pour ce fichier (1 sans découpage)"""
+        segments = int(self.config.get('download_segments', DEFAULT_DOWNLOAD_SEGMENTS))
+        return max(1, min(segments, self.total_size // MIN_SEGMENT_SIZE))
+
+    def load_state(self) -> Optional[List[Segment]]:
+        """Plages restantes d'un téléchargement interrompu, ou None s'il faut repartir de zéro"""
         try:
-            self.start_time = time.time()
-            response = requests.get(self.url, stream=True)
-            response.raise_for_status()
-            
-            # Obtenir la taille totale du fichier
-            self.total_size = int(response.headers.get('content-length', 0))
-            if self.total_size == 0:
-                raise Exception("Impossible de déterminer la taille du fichier")
-            
-            # Utiliser le dossier configuré ou le dossier par défaut du système
-            download_dir = self.config.get("download_dir", get_default_downloads_dir())
-            os.makedirs(download_dir, exist_ok=True)
-            filename = os.path.join(download_dir, f"{self.name}.mp4")
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            part_size = os.path.getsize(self.part_path)
+        except (OSError, ValueError):
+            return None
+        if (state.get('url') != self.url or state.get('size') != self.total_size
+                or part_size != self.total_size
+                or state.get('etag') != self.validators['etag']
+                or state.get('last_modified') != self.validators['last_modified']):
+            logging.info(f"Fichier distant modifié, {self.name} repart du début")
+            return None
+        try:
+            return [Segment(int(pos), int(end)) for pos, end in state['remaining'] if pos < end]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def save_state(self):
+        """Enregistrer les plages restantes à côté du .part (écriture atomique)"""
+        with self._lock:
+            self._save_state()
+
+    def _save_state(self):
+        self._write_state(self._state())
+
+    def _state(self) -> dict:
+        """Contenu du fichier d'état (appelé avec le verrou)"""
+        return {
+            'url': self.url,
+            'size': self.total_size,
+            'etag': self.validators.get('etag'),
+            'last_modified': self.validators.get('last_modified'),
+            'remaining': [[segment.pos, segment.end] for segment in self.segments if segment.remaining > 0],
+        }
+
+    def _write_state(self, state):
+        tmp_path = self.state_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+            self.last_state_save = time.time()
+        except OSError as e:
+            logging.warning(f"Impossible d'enregistrer l'état de {self.name}: {e}")
+
+    def remove_state(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    def _has_work(self) -> bool:
+        """Une plage libre ou assez grosse pour être partagée"""
+        with self._lock:
+            return any(
+                segment.unfetched > 0 and (not segment.claimed or segment.unfetched >= 2 * MIN_SEGMENT_SIZE)
+                for segment in self.segments
+            )
+
+    def _next_segment(self) -> Optional[Segment]:
+        """Une plage libre, sinon la seconde moitié de la plus grosse plage restante"""
+        with self._lock:
+            for segment in self.segments:
+                if not segment.claimed and segment.unfetched > 0:
+                    segment.claimed = True
+                    return segment
+            victim = max(self.segments, key=lambda segment: segment.unfetched)
+            if victim.unfetched < 2 * MIN_SEGMENT_SIZE:
+                return None
+            middle = victim.fetched + victim.unfetched // 2
+            segment = Segment(middle, victim.end, claimed=True)
+            victim.end = middle
+            self.segments.append(segment)
+            return segment
+
+    def record_progress(self, segment, offset, size):
+        """Compter des octets écrits, recalculer la vitesse et émettre la progression
+
+        Seuls les octets qui prolongent la partie écrite de la plage sont
+        comptés : un bloc lu avant que la fin de la plage ne recule peut la dépasser.
+        """
+        with self._lock:
+            end = min(offset + size, segment.end)
+            size = max(0, end - segment.pos) if offset <= segment.pos else 0
+            segment.pos += size
+            self.downloaded_size += size
+            self.bytes_since_last_update += size
             
-            # Ouvrir le fichier en mode binaire avec buffer optimisé
-            with open(filename, 'wb', buffering=1024*1024) as f:  # Buffer de 1MB
-                self.downloaded_size = 0
-                chunk_size = 1024*1024  # 1MB par chunk pour de meilleures performances
-                self.last_update_time = time.time()
+            # Calculer la vitesse toutes les 0.5 secondes
+            current_time = time.time()
+            if current_time - self.last_update_time >= 0.5:
+                elapsed = current_time - self.last_update_time
+                speed = self.bytes_since_last_update / elapsed  # Octets par seconde
+                self.speeds.append(speed)
+                # Garder seulement les 3 dernières mesures pour une moyenne plus réactive
+                if len(self.speeds) > 3:
+                    self.speeds.pop(0)
+                self.current_speed = sum(self.speeds) / len(self.speeds)
+                self.last_update_time = current_time
                 self.bytes_since_last_update = 0
-                
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    # Vérifier si l'arrêt a été demandé
-                    if self.stop_flag:
-                        return
-                    
-                    # Gérer la pause
-                    with QMutexLocker(self.pause_mutex):
-                        while self.paused and not self.stop_flag:
-                            self.pause_condition.wait(self.pause_mutex)
-                    
-                    if chunk:
-                        f.write(chunk)
-                        self.downloaded_size += len(chunk)
-                        self.bytes_since_last_update += len(chunk)
-                        
-                        # Calculer la vitesse toutes les 0.5 secondes
-                        current_time = time.time()
-                        if current_time - self.last_update_time >= 0.5:
-                            elapsed = current_time - self.last_update_time
-                            speed = self.bytes_since_last_update / elapsed  # Octets par seconde
-                            self.speeds.append(speed)
-                            # Garder seulement les 3 dernières mesures pour une moyenne plus réactive
-                            if len(self.speeds) > 3:
-                                self.speeds.pop(0)
-                            self.current_speed = sum(self.speeds) / len(self.speeds)
-                            self.last_update_time = current_time
-                            self.bytes_since_last_update = 0
-                        
-                        # Limiter la bande passante si nécessaire
-                        if self.bandwidth_limit:
-                            time.sleep(len(chunk) / (self.bandwidth_limit * 1024))
-                        
-                        # Émettre la progression avec la vitesse (convertie en KB/s)
-                        progress = int(self.downloaded_size * 100 / self.total_size)
-                        self.progress.emit(self.name, progress, self.current_speed / 1024)
+            if current_time - self.last_state_save >= STATE_SAVE_INTERVAL:
+                self._save_state()
+            progress = int(self.downloaded_size * 100 / self.total_size)
             
-            self.download_time = time.time() - self.start_time
+        if self.controller is not None:
+            self.controller.record(self.host, size)
+        # Émettre la progression avec la vitesse (convertie en KB/s)
+        self.progress.emit(self.entry_id, progress, self.current_speed / 1024)
+
+class DownloadThread(QThread, TransferState):
+    """Téléchargement d'un fichier, sur une connexion ou en segments parallèles
+
+    Les octets sont écrits dans "<fichier>.part", renommé en fin de
+    téléchargement, et les plages restantes sont enregistrées régulièrement
+    dans "<fichier>.part.json" avec l'URL, la taille et les validateurs HTTP
+    (ETag, Last-Modified). Après une annulation, une erreur ou un arrêt brutal,
+    le téléchargement suivant du même fichier reprend ces plages par des
+    requêtes Range si le serveur les accepte et que le fichier distant n'a pas changé.
+
+    En mode segmenté (config 'download_segments' > 1), le fichier est préalloué
+    puis découpé en plages téléchargées chacune sur sa propre connexion et
+    écrites à leur position. Un worker dont la plage est terminée prend une
+    plage libre, sinon la seconde moitié de la plus grosse plage restante :
+    les connexions rapides finissent le travail des lentes.
+
+    Avec un HostConnectionController, chaque connexion prend une place auprès
+    du contrôleur : le nombre de segments téléchargés en parallèle suit le
+    nombre de connexions que le serveur tolère, et une erreur de connexion
+    remet la plage en jeu au lieu d'interrompre le téléchargement.
+
+    Les connexions lisent dans des tampons réutilisés et un thread d'écriture
+    (DiskWriter) les écrit à leur position : la progression et les plages
+    enregistrées ne comptent que les octets déjà écrits.
+    """
+    progress = pyqtSignal(str, int, float)  # entry_id, progress, speed in KB/s
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+
+    def __init__(self, name, url, bandwidth_limit=None, config=None, limiter: Optional[TokenBucket] = None,
+                 controller: Optional[HostConnectionController] = None, entry_id=None):
+        super().__init__()
+        self.init_transfer(name, url, bandwidth_limit, config, limiter, controller, entry_id)
+        self.pause_condition = QWaitCondition()
+        self.pause_mutex = QMutex()
+        self.writer: Optional[DiskWriter] = None
+
+    def run(self):
+        holding = False
+        try:
+            self.start_time = time.time()
+            if not self.acquire_connection():
+                return
+            holding = True
+            response = get_session().get(self.url, stream=True)
+            response.raise_for_status()
+            filename = self.prepare(response.headers)
+
+            # Un tampon par connexion en cours de lecture, plus ceux en attente d'écriture
+            single = self.single_stream
+            pool = BufferPool(WRITE_QUEUE_SIZE + max(1, self.planned_segments()),
+                              BUFFER_SIZE if single else SEGMENT_BUFFER_SIZE)
+            self.writer = DiskWriter(self.part_path, pool, self._on_written)
+            self.writer.start()
+            if single:
+                # Un seul flux : la réponse déjà ouverte est lue jusqu'au bout
+                self.segments[0].claimed = True
+                self.write_response(response, self.segments[0])
+            else:
+                # Les plages sont demandées sur de nouvelles connexions
+                response.close()
+                self.release_connection()
+                holding = False
+                self.download_segmented()
+            # Attendre l'écriture des derniers blocs
+            self.close_writer()
+            if self.stop_flag:
+                self.save_state()
+                return
+            if self._segment_error is not None:
+                raise self._segment_error
+
+            self.complete(filename)
             self.finished.emit()
             
         except Exception as e:
+            if self.controller is not None and is_throttling_error(e):
+                self.controller.record_error(self.host)
+            self.close_writer()
+            if self.segments:
+                self.save_state()
             self.error.emit(str(e))
+        finally:
+            if holding:
+                self.release_connection()
+
+    def close_writer(self):
+        """Attendre l'écriture des blocs en attente et fermer le fichier"""
+        if self.writer is not None:
+            self.writer.close()
+            if self._segment_error is None and self.writer.error is not None:
+                self._segment_error = self.writer.error
+            self.writer = None
+
+    def download_segmented(self):
+        """Télécharger les plages restantes sur des connexions parallèles
+
+        Un worker démarre dès qu'une connexion est disponible et qu'il reste
+        une plage à prendre ; il s'arrête quand le contrôleur réduit le nombre
+        de connexions ou après une erreur, sa plage revenant aux autres.
+        """
+        self.segment_count = max(1, self.planned_segments())
+        self._segment_error = None
+        self._segment_errors = 0
+        if self.segment_count > 1:
+            logging.info(f"Téléchargement de {self.name} en {self.segment_count} segments au plus")
+
+        workers = []
+        while not self.stop_flag and self._segment_error is None:
+            workers = [worker for worker in workers if worker.is_alive()]
+            if not self._has_work():
+                if not workers:
+                    break
+            elif len(workers) < self.segment_count and self.acquire_connection(blocking=not workers):
+                worker = threading.Thread(target=self._segment_worker, daemon=True)
+                worker.start()
+                workers.append(worker)
+                continue
+            time.sleep(WORKER_POLL_INTERVAL)
+        for worker in workers:
+            worker.join()
+
+    def _segment_worker(self):
+        """Télécharger des plages sur une connexion déjà réservée, puis la rendre"""
+        segment = None
+        try:
+            segment = self._next_segment()
+            while segment is not None and not self.stop_flag and self._segment_error is None:
+                self._fetch_segment(segment)
+                if self.controller is not None and self.controller.over_limit(self.host):
+                    break
+                segment = self._next_segment()
+        except Exception as e:
+            with self._lock:
+                self._segment_errors += 1
+                retry = (segment is not None and is_throttling_error(e)
+                         and self._segment_errors <= MAX_SEGMENT_ERRORS)
+                if retry:
+                    # La plage reprendra à sa position sur une autre connexion
+                    segment.claimed = False
+            if retry:
+                logging.warning(f"Connexion refusée sur un segment de {self.name}: {str(e)}")
+                if self.controller is not None:
+                    self.controller.record_error(self.host)
+                time.sleep(SEGMENT_RETRY_DELAY)
+            else:
+                logging.error(f"Erreur sur un segment de {self.name}: {str(e)}")
+                self._segment_error = e
+        finally:
+            self.release_connection()
+
+    def _fetch_segment(self, segment):
+        """Télécharger une plage par une requête Range"""
+        with self._lock:
+            start, end = segment.fetched, segment.end
+        if start >= end:
+            return
+        headers = {'Range': f"bytes={start}-{end - 1}"}
+        with get_session().get(self.url, headers=headers, stream=True, timeout=SEGMENT_TIMEOUT) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise Exception("Le serveur ne respecte pas les requêtes partielles")
+            self.write_response(response, segment)
+
+    def write_response(self, response, segment):
+        """Lire une réponse à partir de segment.fetched jusqu'à la fin de la plage
+
+        Les octets sont lus directement dans un tampon du pool puis confiés au
+        thread d'écriture. La fin de la plage peut reculer pendant la lecture si
+        un autre worker en reprend une partie : elle reste toujours au-delà du
+        bloc en cours, le partage se faisant au milieu d'au moins 2 MIN_SEGMENT_SIZE.
+        """
+        readinto = body_reader(response)
+        writer = self.writer
+        pool = writer.pool
+        should_stop = lambda: self.stop_flag or self._segment_error is not None
+        while True:
+            # Vérifier si l'arrêt a été demandé
+            if should_stop():
+                return
+            
+            # Gérer la pause
+            self.wait_if_paused()
+
+            buffer = pool.acquire(should_stop)
+            if buffer is None:
+                return
+            with self._lock:
+                offset = segment.fetched
+                size = min(pool.size, segment.unfetched)
+            size = self.limiter.chunk_size(size)
+            count = readinto(memoryview(buffer)[:size]) if size > 0 else 0
+            # Limiter la bande passante, en commun avec les autres transferts
+            if not count or not self.limiter.consume(count, should_stop):
+                pool.release(buffer)
+                return
+            with self._lock:
+                segment.fetched = offset + count
+            writer.submit(buffer, count, offset, segment)
+
+    def _on_written(self, segment, offset, size):
+        """Appelé par le thread d'écriture après chaque bloc écrit"""
+        self.record_progress(segment, offset, size)
+
+    def wait_if_paused(self):
+        with QMutexLocker(self.pause_mutex):
+            while self.paused and not self.stop_flag:
+                self.pause_condition.wait(self.pause_mutex)
 
     def stop(self):
         self.stop_flag = True
@@ -108,20 +511,49 @@ class DownloadThread(QThread):
             self.pause_condition.wakeAll()
 
 
+def short_id(entry_id) -> str:
+    """Court suffixe stable dérivé d'un identifiant d'entrée, pour départager deux fichiers de même nom"""
+    return hashlib.blake2b(entry_id.encode('utf-8'), digest_size=3).hexdigest()
+
+def _queue_item(item) -> tuple:
+    """Élément de file (entry_id, name, url, bandwidth_limit)
+
+    Les files sauvegardées avant l'identifiant des entrées, (name, url,
+    bandwidth_limit), sont reprises avec l'URL pour identifiant.
+    """
+    item = tuple(item)
+    if len(item) == 3:
+        name, url, bandwidth_limit = item
+        return url, name, url, bandwidth_limit
+    return item
+
 class DownloadManager(QObject):
-    download_progress = pyqtSignal(str, int, float)  # name, progress, speed
-    download_finished = pyqtSignal(str)
-    download_error = pyqtSignal(str, str)
+    """File d'attente et téléchargements actifs
+
+    Jusqu'à max_concurrent_downloads téléchargements tournent en même temps
+    (une connexion par ligne de l'abonnement). Chaque téléchargement est
+    identifié par l'identifiant stable de son entrée (Catalog.entry_id) : pause,
+    reprise et annulation visent un élément précis, même si deux entrées ont le
+    même titre. Le nom d'un élément est aussi celui du fichier produit ; il est
+    complété par short_id() quand un autre élément en file ou en cours porte déjà ce nom.
+    """
+    download_progress = pyqtSignal(str, int, float)  # entry_id, progress, speed
+    download_finished = pyqtSignal(str)  # entry_id
+    download_error = pyqtSignal(str, str)  # entry_id, message
     queue_updated = pyqtSignal()
-    download_paused = pyqtSignal(str)
-    download_resumed = pyqtSignal(str)
+    download_paused = pyqtSignal(str)  # entry_id
+    download_resumed = pyqtSignal(str)  # entry_id
 
     def __init__(self, config):
         super().__init__()
         self.config = config
-        self.download_queue = []  # [(name, url, bandwidth_limit), ...]
-        self.current_download = None  # DownloadThread actif
-        self.download_history = []  # [(name, status, timestamp), ...]
+        apply_bandwidth_config(config)
+        # Connexions tolérées par chaque serveur, apprises au fil des téléchargements
+        self.host_controller = HostConnectionController()
+        # File d'attente sauvegardée dans la configuration, reprise au démarrage
+        self.download_queue = [_queue_item(item) for item in config.get('download_queue', [])]  # [(entry_id, name, url, bandwidth_limit), ...]
+        self.active_downloads: Dict[str, DownloadThread] = {}  # entry_id -> DownloadThread (ou AsyncDownload) actif, dans l'ordre de démarrage
+        self.download_history = [(entry_id, name, "En attente", time.time()) for entry_id, name, _, _ in self.download_queue]  # [(entry_id, name, status, timestamp), ...]
         self.stats = self.config.get('stats', {
             'total_downloads': 0,
             'total_size': 0,
@@ -129,29 +561,136 @@ class DownloadManager(QObject):
             'download_times': []
         })
 
-    def add_to_queue(self, name, url, bandwidth_limit=None):
-        self.download_queue.append((name, url, bandwidth_limit))
-        self.download_history.append((name, "En attente", time.time()))
-        self.queue_updated.emit()
+    @property
+    def max_concurrent_downloads(self) -> int:
+        return max(1, int(self.config.get('max_concurrent_downloads', DEFAULT_MAX_CONCURRENT_DOWNLOADS)))
+
+    def set_max_concurrent_downloads(self, limit):
+        """Changer le nombre de téléchargements simultanés
+
+        Une limite plus haute démarre aussitôt les éléments en attente ; une
+        limite plus basse laisse finir les téléchargements en cours.
+        """
+        self.config['max_concurrent_downloads'] = max(1, int(limit))
         self.process_queue()
 
-    def process_queue(self):
-        if not self.current_download and self.download_queue:
-            name, url, bandwidth_limit = self.download_queue[0]
-            self.start_download(name, url, bandwidth_limit)
-            self.download_queue.pop(0)
+    def is_active(self, entry_id) -> bool:
+        return entry_id in self.active_downloads
+
+    def name_of(self, entry_id) -> Optional[str]:
+        """Nom (et fichier) d'un élément de la file, en cours ou de l'historique"""
+        thread = self.active_downloads.get(entry_id)
+        if thread is not None:
+            return thread.name
+        for item_id, name, _, _ in self.download_history:
+            if item_id == entry_id:
+                return name
+        return None
+
+    def current_speed(self) -> float:
+        """Débit cumulé des téléchargements actifs, en octets par seconde"""
+        return sum(thread.current_speed for thread in self.active_downloads.values() if not thread.paused)
+
+    def add_to_queue(self, entry_id, name, url, bandwidth_limit=None) -> Optional[tuple]:
+        """Ajouter un téléchargement ; retourne l'élément mis en file, ou None s'il y est déjà"""
+        added = self.add_many([(entry_id, name, url, bandwidth_limit)])
+        return added[0] if added else None
+
+    def add_many(self, items) -> List[tuple]:
+        """Ajouter plusieurs téléchargements (entry_id, name, url, bandwidth_limit) à la file d'attente
+
+        Une seule notification queue_updated et une seule sauvegarde, quel que
+        soit le nombre d'éléments : mettre une saison entière en file reste instantané.
+        Une entrée déjà en file ou en cours est ignorée. Un nom déjà pris par une
+        autre entrée reçoit le suffixe short_id() : les deux écriraient sinon le même fichier.
+        Retourne les éléments acceptés, avec leur nom définitif.
+        """
+        known = set(self.active_downloads)
+        known.update(entry_id for entry_id, _, _, _ in self.download_queue)
+        names = {thread.name for thread in self.active_downloads.values()}
+        names.update(name for _, name, _, _ in self.download_queue)
+        added = []
+        for entry_id, name, url, bandwidth_limit in items:
+            if entry_id in known:
+                continue
+            if name in names:
+                name = f"{name} [{short_id(entry_id)}]"
+            known.add(entry_id)
+            names.add(name)
+            added.append((entry_id, name, url, bandwidth_limit))
+        if not added:
+            return added
+        now = time.time()
+        self.download_queue.extend(added)
+        self.download_history.extend((entry_id, name, "En attente", now) for entry_id, name, _, _ in added)
+        if not self.process_queue():
+            self.save_queue()
+            self.queue_updated.emit()
+        return added
+
+    def save_queue(self):
+        """Sauvegarder la file d'attente, téléchargements en cours compris, dans la configuration"""
+        queue = [(thread.entry_id, thread.name, thread.url, thread.bandwidth_limit)
+                 for thread in self.active_downloads.values()]
+        queue.extend(self.download_queue)
+        self.config['download_queue'] = [list(item) for item in queue]
+        try:
+            save_config(self.config)
+        except Exception as e:
+            logging.error(f"Erreur lors de la sauvegarde de la file d'attente: {e}")
+
+    def process_queue(self) -> bool:
+        """Démarrer des éléments de la file tant que la limite n'est pas atteinte
+
+        Retourne True si au moins un téléchargement a démarré (la file est alors
+        sauvegardée et l'interface notifiée).
+        """
+        started = False
+        while self.download_queue and len(self.active_downloads) < self.max_concurrent_downloads:
+            self._start_thread(*self.download_queue.pop(0))
+            started = True
+        if started:
+            self.save_queue()
+            self.queue_updated.emit()
+        return started
+
+    def start_next(self):
+        """Démarrer les téléchargements suivants, ou sauvegarder la file si rien ne démarre"""
+        if not self.process_queue():
+            self.save_queue()
 
-    def start_download(self, name, url, bandwidth_limit=None):
-        self.current_download = DownloadThread(name, url, bandwidth_limit, self.config)
-        self.current_download.progress.connect(
+    def start_download(self, entry_id, name, url, bandwidth_limit=None):
+        self._start_thread(entry_id, name, url, bandwidth_limit)
+        self.save_queue()
+        self.queue_updated.emit()
+
+    def _start_thread(self, entry_id, name, url, bandwidth_limit):
+        controller = self.host_controller if self.config.get('adaptive_connections', False) else None
+        use_async = self.config.get('async_downloads', False)
+        if use_async:
+            # Importé ici : async_download dépend de ce module
+            from src.core.async_download import AsyncDownload
+            from src.core.async_http import uses_proxy
+            if uses_proxy(url):
+                logging.warning(f"Proxy configuré pour {host_of(url)} : {name} est téléchargé sans le moteur asyncio")
+                use_async = False
+        if use_async:
+            thread = AsyncDownload(name, url, bandwidth_limit, self.config, controller=controller, entry_id=entry_id)
+        else:
+            thread = DownloadThread(name, url, bandwidth_limit, self.config, controller=controller, entry_id=entry_id)
+        thread.progress.connect(
             lambda n, p, s: self.download_progress.emit(n, p, s)
         )
-        self.current_download.finished.connect(lambda: self.on_download_finished(name))
-        self.current_download.error.connect(lambda e: self.on_download_error(name, e))
-        self.current_download.start()
-        self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-        self.download_history.append((name, "En cours", time.time()))
-        self.queue_updated.emit()
+        thread.finished.connect(lambda: self.on_download_finished(entry_id))
+        thread.error.connect(lambda e: self.on_download_error(entry_id, e))
+        self.active_downloads[entry_id] = thread
+        thread.start()
+        self._set_status(entry_id, "En cours")
+
+    def _set_status(self, entry_id, status):
+        name = self.name_of(entry_id)
+        self.download_history = [item for item in self.download_history if item[0] != entry_id]
+        self.download_history.append((entry_id, name, status, time.time()))
 
     def format_size(self, size_in_bytes):
         """Formater la taille en format lisible"""
@@ -161,84 +700,89 @@ class DownloadManager(QObject):
             size_in_bytes /= 1024.0
         return f"{size_in_bytes:.2f} To"
 
-    def on_download_finished(self, name):
+    def on_download_finished(self, entry_id):
         """Appelé quand un téléchargement est terminé"""
-        if self.current_download:
-            # Mise à jour des statistiques
-            self.stats['total_downloads'] += 1
-            self.stats['total_size'] += self.current_download.total_size
-            if self.current_download.download_time > 0:
-                speed = self.current_download.total_size / self.current_download.download_time
-                self.stats['download_times'].append(speed)
-                self.stats['average_speed'] = sum(self.stats['download_times']) / len(self.stats['download_times'])
-            
-            # Formater la taille totale pour l'historique
-            total_size = self.format_size(self.current_download.total_size)
-            
-            # Sauvegarder les statistiques dans la configuration
-            self.config['stats'] = self.stats
-            save_config(self.config)
-            
-            # Nettoyer le thread de téléchargement
-            self.current_download.deleteLater()
-            self.current_download = None
-            
-            # Mettre à jour l'historique avec la taille
-            self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-            self.download_history.append((name, f"Terminé - {total_size}", time.time()))
-            self.download_finished.emit(name)
-            
-            # Démarrer automatiquement le prochain téléchargement
-            if self.download_queue:
-                next_name, next_url, next_bandwidth = self.download_queue.pop(0)
-                self.start_download(next_name, next_url, next_bandwidth)
-
-    def on_download_error(self, name, error):
-        if self.current_download:
-            self.current_download.deleteLater()
-            self.current_download = None
-            self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-            self.download_history.append((name, f"Erreur: {error}", time.time()))
-            self.download_error.emit(name, error)
-            self.queue_updated.emit()
-            
-            # Démarrer automatiquement le prochain téléchargement même en cas d'erreur
-            if self.download_queue:
-                next_name, next_url, next_bandwidth = self.download_queue.pop(0)
-                self.start_download(next_name, next_url, next_bandwidth)
-
-    def cancel_download(self, name):
-        # Si c'est le téléchargement en cours
-        if self.current_download and self.current_download.name == name:
-            self.current_download.stop()
+        thread = self.active_downloads.pop(entry_id, None)
+        if thread is None:
+            return
+        # Mise à jour des statistiques
+        self.stats['total_downloads'] += 1
+        self.stats['total_size'] += thread.total_size
+        if thread.download_time > 0:
+            # Vitesse calculée sur les octets réellement transférés pendant cette session
+            speed = (thread.total_size - thread.resumed_size) / thread.download_time
+            self.stats['download_times'].append(speed)
+            self.stats['average_speed'] = sum(self.stats['download_times']) / len(self.stats['download_times'])
+
+        # Sauvegarder les statistiques dans la configuration
+        self.config['stats'] = self.stats
+        save_config(self.config)
+
+        # Nettoyer le thread de téléchargement
+        thread.wait()
+        thread.deleteLater()
+
+        # Mettre à jour l'historique avec la taille
+        self._set_status(entry_id, f"Terminé - {self.format_size(thread.total_size)}")
+        self.download_finished.emit(entry_id)
+
+        # Démarrer automatiquement le prochain téléchargement
+        self.start_next()
+        self.queue_updated.emit()
+
+    def on_download_error(self, entry_id, error):
+        thread = self.active_downloads.pop(entry_id, None)
+        if thread is None:
+            return
+        thread.wait()
+        thread.deleteLater()
+        self._set_status(entry_id, f"Erreur: {error}")
+        self.download_error.emit(entry_id, error)
+
+        # Démarrer automatiquement le prochain téléchargement même en cas d'erreur
+        self.start_next()
+        self.queue_updated.emit()
+
+    def cancel_download(self, entry_id):
+        thread = self.active_downloads.pop(entry_id, None)
+        # Si c'est un téléchargement en cours
+        if thread is not None:
+            thread.stop()
             # Attendre que le thread soit terminé
-            self.current_download.wait()
+            thread.wait()
             # Maintenant on peut supprimer le thread en toute sécurité
-            self.current_download.deleteLater()
-            self.current_download = None
-            self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-            self.download_history.append((name, "Annulé", time.time()))
-            self.queue_updated.emit()
-            self.process_queue()
+            thread.deleteLater()
+            self._set_status(entry_id, "Annulé")
+            self.start_next()
         # Si c'est dans la file d'attente
         else:
-            self.download_queue = [(n, u, b) for n, u, b in self.download_queue if n != name]
-            self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-            self.download_history.append((name, "Annulé", time.time()))
-            self.queue_updated.emit()
+            self.download_queue = [item for item in self.download_queue if item[0] != entry_id]
+            self._set_status(entry_id, "Annulé")
+            self.save_queue()
+        self.queue_updated.emit()
+
+    def stop_all(self):
+        """Arrêter tous les téléchargements actifs (fermeture de l'application)
 
-    def pause_download(self, name):
-        if self.current_download and self.current_download.name == name:
-            self.current_download.pause()
-            self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-            self.download_history.append((name, "En pause", time.time()))
-            self.download_paused.emit(name)
+        La file sauvegardée n'est pas modifiée : ils reprendront au prochain lancement.
+        """
+        for thread in self.active_downloads.values():
+            thread.stop()
+        for thread in self.active_downloads.values():
+            thread.wait()
+
+    def pause_download(self, entry_id):
+        thread = self.active_downloads.get(entry_id)
+        if thread is not None:
+            thread.pause()
+            self._set_status(entry_id, "En pause")
+            self.download_paused.emit(entry_id)
             self.queue_updated.emit()
 
-    def resume_download(self, name):
-        if self.current_download and self.current_download.name == name:
-            self.current_download.resume()
-            self.download_history = [(n, s, t) for n, s, t in self.download_history if n != name]
-            self.download_history.append((name, "En cours", time.time()))
-            self.download_resumed.emit(name)
-            self.queue_updated.emit() 
\ No newline at end of file
+    def resume_download(self, entry_id):
+        thread = self.active_downloads.get(entry_id)
+        if thread is not None:
+            thread.resume()
+            self._set_status(entry_id, "En cours")
+            self.download_resumed.emit(entry_id)
+            self.queue_updated.emit()
@@ -0,0 +1,158 @@
+"""
+Client HTTP commun à toute l'application
+
+Une seule session requests, avec un pool de connexions persistantes par hôte,
+sert aux playlists, aux téléchargements, aux logos et aux mises à jour : une
+requête vers un serveur déjà contacté réutilise sa connexion TCP/TLS au lieu
+de refaire la résolution DNS et la négociation. Les résolutions DNS sont aussi
+gardées en mémoire quelques minutes, et prewarm() ouvre à l'avance une connexion
+vers le serveur d'un VOD sélectionné pour que son téléchargement démarre plus vite.
+"""
+import time
+import socket
+import logging
+import threading
+import http.client
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+# Hôtes dont le pool est gardé, et connexions inactives conservées par hôte
+POOL_HOSTS = 16
+POOL_SIZE = 32
+# Durée de conservation d'une résolution DNS (secondes), et résolutions gardées au plus
+DNS_TTL = 300
+MAX_DNS_ENTRIES = 256
+# Un même hôte n'est pas préchauffé plus souvent (secondes), délai de la requête de préchauffage
+PREWARM_INTERVAL = 30
+PREWARM_TIMEOUT = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Session HTTP partagée, créée au premier appel"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            install_dns_cache()
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({'User-Agent': USER_AGENT})
+            _session = session
+        return _session
+
+class DnsCache:
+    """Résolutions DNS gardées DNS_TTL secondes, pour tout le processus
+
+    Remplace socket.getaddrinfo : urllib3 l'appelle à chaque nouvelle connexion,
+    y compris pour les connexions parallèles d'un même téléchargement. Au plus
+    MAX_DNS_ENTRIES résolutions sont gardées : une résolution expirée est retirée
+    dès qu'elle est demandée, et la moins récemment utilisée quand le cache est plein.
+    """
+
+    def __init__(self, resolve, ttl=DNS_TTL, max_entries=MAX_DNS_ENTRIES):
+        self.resolve = resolve
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # Arguments de getaddrinfo -> (expiration, résultat)
+
+    def __call__(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        # Résolution hors du verrou : un serveur DNS lent ne bloque pas les autres hôtes
+        result = self.resolve(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def install_dns_cache():
+    """Mettre en place le cache DNS (une seule fois)"""
+    if not isinstance(socket.getaddrinfo, DnsCache):
+        socket.getaddrinfo = DnsCache(socket.getaddrinfo)
+
+_prewarm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prewarm")
+_prewarmed = {}  # Hôte -> date du dernier préchauffage
+
+def prewarm(url):
+    """Ouvrir en arrière-plan une connexion vers le serveur de cette URL
+
+    Une requête HEAD passe par la session : sa connexion reste ensuite dans le
+    pool de la session, et la prochaine requête vers ce serveur la réutilise.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return
+    host = (parsed.scheme, parsed.hostname, parsed.port)
+    now = time.monotonic()
+    if now - _prewarmed.get(host, -PREWARM_INTERVAL) < PREWARM_INTERVAL:
+        return
+    _prewarmed[host] = now
+    _prewarm_executor.submit(_open_connection, url)
+
+def _open_connection(url):
+    try:
+        # Même pool que celui du téléchargement : la session choisit le pool avec
+        # les mêmes réglages (vérification TLS, proxy) que pour le GET qui suivra.
+        # Sans corps à lire, la connexion retourne au pool dès la réponse reçue.
+        response = get_session().head(url, allow_redirects=False, timeout=PREWARM_TIMEOUT)
+        response.close()
+        logger.debug(f"Connexion préparée vers {urlparse(url).hostname}")
+    except Exception as e:
+        logger.debug(f"Préchauffage impossible pour {url}: {str(e)}")
+
+def body_reader(response):
+    """Fonction readinto(tampon) -> nombre d'octets pour le corps d'une réponse en streaming
+
+    Pour un corps non compressé, la lecture se fait directement dans le tampon
+    via la réponse http.client sous-jacente ; urllib3 passerait par un objet
+    bytes intermédiaire à chaque bloc. Une fois le corps entièrement lu, la
+    connexion retourne au pool pour la requête suivante. Les erreurs sont
+    celles de requests, comme avec iter_content().
+    """
+    raw = response.raw
+    fp = getattr(raw, '_fp', None)
+    encoding = response.headers.get('content-encoding', 'identity').lower()
+    direct = fp is not None and hasattr(fp, 'readinto') and encoding in ('', 'identity')
+
+    def readinto(buffer):
+        try:
+            if not direct:
+                return raw.readinto(buffer)
+            count = fp.readinto(buffer)
+        except (http.client.IncompleteRead, ProtocolError) as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except (ReadTimeoutError, OSError) as e:
+            raise requests.exceptions.ConnectionError(e)
+        if not count or fp.isclosed():
+            # Corps terminé : rendre la connexion au pool (keep-alive)
+            raw.release_conn()
+        return count
+    return readinto
@@ -0,0 +1,108 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+from src.core.cache import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale par défaut du cache disque des logos
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+def get_logo_cache_dir():
+    """Retourne le répertoire du cache des logos et affiches"""
+    logo_dir = os.path.join(get_cache_dir(), 'logos')
+    os.makedirs(logo_dir, exist_ok=True)
+    return logo_dir
+
+class LogoDiskCache:
+    """Cache disque des miniatures de logos, indexé par URL et limité en taille
+
+    Quand la taille totale dépasse max_bytes, les fichiers les moins récemment
+    utilisés sont supprimés. L'ordre d'utilisation est conservé d'une session à
+    l'autre par la date de modification des fichiers, mise à jour à chaque lecture.
+    Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or get_logo_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Fichiers du cache -> taille, du moins au plus récemment utilisé
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._scan()
+
+    def _scan(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name, stat.st_size))
+        except OSError as e:
+            logger.warning(f"Cache des logos illisible: {e}")
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._total += size
+
+    def __len__(self):
+        return len(self._files)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    @staticmethod
+    def _key(url) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def get(self, url) -> Optional[bytes]:
+        """Contenu en cache pour cette URL, ou None"""
+        key = self._key(url)
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        path = os.path.join(self.cache_dir, key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            with self._lock:
+                size = self._files.pop(key, None)
+                if size is not None:
+                    self._total -= size
+            return None
+
+    def put(self, url, data: bytes):
+        """Enregistrer le contenu d'une URL puis libérer de la place si nécessaire"""
+        key = self._key(url)
+        path = os.path.join(self.cache_dir, key)
+        try:
+            # Écriture dans un fichier temporaire puis renommage atomique
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le logo {url} en cache: {e}")
+            return
+        with self._lock:
+            self._total += len(data) - self._files.pop(key, 0)
+            self._files[key] = len(data)
+            evicted = []
+            while self._total > self.max_bytes and len(self._files) > 1:
+                old_key, size = self._files.popitem(last=False)
+                self._total -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_key))
+            except OSError:
+                pass
@@ -0,0 +1,161 @@
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+from src.core.search import matches, relevance
+from src.utils.text import normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Modes de tri des résultats
+SORT_RELEVANCE = "relevance"
+SORT_ASCENDING = "asc"
+SORT_DESCENDING = "desc"
+
+# Premier lot petit pour un affichage immédiat, puis lots plus gros
+FIRST_BATCH_SIZE = 200
+BATCH_SIZE = 5000
+# Au-delà, la requête est trop large pour que le classement par pertinence ait un sens :
+# les résultats sont simplement triés par nom
+MAX_RANKED_RESULTS = 50000
+
+class SearchThread(QThread):
+    """Recherche dans le catalogue hors du thread de l'interface
+
+    Chaque recherche porte un numéro de génération : l'interface ignore les lots
+    d'une recherche remplacée par une frappe plus récente, et stop() interrompt
+    le calcul au prochain point de contrôle.
+
+    Le catalogue recherché n'est jamais modifié : une actualisation produit un
+    nouveau catalogue, et l'interface ignore les résultats d'une recherche
+    lancée sur un catalogue qui a été remplacé depuis.
+    """
+    results_ready = pyqtSignal(int, list, bool)  # Génération, lot de lignes du catalogue, dernier lot
+    failed = pyqtSignal(int, str)  # Génération, message d'erreur
+
+    def __init__(self, catalog, generation, query, category=None, new_only=False,
+                 sort_mode=SORT_ASCENDING, fuzzy=False, facets=None):
+        super().__init__()
+        self.catalog = catalog
+        self.generation = generation
+        self.query = query
+        self.category = category
+        self.new_only = new_only
+        self.sort_mode = sort_mode
+        self.fuzzy = fuzzy
+        # Valeurs exigées par facette ({'year': 2023, 'quality': code...})
+        self.facets = facets or {}
+        # Nombre de fautes de chaque ligne trouvée par la recherche approximative
+        self.typos = None
+        self.should_stop = False
+
+    def stop(self):
+        self.should_stop = True
+
+    def run(self):
+        try:
+            rows = self._search()
+            if rows is None or self.should_stop:
+                return
+            start, size = 0, FIRST_BATCH_SIZE
+            while True:
+                batch = rows[start:start + size]
+                start += size
+                last = start >= len(rows)
+                self.results_ready.emit(self.generation, batch, last)
+                if last or self.should_stop:
+                    return
+                size = BATCH_SIZE
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche: {str(e)}", exc_info=True)
+            if not self.should_stop:
+                self.failed.emit(self.generation, str(e))
+
+    def _search(self):
+        """Lignes correspondant aux critères, triées ; None si la recherche a été interrompue"""
+        catalog = self.catalog
+        fragments = tokenize(self.query)
+
+        # Comparer les codes de catégorie plutôt que les chaînes
+        category_code = None
+        if self.category is not None:
+            category_code = catalog.category_code(self.category)
+            if category_code is None:
+                return []
+
+        # rows vaut None tant qu'aucun filtre n'a restreint le catalogue
+        if self.fuzzy and fragments:
+            self.typos = catalog.fuzzy_search(self.query)
+        if self.typos is not None:
+            if self.new_only:
+                rows = [row for row in catalog.new_rows if row in self.typos and catalog.is_alive(row)]
+            else:
+                rows = sorted(self.typos)
+            fragments = None
+        elif self.new_only:
+            rows = [row for row in catalog.new_rows if catalog.is_alive(row)]
+        else:
+            # L'index plein texte donne directement les lignes correspondant à la requête
+            rows = catalog.search(self.query) if fragments else None
+            if rows is not None:
+                fragments = None
+        if self.should_stop:
+            return None
+
+        # Croiser les listes de lignes de la catégorie et des facettes, de la plus courte à la plus longue
+        restrictions = []
+        if category_code is not None:
+            restrictions.append((catalog.category_rows(category_code), catalog.category_codes, category_code))
+        if self.facets and catalog.facets is None:
+            return []
+        for facet, value in self.facets.items():
+            restrictions.append((catalog.facet_rows(facet, value), catalog.facets[facet], value))
+        for posting, column, value in sorted(restrictions, key=lambda item: len(item[0])):
+            rows = self._restrict(rows, posting, column, value)
+            if self.should_stop:
+                return None
+
+        if fragments:
+            # Vérifier le terme de recherche (sans index, ou dans les nouveautés)
+            names = catalog.names
+            filtered = []
+            for count, row in enumerate(catalog.rows() if rows is None else rows):
+                if not count % 10000 and self.should_stop:
+                    return None
+                if matches(fragments, names[row]):
+                    filtered.append(row)
+            rows = filtered
+        if self.should_stop:
+            return None
+
+        if self.sort_mode == SORT_RELEVANCE and rows is not None and len(rows) <= MAX_RANKED_RESULTS:
+            return self._rank(rows)
+        # Filtrer l'ordre précalculé du catalogue plutôt que trier les noms
+        return catalog.sorted_rows(rows, descending=self.sort_mode == SORT_DESCENDING)
+
+    @staticmethod
+    def _restrict(rows, posting, column, value):
+        """Restreindre des lignes à celles d'une liste de lignes, en partant de la plus petite des deux
+
+        posting contient les lignes dont la colonne vaut value : une petite
+        sélection est vérifiée dans la colonne, une grande croisée avec posting.
+        """
+        if rows is None:
+            return list(posting)
+        if len(rows) <= len(posting):
+            return [row for row in rows if column[row] == value]
+        selected = set(rows)
+        return [row for row in posting if row in selected]
+
+    def _rank(self, rows):
+        """Trier par pertinence, puis dans l'ordre alphabétique naturel"""
+        catalog = self.catalog
+        names = catalog.names
+        ranks = catalog.sort_ranks()
+        normalized_query = normalize(self.query)
+        fragments = tokenize(self.query)
+        if self.typos is not None:
+            # Les noms avec le moins de fautes d'abord
+            typos = self.typos
+            return sorted(rows, key=lambda row: (
+                typos[row], relevance(normalized_query, fragments, names[row]), ranks[row]
+            ))
+        return sorted(rows, key=lambda row: (relevance(normalized_query, fragments, names[row]), ranks[row]))
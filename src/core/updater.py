@@ -7,6 +7,8 @@ import tempfile
 import zipfile
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
 from packaging import version
+from src.core.bandwidth import shared_limiter
+from src.core.http import get_session
 
 class UpdateCheckerThread(QThread):
     """Thread pour vérifier les mises à jour en arrière-plan"""
@@ -20,7 +22,7 @@ class UpdateCheckerThread(QThread):
 
     def run(self):
         try:
-            response = requests.get(
+            response = get_session().get(
                 f"{self.api_url}/latest",
                 timeout=5,
                 headers={'Accept': 'application/vnd.github.v3+json'}
@@ -106,7 +108,7 @@ class Updater(QObject):
             return
 
         try:
-            response = requests.get(self.github_api_url)
+            response = get_session().get(self.github_api_url)
             response.raise_for_status()
             releases = response.json()
             
@@ -138,7 +140,7 @@ class Updater(QObject):
             # Créer un dossier temporaire
             with tempfile.TemporaryDirectory() as temp_dir:
                 # Télécharger le fichier
-                response = requests.get(self.update_url, stream=True)
+                response = get_session().get(self.update_url, stream=True)
                 response.raise_for_status()
                 
                 # Obtenir la taille totale
@@ -149,9 +151,11 @@ class Updater(QObject):
                 downloaded_size = 0
                 
                 # Télécharger le fichier
+                limiter = shared_limiter()
                 with open(zip_path, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=8192):
                         if chunk:
+                            limiter.consume(len(chunk))
                             f.write(chunk)
                             downloaded_size += len(chunk)
                             if total_size:
@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
 
@@ -48,4 +49,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
+    # Nécessaire pour le parsing multi-processus dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -1,9 +1,10 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QLabel, QLineEdit, QPushButton, QSpinBox,
+    QLabel, QLineEdit, QPlainTextEdit, QPushButton, QSpinBox,
     QCheckBox, QGroupBox, QMessageBox, QFileDialog
 )
 from src.core.config import save_config, validate_download_dir
+from src.core.bandwidth import apply_bandwidth_config
 
 class ConfigTab(QWidget):
     def __init__(self, parent=None):
@@ -17,13 +18,41 @@ class ConfigTab(QWidget):
         
         # Configuration M3U
         m3u_group = QGroupBox("Configuration M3U")
-        m3u_layout = QHBoxLayout()
-        self.m3u_label = QLabel("M3U URL:")
-        self.m3u_box = QLineEdit(self.parent.m3u_url)
-        self.m3u_button = QPushButton("Sauvegarder URL")
-        m3u_layout.addWidget(self.m3u_label)
-        m3u_layout.addWidget(self.m3u_box)
-        m3u_layout.addWidget(self.m3u_button)
+        m3u_layout = QVBoxLayout()
+        m3u_url_layout = QHBoxLayout()
+        self.m3u_label = QLabel("URLs M3U\n(une par ligne):")
+        self.m3u_box = QPlainTextEdit("\n".join(self.parent.m3u_sources))
+        self.m3u_box.setMaximumHeight(80)
+        self.m3u_button = QPushButton("Sauvegarder URLs")
+        m3u_url_layout.addWidget(self.m3u_label)
+        m3u_url_layout.addWidget(self.m3u_box)
+        m3u_url_layout.addWidget(self.m3u_button)
+        m3u_layout.addLayout(m3u_url_layout)
+        self.cache_check = QCheckBox("Afficher le catalogue en cache pendant l'actualisation")
+        self.cache_check.setChecked(self.parent.config.get("m3u_cache_stale_while_revalidate", True))
+        m3u_layout.addWidget(self.cache_check)
+        self.streaming_check = QCheckBox("Afficher les entrées pendant le téléchargement de la playlist")
+        self.streaming_check.setChecked(self.parent.config.get("m3u_streaming", True))
+        m3u_layout.addWidget(self.streaming_check)
+        workers_layout = QHBoxLayout()
+        self.workers_label = QLabel("Processus d'analyse (hors streaming):")
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(0, 64)
+        self.workers_spin.setSpecialValueText("Auto")
+        self.workers_spin.setValue(self.parent.config.get("m3u_parse_workers", 0))
+        workers_layout.addWidget(self.workers_label)
+        workers_layout.addWidget(self.workers_spin)
+        workers_layout.addStretch()
+        m3u_layout.addLayout(workers_layout)
+        fetches_layout = QHBoxLayout()
+        self.fetches_label = QLabel("Playlists téléchargées en parallèle:")
+        self.fetches_spin = QSpinBox()
+        self.fetches_spin.setRange(1, 16)
+        self.fetches_spin.setValue(self.parent.config.get("m3u_max_parallel_fetches", 3))
+        fetches_layout.addWidget(self.fetches_label)
+        fetches_layout.addWidget(self.fetches_spin)
+        fetches_layout.addStretch()
+        m3u_layout.addLayout(fetches_layout)
         m3u_group.setLayout(m3u_layout)
         
         # Configuration des téléchargements
@@ -36,8 +65,51 @@ class ConfigTab(QWidget):
         self.bandwidth_spin.setValue(self.parent.config.get("bandwidth_limit", 0))
         self.bandwidth_spin.setSpecialValueText("Illimité")
         
+        self.burst_spin = QSpinBox()
+        self.burst_spin.setRange(0, 1000000)
+        self.burst_spin.setPrefix("Rafale: ")
+        self.burst_spin.setSuffix(" KB")
+        self.burst_spin.setSpecialValueText("Rafale: auto")
+        self.burst_spin.setValue(self.parent.config.get("bandwidth_burst", 0))
+        self.burst_spin.setToolTip("Volume pouvant être transféré d'un coup au-delà de la limite (auto = 1/4 de seconde)")
+        bandwidth_layout = QHBoxLayout()
+        bandwidth_layout.addWidget(self.bandwidth_spin)
+        bandwidth_layout.addWidget(self.burst_spin)
+        
         download_layout.addWidget(self.bandwidth_label, 0, 0)
-        download_layout.addWidget(self.bandwidth_spin, 0, 1)
+        download_layout.addLayout(bandwidth_layout, 0, 1)
+
+        self.concurrent_label = QLabel("Téléchargements simultanés:")
+        self.concurrent_spin = QSpinBox()
+        self.concurrent_spin.setRange(1, 16)
+        self.concurrent_spin.setValue(self.parent.download_manager.max_concurrent_downloads)
+        self.concurrent_spin.setToolTip("Nombre de connexions autorisées par votre abonnement")
+        download_layout.addWidget(self.concurrent_label, 1, 0)
+        download_layout.addWidget(self.concurrent_spin, 1, 1)
+
+        self.segments_label = QLabel("Connexions par fichier:")
+        self.segments_spin = QSpinBox()
+        self.segments_spin.setRange(1, 16)
+        self.segments_spin.setValue(self.parent.config.get("download_segments", 1))
+        self.segments_spin.setToolTip("Télécharger chaque fichier en plusieurs morceaux parallèles si le serveur le permet")
+        download_layout.addWidget(self.segments_label, 2, 0)
+        download_layout.addWidget(self.segments_spin, 2, 1)
+
+        self.adaptive_check = QCheckBox("Adapter le nombre de connexions à chaque serveur")
+        self.adaptive_check.setChecked(self.parent.config.get("adaptive_connections", False))
+        self.adaptive_check.setToolTip(
+            "Ajoute des connexions tant que le débit augmente et en retire en cas de refus ; "
+            "les deux réglages ci-dessus deviennent des maximums"
+        )
+        download_layout.addWidget(self.adaptive_check, 3, 0, 1, 2)
+
+        self.async_check = QCheckBox("Moteur de téléchargement asyncio")
+        self.async_check.setChecked(self.parent.config.get("async_downloads", False))
+        self.async_check.setToolTip(
+            "Toutes les connexions dans un seul thread, pour de nombreux transferts simultanés ; "
+            "s'applique aux téléchargements suivants"
+        )
+        download_layout.addWidget(self.async_check, 4, 0, 1, 2)
         
         # Ajout du sélecteur de dossier de téléchargement
         self.download_dir_label = QLabel("Dossier de téléchargement:")
@@ -49,8 +121,8 @@ class ConfigTab(QWidget):
         download_dir_layout.addWidget(self.download_dir_edit)
         download_dir_layout.addWidget(self.download_dir_button)
         
-        download_layout.addWidget(self.download_dir_label, 1, 0)
-        download_layout.addLayout(download_dir_layout, 1, 1)
+        download_layout.addWidget(self.download_dir_label, 5, 0)
+        download_layout.addLayout(download_dir_layout, 5, 1)
         
         download_group.setLayout(download_layout)
         
@@ -72,24 +144,57 @@ class ConfigTab(QWidget):
         
         # Connexions
         self.m3u_button.clicked.connect(self.save_m3u_url)
-        self.bandwidth_spin.valueChanged.connect(self.save_config)
+        self.bandwidth_spin.valueChanged.connect(self.change_bandwidth_limit)
+        self.burst_spin.valueChanged.connect(self.change_bandwidth_limit)
+        self.concurrent_spin.valueChanged.connect(self.change_concurrent_downloads)
+        self.segments_spin.valueChanged.connect(self.save_config)
+        self.adaptive_check.stateChanged.connect(self.save_config)
+        self.async_check.stateChanged.connect(self.save_config)
         self.theme_check.stateChanged.connect(self.toggle_theme)
+        self.cache_check.stateChanged.connect(self.toggle_cache)
+        self.streaming_check.stateChanged.connect(self.save_config)
+        self.workers_spin.valueChanged.connect(self.save_config)
+        self.fetches_spin.valueChanged.connect(self.save_config)
         self.download_dir_button.clicked.connect(self.choose_download_dir)
 
     def save_m3u_url(self):
-        """Sauvegarder l'URL M3U"""
-        self.parent.m3u_url = self.m3u_box.text()
-        self.parent.config["m3u_url"] = self.parent.m3u_url
+        """Sauvegarder les URLs M3U"""
+        sources = []
+        for line in self.m3u_box.toPlainText().splitlines():
+            url = line.strip()
+            if url and url not in sources:
+                sources.append(url)
+        self.parent.m3u_sources = sources
+        self.parent.config["m3u_sources"] = sources
+        # Première source conservée sous l'ancienne clé pour les versions précédentes
+        self.parent.config["m3u_url"] = sources[0] if sources else ""
         self.save_config()
-        QMessageBox.information(self, "URL Sauvegardée", "L'URL M3U a été mise à jour.")
+        QMessageBox.information(self, "URLs Sauvegardées", "Les URLs M3U ont été mises à jour.")
         self.parent.try_load_m3u_content()
 
     def save_config(self):
         """Sauvegarder la configuration"""
         self.parent.config["bandwidth_limit"] = self.bandwidth_spin.value()
+        self.parent.config["bandwidth_burst"] = self.burst_spin.value()
+        self.parent.config["download_segments"] = self.segments_spin.value()
+        self.parent.config["adaptive_connections"] = self.adaptive_check.isChecked()
+        self.parent.config["async_downloads"] = self.async_check.isChecked()
+        self.parent.config["m3u_streaming"] = self.streaming_check.isChecked()
+        self.parent.config["m3u_parse_workers"] = self.workers_spin.value()
+        self.parent.config["m3u_max_parallel_fetches"] = self.fetches_spin.value()
         self.parent.config["dark_mode"] = self.parent.dark_mode
         save_config(self.parent.config)
 
+    def change_bandwidth_limit(self):
+        """Appliquer la nouvelle limite aux transferts en cours, puis la sauvegarder"""
+        self.save_config()
+        apply_bandwidth_config(self.parent.config)
+
+    def change_concurrent_downloads(self, value):
+        """Appliquer la nouvelle limite aussitôt, puis la sauvegarder"""
+        self.parent.download_manager.set_max_concurrent_downloads(value)
+        self.save_config()
+
     def toggle_theme(self, state):
         """Changer le thème de l'application"""
         self.parent.dark_mode = bool(state)
@@ -97,6 +202,11 @@ class ConfigTab(QWidget):
         self.save_config()
         self.parent.apply_theme()
 
+    def toggle_cache(self, state):
+        """Activer/désactiver l'affichage du catalogue en cache pendant l'actualisation"""
+        self.parent.config["m3u_cache_stale_while_revalidate"] = bool(state)
+        self.save_config()
+
     def choose_download_dir(self):
         """Ouvrir le sélecteur de dossier pour choisir le dossier de téléchargement"""
         current_dir = self.parent.config.get("download_dir", "")
@@ -1,14 +1,50 @@
+from itertools import chain
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QLineEdit, QComboBox, QListWidget, QPushButton,
-    QMessageBox
+    QLineEdit, QComboBox, QListView, QPushButton,
+    QCheckBox, QMessageBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+from src.core.http import prewarm
+from src.core.logo_cache import LogoDiskCache
+from src.core.m3u import source_label
+from src.core.metadata import QUALITIES, LANGUAGES
+from src.core.search import matches
+from src.core.search_thread import SearchThread, SORT_RELEVANCE, SORT_ASCENDING, SORT_DESCENDING
+from src.ui.logo_loader import LogoLoader, THUMBNAIL_SIZE
+from src.ui.vod_list_model import VodListModel, CatalogRowRole, EntryIdRole, MAX_SEPARATE_CHANGES
+from src.utils.text import tokenize
+
+# Entrées fixes du filtre : tout le catalogue et les nouveautés de la dernière actualisation
+ALL_ENTRIES_FILTER = "Tous"
+NEW_ENTRIES_FILTER = "Nouveautés"
+# Position de la première catégorie dans le filtre, après les deux entrées fixes
+FIRST_CATEGORY_INDEX = 2
+# Délai sans frappe avant de lancer la recherche
+SEARCH_DEBOUNCE_MS = 250
+SORT_MODES = {"Pertinence": SORT_RELEVANCE, "Nom (A-Z)": SORT_ASCENDING, "Nom (Z-A)": SORT_DESCENDING}
+# Filtres par facette extraite des titres : première entrée du filtre et libellé des valeurs
+FACET_FILTERS = {
+    'year': ("Toutes les années", str),
+    'quality': ("Toutes les qualités", QUALITIES.__getitem__),
+    'language': ("Toutes les langues", LANGUAGES.__getitem__),
+}
+
+def count_label(name, count):
+    """Libellé d'un filtre avec son nombre d'entrées, par exemple « Films FR (12 340) »"""
+    return f"{name} ({count:,})".replace(",", "\u00a0")
 
 class DownloadTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        # Recherche en cours : les lots des générations précédentes sont ignorés
+        self._search_generation = 0
+        self._search_thread = None
+        self._search_threads = []
+        self._search_catalog = None
+        self._results_started = False
+        self._reselect_id = None
         self.init_ui()
 
     def init_ui(self):
@@ -20,22 +56,50 @@ class DownloadTab(QWidget):
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Rechercher...")
         search_layout.addWidget(self.search_box)
+        self.fuzzy_check = QCheckBox("Tolérer les fautes")
+        self.fuzzy_check.setToolTip("Trouver aussi les titres mal orthographiés, classés par nombre de fautes")
+        search_layout.addWidget(self.fuzzy_check)
         
         # Filtres et tri
         self.filter_combo = QComboBox()
-        self.filter_combo.addItem("Tous")
+        self.filter_combo.addItems([ALL_ENTRIES_FILTER, NEW_ENTRIES_FILTER])
         self.filter_combo.setMinimumWidth(200)  # Définir une largeur minimale
         self.filter_combo.setSizeAdjustPolicy(QComboBox.AdjustToContents)  # Ajuster à la taille du contenu
         
         self.sort_combo = QComboBox()
-        self.sort_combo.addItems(["Nom (A-Z)", "Nom (Z-A)"])
+        self.sort_combo.addItems(list(SORT_MODES))
         search_layout.addWidget(self.filter_combo)
         search_layout.addWidget(self.sort_combo)
         layout.addLayout(search_layout)
+
+        # Filtres par année, qualité et langue
+        facet_layout = QHBoxLayout()
+        self.facet_combos = {}
+        for facet, (all_values, _) in FACET_FILTERS.items():
+            combo = QComboBox()
+            combo.addItem(all_values)
+            combo.setSizeAdjustPolicy(QComboBox.AdjustToContents)
+            facet_layout.addWidget(combo)
+            self.facet_combos[facet] = combo
+        facet_layout.addStretch()
+        layout.addLayout(facet_layout)
         
-        # Liste des VODs
-        self.list_widget = QListWidget()
-        layout.addWidget(self.list_widget)
+        # Liste des VODs : vue virtualisée sur les lignes du catalogue
+        # Logos chargés en arrière-plan pour les seules lignes visibles
+        config = self.parent.config
+        logo_loader = None
+        if config.get("show_logos", True):
+            disk_cache = LogoDiskCache(max_bytes=config.get("logo_cache_max_mb", 100) * 1024 * 1024)
+            logo_loader = LogoLoader(disk_cache, parent=self)
+        self.list_model = VodListModel(parent=self, logo_loader=logo_loader)
+        self.list_view = QListView()
+        self.list_view.setModel(self.list_model)
+        if logo_loader is not None:
+            self.list_view.setIconSize(THUMBNAIL_SIZE)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setLayoutMode(QListView.Batched)
+        self.list_view.setBatchSize(2000)
+        layout.addWidget(self.list_view)
         
         # Informations sur le fichier
         self.file_info_label = QLabel()
@@ -45,107 +109,395 @@ class DownloadTab(QWidget):
         button_layout = QHBoxLayout()
         self.download_button = QPushButton("Télécharger")
         button_layout.addWidget(self.download_button)
+        self.season_button = QPushButton("Télécharger la saison")
+        self.season_button.setEnabled(False)
+        button_layout.addWidget(self.season_button)
         layout.addLayout(button_layout)
         
         self.setLayout(layout)
+
+        # Recherche lancée quand la frappe s'interrompt
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_vods)
         
         # Connexions
-        self.search_box.textChanged.connect(self.search_vods)
-        self.filter_combo.currentTextChanged.connect(self.apply_filter)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.fuzzy_check.toggled.connect(self.apply_filter)
+        self.filter_combo.currentIndexChanged.connect(self.apply_filter)
+        for combo in self.facet_combos.values():
+            combo.currentIndexChanged.connect(self.apply_filter)
         self.sort_combo.currentTextChanged.connect(self.apply_sort)
         self.download_button.clicked.connect(self.download_selected_vod)
-        self.list_widget.currentItemChanged.connect(self.update_file_info)
+        self.season_button.clicked.connect(self.download_selected_season)
+        self.list_view.selectionModel().currentChanged.connect(self.update_file_info)
+
+    def sort_mode(self):
+        """Mode de tri courant ; la pertinence n'a de sens qu'avec une requête"""
+        mode = SORT_MODES.get(self.sort_combo.currentText(), SORT_ASCENDING)
+        if mode == SORT_RELEVANCE and not tokenize(self.search_box.text()):
+            return SORT_ASCENDING
+        return mode
 
     def search_vods(self):
-        """Rechercher dans les VODs"""
-        if not self.parent.entries:
+        """Rechercher dans les VODs en arrière-plan"""
+        catalog = self.parent.catalog
+        if not catalog:
             QMessageBox.warning(
                 self, "Erreur", "Aucune donnée chargée. Veuillez charger ou actualiser le contenu M3U."
             )
             return
 
-        search_query = self.search_box.text().lower()
-        selected_category = self.filter_combo.currentText()
-        
-        self.list_widget.clear()
-        filtered = []
+        self.search_timer.stop()
+        self.cancel_search()
+        self._search_generation += 1
+        self._results_started = False
+        self._search_catalog = catalog
+        # Resélectionner la même entrée dans les résultats, même si le catalogue a été remplacé
+        self._reselect_id = self.selected_entry_id()
 
-        for name, url in self.parent.entries:
-            info = self.parent.vod_info[name]
-            
-            # Vérifier la catégorie
-            if selected_category != "Tous" and info['group_title'] != selected_category:
-                continue
-                
-            # Vérifier le terme de recherche
-            if search_query and search_query not in name.lower():
-                continue
-                
-            filtered.append(name)
+        thread = SearchThread(
+            catalog, self._search_generation, self.search_box.text(), self.selected_category(),
+            new_only=self.new_entries_selected(), sort_mode=self.sort_mode(),
+            fuzzy=self.fuzzy_check.isChecked(), facets=self.selected_facets()
+        )
+        thread.results_ready.connect(self.on_search_results)
+        thread.failed.connect(self.on_search_failed)
+        thread.finished.connect(lambda thread=thread: self.on_search_finished(thread))
+        self._search_thread = thread
+        self._search_threads.append(thread)
+        thread.start()
 
-        # Appliquer le tri
-        sort_method = self.sort_combo.currentText()
-        if sort_method == "Nom (A-Z)":
-            filtered.sort()
-        elif sort_method == "Nom (Z-A)":
-            filtered.sort(reverse=True)
+    def cancel_search(self, wait=False):
+        """Interrompre la recherche en cours"""
+        if self._search_thread is not None:
+            self._search_thread.stop()
+            self._search_thread = None
+        if wait:
+            for thread in self._search_threads:
+                thread.wait()
 
-        self.list_widget.addItems(filtered)
+    def is_searching(self):
+        return self._search_thread is not None
+
+    def on_search_results(self, generation, rows, last):
+        """Afficher un lot de résultats de la recherche courante"""
+        if generation != self._search_generation:
+            return
+        if self._search_catalog is not self.parent.catalog:
+            # Catalogue remplacé pendant la recherche : résultats périmés, chercher dans le nouveau
+            self.search_vods()
+            return
+        if not self._results_started:
+            # Les anciens résultats restent affichés jusqu'au premier lot
+            self._results_started = True
+            self.list_model.set_rows(rows, self._search_catalog)
+        else:
+            self.list_model.append_rows(rows)
+        if self._reselect_id is not None:
+            self.reselect(rows)
+        if last:
+            self._search_thread = None
+            self._reselect_id = None
+
+    def on_search_failed(self, generation, message):
+        """Signaler l'échec de la recherche courante, en laissant la liste affichée en l'état"""
+        if generation != self._search_generation:
+            return
+        self._search_thread = None
+        self._reselect_id = None
+        self.parent.statusBar().showMessage(f"Erreur lors de la recherche : {message}", 10000)
 
-    def apply_filter(self, filter_text):
+    def reselect(self, rows):
+        """Resélectionner l'entrée mémorisée si elle fait partie de ce lot de résultats"""
+        row = self._search_catalog.find_id(self._reselect_id)
+        if row is None:
+            self._reselect_id = None
+            return
+        try:
+            offset = rows.index(row)
+        except ValueError:
+            return
+        self._reselect_id = None
+        position = self.list_model.rowCount() - len(rows) + offset
+        self.list_view.setCurrentIndex(self.list_model.index(position))
+
+    def on_search_finished(self, thread):
+        """Libérer un thread de recherche terminé"""
+        if thread in self._search_threads:
+            self._search_threads.remove(thread)
+        if thread is self._search_thread:
+            self._search_thread = None
+        thread.deleteLater()
+
+    def selected_category(self):
+        """Catégorie choisie dans le filtre, None pour les entrées fixes"""
+        index = self.filter_combo.currentIndex()
+        if index < FIRST_CATEGORY_INDEX:
+            return None
+        return self.filter_combo.itemData(index)
+
+    def new_entries_selected(self):
+        return self.filter_combo.currentIndex() == 1
+
+    def selected_facets(self):
+        """Valeurs choisies dans les filtres de facettes ({'year': 2023, ...})"""
+        return {
+            facet: combo.currentData()
+            for facet, combo in self.facet_combos.items()
+            if combo.currentIndex() > 0
+        }
+
+    def refresh_filter_combo(self, catalog):
+        """Mettre à jour les catégories du filtre et leurs nombres d'entrées sans relancer la recherche
+
+        Les nombres viennent des listes de lignes par catégorie du catalogue :
+        aucun parcours des entrées.
+        """
+        combo = self.filter_combo
+        counts = catalog.category_counts()
+        categories = [name for name, _ in counts]
+        current = [combo.itemData(i) for i in range(FIRST_CATEGORY_INDEX, combo.count())]
+        new_entries = sum(1 for row in catalog.new_rows if catalog.is_alive(row))
+
+        combo.blockSignals(True)
+        if categories != current:
+            # Ne reconstruire la liste que si l'ensemble des catégories a changé
+            index = combo.currentIndex()
+            selected = self.selected_category()
+            combo.clear()
+            combo.addItems([ALL_ENTRIES_FILTER, NEW_ENTRIES_FILTER])
+            for name, count in counts:
+                combo.addItem(count_label(name, count), name)
+            if selected is not None:
+                index = combo.findData(selected)
+            combo.setCurrentIndex(max(index, 0))
+        else:
+            for i, (name, count) in enumerate(counts, FIRST_CATEGORY_INDEX):
+                combo.setItemText(i, count_label(name, count))
+        combo.setItemText(0, count_label(ALL_ENTRIES_FILTER, len(catalog)))
+        combo.setItemText(1, count_label(NEW_ENTRIES_FILTER, new_entries))
+        combo.blockSignals(False)
+        self.refresh_facet_combos(catalog)
+
+    def refresh_facet_combos(self, catalog):
+        """Mettre à jour les valeurs des filtres de facettes et leurs nombres d'entrées"""
+        for facet, (all_values, label) in FACET_FILTERS.items():
+            combo = self.facet_combos[facet]
+            counts = catalog.facet_counts(facet)
+            if facet == 'year':
+                # Années récentes en premier
+                counts.reverse()
+            values = [value for value, _ in counts]
+            current = [combo.itemData(i) for i in range(1, combo.count())]
+
+            combo.blockSignals(True)
+            if values != current:
+                selected = combo.currentData() if combo.currentIndex() > 0 else None
+                combo.clear()
+                combo.addItem(all_values)
+                for value, count in counts:
+                    combo.addItem(count_label(label(value), count), value)
+                combo.setCurrentIndex(max(combo.findData(selected), 0) if selected is not None else 0)
+            else:
+                for i, (value, count) in enumerate(counts, 1):
+                    combo.setItemText(i, count_label(label(value), count))
+            combo.blockSignals(False)
+
+    def apply_filter(self, index):
         """Appliquer le filtre de catégorie"""
         self.search_vods()
 
     def apply_sort(self, sort_method):
         """Appliquer le tri"""
-        items = []
-        for i in range(self.list_widget.count()):
-            items.append(self.list_widget.item(i).text())
-        
-        if sort_method == "Nom (A-Z)":
-            items.sort()
-        elif sort_method == "Nom (Z-A)":
-            items.sort(reverse=True)
-        
-        self.list_widget.clear()
-        self.list_widget.addItems(items)
+        self.search_vods()
+
+    def clear_entries(self):
+        """Vider la liste et les catégories avant un nouveau chargement"""
+        self.list_model.clear(self.parent.catalog)
+        self.refresh_filter_combo(self.parent.catalog)
+
+    def update_entries(self, previous, stale_rows, rows):
+        """Appliquer une actualisation du catalogue sans reconstruire toute la liste
+
+        previous : catalogue affiché avant l'actualisation, dont le nouveau catalogue
+        est une copie actualisée aux mêmes numéros de ligne
+        stale_rows : lignes supprimées ou modifiées, à retirer de la liste
+        rows : lignes ajoutées ou modifiées à insérer si elles passent les filtres
+        """
+        catalog = self.parent.catalog
+        if self.list_model.catalog is previous:
+            self.list_model.replace_catalog(catalog)
+        self.refresh_filter_combo(catalog)
+
+        if (self.new_entries_selected() or self.sort_mode() == SORT_RELEVANCE or self.fuzzy_check.isChecked()
+                or self.selected_facets() or self.is_searching() or self.list_model.catalog is not catalog):
+            # Vue des nouveautés, classement par pertinence, facettes, recherche approximative
+            # ou en cours : relancer la recherche
+            self.search_vods()
+            return
+
+        self.list_model.remove_catalog_rows(stale_rows)
+
+        fragments = tokenize(self.search_box.text())
+        category_code = None
+        if self.selected_category() is not None:
+            category_code = catalog.category_code(self.selected_category())
+        filtered = [
+            row for row in rows
+            if (category_code is None or catalog.category_codes[row] == category_code)
+            and (not fragments or matches(fragments, catalog.names[row]))
+        ]
+        self.insert_sorted(filtered)
+
+    def insert_sorted(self, rows):
+        """Insérer des lignes du catalogue à leur place selon le tri courant
+
+        Les rangs de tri précalculés servent de clé : aucun nom n'est comparé.
+        """
+        descending = self.sort_mode() == SORT_DESCENDING
+        ranks = self.list_model.catalog.sort_ranks()
+        displayed = self.list_model.rows
+        if len(rows) > MAX_SEPARATE_CHANGES:
+            # Fusion en une passe et une seule réinitialisation de la liste
+            self.list_model.set_rows(sorted(chain(displayed, rows), key=ranks.__getitem__, reverse=descending))
+            return
+        for row in rows:
+            key = ranks[row]
+            low, high = 0, len(displayed)
+            while low < high:
+                middle = (low + high) // 2
+                other = ranks[displayed[middle]]
+                if (other >= key) if descending else (other <= key):
+                    low = middle + 1
+                else:
+                    high = middle
+            self.list_model.insert_row(low, row)
+
+    def append_rows(self, rows):
+        """Ajouter à la liste les lignes reçues en streaming qui correspondent aux filtres actuels"""
+        catalog = self.parent.catalog
+        if self.list_model.catalog is not catalog:
+            # Copie plus récente du catalogue en streaming : les lignes affichées restent valables
+            self.list_model.replace_catalog(catalog)
+        # Nouvelles catégories et nombres d'entrées, sans relancer la recherche
+        self.refresh_filter_combo(catalog)
+        if self.new_entries_selected() or self.selected_facets():
+            return
+
+        fragments = tokenize(self.search_box.text())
+        category_code = None
+        if self.selected_category() is not None:
+            category_code = catalog.category_code(self.selected_category())
+
+        filtered = []
+        category_codes = catalog.category_codes
+        names = catalog.names
+        for row in rows:
+            if category_code is not None and category_codes[row] != category_code:
+                continue
+            if fragments and not matches(fragments, names[row]):
+                continue
+            filtered.append(row)
+        self.list_model.append_rows(filtered)
 
     def update_filter_categories(self):
-        """Mettre à jour la liste des catégories dans le filtre"""
-        categories = set()
-        for info in self.parent.vod_info.values():
-            if info['group_title']:
-                categories.add(info['group_title'])
-        
-        self.filter_combo.clear()
-        self.filter_combo.addItem("Tous")
-        self.filter_combo.addItems(sorted(categories))
+        """Mettre à jour la liste des catégories dans le filtre et afficher le nouveau catalogue"""
+        self.refresh_filter_combo(self.parent.catalog)
+        self.search_vods()
+
+    def selected_entry_id(self):
+        """Identifiant stable de l'entrée sélectionnée, ou None"""
+        index = self.list_view.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(EntryIdRole)
 
     def update_file_info(self, current, previous):
         """Mettre à jour les informations du fichier sélectionné"""
-        if current:
-            name = current.text()
-            info = self.parent.vod_info.get(name, {})
+        if current.isValid():
+            catalog = self.list_model.catalog
+            row = current.data(CatalogRowRole)
+            info = catalog.info(row)
+            metadata = catalog.metadata(row)
             
             details = []
             if info.get('group_title'):
                 details.append(f"Catégorie: {info['group_title']}")
             if info.get('xui_id'):
                 details.append(f"ID: {info['xui_id']}")
+            tags = [str(metadata.year) if metadata.year else None, metadata.quality_label, metadata.language_label]
+            if metadata.season:
+                tags.append(f"Saison {metadata.season}" + (f", épisode {metadata.episode}" if metadata.episode else ""))
+            if any(tags):
+                details.append(" · ".join(tag for tag in tags if tag))
+            episodes = len(catalog.season_rows(row))
+            if episodes:
+                details.append(f"{catalog.series_title(row)} : {episodes} épisode(s) dans la saison {metadata.season}")
+            self.season_button.setEnabled(episodes > 0)
+            if info.get('source') and len(catalog.sources()) > 1:
+                details.append(f"Source: {source_label(info['source'])}")
             
             self.file_info_label.setText("\n".join(details))
 
+            # Préparer la connexion au serveur : le téléchargement démarrera plus vite
+            if self.parent.config.get("http_prewarm", True):
+                prewarm(catalog.url(row))
+        else:
+            self.season_button.setEnabled(False)
+
+    def selected_catalog_row(self):
+        """Ligne de l'entrée sélectionnée dans le catalogue courant, ou None"""
+        entry_id = self.selected_entry_id()
+        return self.parent.catalog.find_id(entry_id) if entry_id is not None else None
+
+    def download_selected_season(self):
+        """Mettre en file d'attente tous les épisodes de la saison de l'épisode sélectionné"""
+        row = self.selected_catalog_row()
+        if row is None:
+            return
+        catalog = self.parent.catalog
+        rows = catalog.season_rows(row)
+        if not rows:
+            return
+        bandwidth_limit = self.parent.config.get("bandwidth_limit", 0)
+        added = self.parent.download_manager.add_many(
+            (catalog.entry_id(episode), catalog.name(episode), catalog.url(episode), bandwidth_limit)
+            for episode in rows
+        )
+        season = f"{catalog.series_title(row)} (saison {catalog.metadata(row).season})"
+        skipped = len(rows) - len(added)
+        if not added:
+            QMessageBox.information(
+                self,
+                "Déjà dans la file d'attente",
+                f"Les {len(rows)} épisode(s) de {season} sont déjà en file d'attente ou en cours de téléchargement."
+            )
+            return
+        message = f"{len(added)} épisode(s) de {season} ont été ajoutés à la file d'attente de téléchargement."
+        if skipped:
+            message += f"\n{skipped} épisode(s) déjà en file d'attente ou en cours ont été ignorés."
+        QMessageBox.information(self, "Ajouté à la file d'attente", message)
+
     def download_selected_vod(self):
         """Télécharger le VOD sélectionné"""
-        selected_item = self.list_widget.currentItem()
-        if selected_item:
-            name = selected_item.text()
-            url = next((url for name_, url in self.parent.entries if name == name_), None)
-            if url:
-                bandwidth_limit = self.parent.config.get("bandwidth_limit", 0)
-                self.parent.download_manager.add_to_queue(name, url, bandwidth_limit)
+        row = self.selected_catalog_row()
+        catalog = self.parent.catalog
+        if row is not None:
+            name = catalog.name(row)
+            url = catalog.url(row)
+            bandwidth_limit = self.parent.config.get("bandwidth_limit", 0)
+            item = self.parent.download_manager.add_to_queue(catalog.entry_id(row), name, url, bandwidth_limit)
+            if item is None:
                 QMessageBox.information(
                     self,
-                    "Ajouté à la file d'attente",
-                    f"{name} a été ajouté à la file d'attente de téléchargement."
-                ) 
\ No newline at end of file
+                    "Déjà dans la file d'attente",
+                    f"{name} est déjà en file d'attente ou en cours de téléchargement."
+                )
+                return
+            message = f"{name} a été ajouté à la file d'attente de téléchargement."
+            if item[1] != name:
+                # Un autre téléchargement porte déjà ce titre : le fichier est renommé
+                message += f"\nIl sera enregistré sous « {item[1]}.mp4 »."
+            QMessageBox.information(self, "Ajouté à la file d'attente", message)
@@ -0,0 +1,113 @@
+import logging
+from collections import OrderedDict
+from typing import Optional
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, QBuffer, QByteArray, QIODevice, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from src.core.logo_cache import LogoDiskCache
+from src.core.http import get_session
+
+logger = logging.getLogger(__name__)
+
+# Taille des miniatures affichées dans la liste (format affiche 2:3)
+THUMBNAIL_SIZE = QSize(24, 36)
+# Miniatures décodées gardées en mémoire
+MEMORY_CACHE_SIZE = 1000
+# Téléchargements simultanés de logos
+MAX_LOGO_THREADS = 4
+LOGO_TIMEOUT = 10
+
+class _LogoSignals(QObject):
+    loaded = pyqtSignal(str, QImage)
+    failed = pyqtSignal(str)
+
+class _LogoTask(QRunnable):
+    """Lecture d'un logo depuis le cache disque ou le réseau, puis réduction en miniature"""
+
+    def __init__(self, url, disk_cache, signals):
+        super().__init__()
+        self.url = url
+        self.disk_cache = disk_cache
+        self.signals = signals
+        self.started = False
+        # La tâche reste référencée par LogoLoader jusqu'à la fin du chargement
+        self.setAutoDelete(False)
+
+    def run(self):
+        self.started = True
+        try:
+            data = self.disk_cache.get(self.url) if self.disk_cache is not None else None
+            cached = data is not None
+            if not cached:
+                response = get_session().get(self.url, timeout=LOGO_TIMEOUT, verify=False)
+                response.raise_for_status()
+                data = response.content
+
+            image = QImage()
+            if not image.loadFromData(data):
+                raise ValueError("image illisible")
+            if image.width() > THUMBNAIL_SIZE.width() or image.height() > THUMBNAIL_SIZE.height():
+                image = image.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+            if not cached and self.disk_cache is not None:
+                # Seule la miniature est gardée sur disque
+                buffer = QByteArray()
+                device = QBuffer(buffer)
+                device.open(QIODevice.WriteOnly)
+                image.save(device, "PNG")
+                self.disk_cache.put(self.url, bytes(buffer))
+            self.signals.loaded.emit(self.url, image)
+        except Exception as e:
+            logger.debug(f"Logo indisponible {self.url}: {str(e)}")
+            self.signals.failed.emit(self.url)
+
+class LogoLoader(QObject):
+    """Chargement paresseux des logos pour les lignes affichées
+
+    logo() retourne immédiatement la miniature si elle est en mémoire, sinon
+    programme son chargement dans un pool de threads borné et retourne None ;
+    logo_ready est émis quand elle devient disponible. Plusieurs demandes pour
+    la même URL ne donnent lieu qu'à un seul chargement.
+    """
+    logo_ready = pyqtSignal(str)
+
+    def __init__(self, disk_cache: Optional[LogoDiskCache] = None, max_threads=MAX_LOGO_THREADS,
+                 memory_size=MEMORY_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.disk_cache = disk_cache
+        self.memory_size = memory_size
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._pixmaps: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._pending = {}  # URL -> tâche en attente ou en cours
+        self._failed = set()
+        self._signals = _LogoSignals()
+        self._signals.loaded.connect(self._on_loaded)
+        self._signals.failed.connect(self._on_failed)
+
+    def logo(self, url) -> Optional[QPixmap]:
+        """Miniature d'un logo si elle est en mémoire ; sinon lancer son chargement"""
+        pixmap = self._pixmaps.get(url)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(url)
+            return pixmap
+        if url not in self._pending and url not in self._failed:
+            task = _LogoTask(url, self.disk_cache, self._signals)
+            self._pending[url] = task
+            self.pool.start(task)
+        return None
+
+    def cancel_pending(self):
+        """Abandonner les chargements pas encore commencés (lignes qui ne sont plus affichées)"""
+        self.pool.clear()
+        self._pending = {url: task for url, task in self._pending.items() if task.started}
+
+    def _on_loaded(self, url, image):
+        self._pending.pop(url, None)
+        self._pixmaps[url] = QPixmap.fromImage(image)
+        if len(self._pixmaps) > self.memory_size:
+            self._pixmaps.popitem(last=False)
+        self.logo_ready.emit(url)
+
+    def _on_failed(self, url):
+        self._pending.pop(url, None)
+        self._failed.add(url)
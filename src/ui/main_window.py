@@ -15,7 +15,9 @@ logger = logging.getLogger(__name__)
 
 from src.core.config import load_config, save_config
 from src.core.download import DownloadManager
-from src.core.m3u import M3UParser
+from src.core.m3u import M3UParser, source_label
+from src.core.catalog import Catalog
+from src.core.cache import PlaylistCache
 from src.core.updater import Updater
 
 from src.ui.download_tab import DownloadTab
@@ -44,19 +46,25 @@ class MainWindow(QMainWindow):
         # Charger la configuration
         self.config = load_config()
         self.dark_mode = self.config.get("dark_mode", False)
-        self.m3u_url = self.config.get("m3u_url", "")
+        self.m3u_sources = list(self.config.get("m3u_sources", []))
         
         # Initialiser les attributs
         self.progress_dialog = None
         self._update_error_shown = False
         self._update_available_shown = False
         self.loader_thread = None
-        self.entries = []
-        self.vod_info = {}
+        self.loading_dialog = None
+        self._background_refresh = False
+        self.catalog = Catalog()
+        # Sources du catalogue affiché, None pendant un chargement en streaming
+        self.catalog_sources = None
+        self._loading_sources = None
+        self._source_errors = []
         
         # Initialiser les composants
         self.download_manager = DownloadManager(self.config)
         self.m3u_parser = M3UParser()
+        self.playlist_cache = PlaylistCache()
         
         # Créer la barre de menu
         self.create_menu()
@@ -74,6 +82,9 @@ class MainWindow(QMainWindow):
         self.try_load_m3u_content()
         self.show_startup_message()
 
+        # Reprendre la file d'attente sauvegardée à la fermeture précédente
+        self.download_manager.process_queue()
+
     def create_menu(self):
         """Crée la barre de menu de l'application"""
         self.menubar = self.menuBar()
@@ -136,23 +147,29 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 800, 600)
 
     def try_load_m3u_content(self):
-        """Tente de charger le contenu M3U si l'URL est valide"""
-        if not self.m3u_url:
+        """Tente de charger le contenu M3U si les URLs sont valides"""
+        sources = tuple(self.m3u_sources)
+        if not sources:
             return
             
-        if not self.m3u_url.startswith("http"):
-            QMessageBox.warning(self, "Erreur", "L'URL doit commencer par 'http://' ou 'https://'")
+        invalid = [url for url in sources if not url.startswith("http")]
+        if invalid:
+            QMessageBox.warning(self, "Erreur", "Les URLs doivent commencer par 'http://' ou 'https://' :\n"
+                                + "\n".join(invalid))
             return
 
         try:
-            logger.debug(f"Début du chargement M3U depuis {self.m3u_url}")
-            self.loading_dialog = QProgressDialog("Préparation du chargement...", "Annuler", 0, 0, self)
-            self.loading_dialog.setWindowTitle("Chargement M3U")
-            self.loading_dialog.setWindowModality(Qt.WindowModal)
-            self.loading_dialog.setMinimumDuration(0)
-            self.loading_dialog.setAutoClose(False)
-            self.loading_dialog.setAutoReset(False)
-            self.loading_dialog.setMinimumWidth(300)
+            logger.debug(f"Début du chargement M3U depuis {len(sources)} source(s)")
+            streaming = self.config.get("m3u_streaming", True)
+            stale_while_revalidate = self.config.get("m3u_cache_stale_while_revalidate", True)
+
+            # Afficher d'abord le catalogue en cache, lu par le thread de chargement, puis le revalider
+            # en arrière-plan. Seules les petites métadonnées du cache sont lues ici.
+            cached_first = (stale_while_revalidate and self.catalog_sources != sources
+                            and any(self.playlist_cache.read_meta(url) for url in sources))
+            background = stale_while_revalidate and (self.catalog_sources == sources or cached_first)
+            # Une actualisation des playlists affichées ne transmet que les différences
+            previous = self.catalog if self.catalog and self.catalog_sources == sources else None
 
             # Arrêter le thread précédent s'il existe
             if self.loader_thread is not None:
@@ -160,14 +177,41 @@ class MainWindow(QMainWindow):
                 self.loader_thread.wait()
                 self.loader_thread.deleteLater()
 
-            self.loader_thread = self.m3u_parser.parse_url(self.m3u_url)
+            self._stream_started = False
+            self._background_refresh = background
+            self._loading_sources = sources
+            self._source_errors = []
+            self.loader_thread = self.m3u_parser.parse_url(
+                sources, streaming, cache=self.playlist_cache, revalidate_only=background,
+                workers=self.config.get("m3u_parse_workers", 0), previous=previous,
+                max_parallel=self.config.get("m3u_max_parallel_fetches", 3), cached_first=cached_first
+            )
             self.loader_thread.finished.connect(self.on_m3u_loaded)
             self.loader_thread.error.connect(self.on_m3u_error)
-            self.loader_thread.progress.connect(self.loading_dialog.setLabelText)
-            
-            self.loading_dialog.canceled.connect(self.loader_thread.stop)
-            
-            self.loading_dialog.show()
+            self.loader_thread.source_error.connect(self.on_m3u_source_error)
+            self.loader_thread.not_modified.connect(self.on_m3u_not_modified)
+            self.loader_thread.cached_loaded.connect(self.on_m3u_cached)
+
+            if background:
+                # Le catalogue en cache reste affiché : pas de boîte de dialogue bloquante
+                self.loading_dialog = None
+                self.loader_thread.progress.connect(self.statusBar().showMessage)
+                self.statusBar().showMessage("Actualisation du catalogue en arrière-plan...")
+            else:
+                self.loading_dialog = QProgressDialog("Préparation du chargement...", "Annuler", 0, 0, self)
+                self.loading_dialog.setWindowTitle("Chargement M3U")
+                # En streaming, la liste se remplit pendant le chargement : ne pas bloquer la fenêtre
+                self.loading_dialog.setWindowModality(Qt.NonModal if streaming else Qt.WindowModal)
+                self.loading_dialog.setMinimumDuration(0)
+                self.loading_dialog.setAutoClose(False)
+                self.loading_dialog.setAutoReset(False)
+                self.loading_dialog.setMinimumWidth(300)
+                self.loader_thread.progress.connect(self.loading_dialog.setLabelText)
+                if previous is None:
+                    self.loader_thread.snapshot_ready.connect(self.on_m3u_snapshot)
+                self.loading_dialog.canceled.connect(self.loader_thread.stop)
+                self.loading_dialog.show()
+
             self.loader_thread.start()
         except Exception as e:
             logger.error(f"Erreur lors du démarrage du chargement: {str(e)}", exc_info=True)
@@ -175,6 +219,46 @@ class MainWindow(QMainWindow):
             if self.loading_dialog:
                 self.loading_dialog.close()
 
+    def set_catalog(self, catalog, sources):
+        """Remplacer le catalogue affiché"""
+        self.catalog = catalog
+        self.catalog_sources = sources
+        self.download_tab.update_filter_categories()
+
+    def apply_catalog_update(self, catalog, changes):
+        """Substituer au catalogue affiché sa copie actualisée et transmettre les différences à l'interface
+
+        La copie garde les numéros de ligne du catalogue affiché : seules les
+        lignes supprimées, modifiées et ajoutées sont retirées ou insérées.
+        """
+        previous = self.catalog
+        self.catalog = catalog
+        added, removed, changed = changes
+        self.download_tab.update_entries(
+            previous, removed + [row for row, _ in changed], added + [row for _, row in changed]
+        )
+
+    def on_m3u_cached(self, catalog):
+        """Appelé quand le thread de chargement a lu le catalogue en cache, avant de le revalider"""
+        self.set_catalog(catalog, self._loading_sources)
+        logger.info(f"{len(self.catalog)} entrées chargées depuis le cache")
+
+    def on_m3u_snapshot(self, snapshot):
+        """Appelé à chaque copie figée du catalogue publiée pendant un chargement en streaming
+
+        Chaque copie prolonge la précédente sans renuméroter ses lignes : seules
+        les nouvelles lignes sont ajoutées à la liste.
+        """
+        self.catalog = snapshot
+        if not self._stream_started:
+            self._stream_started = True
+            self._streamed_rows = 0
+            self.catalog_sources = None
+            self.download_tab.clear_entries()
+        end = len(snapshot.names)
+        self.download_tab.append_rows(range(self._streamed_rows, end))
+        self._streamed_rows = end
+
     def on_m3u_loaded(self, result):
         """Appelé lorsque le M3U est chargé avec succès"""
         try:
@@ -183,15 +267,29 @@ class MainWindow(QMainWindow):
                 self.loading_dialog.close()
                 return
                 
-            self.entries, self.vod_info = result
-            
-            if not self.entries:
+            if not result:
                 logger.warning("Aucune entrée trouvée dans le fichier M3U")
                 QMessageBox.warning(self, "Attention", "Aucune entrée n'a été trouvée dans le fichier M3U.")
             else:
-                logger.info(f"{len(self.entries)} entrées chargées avec succès")
-                self.download_tab.update_filter_categories()
-                QMessageBox.information(self, "Succès", f"{len(self.entries)} entrées ont été chargées avec succès.")
+                loader = self.loader_thread
+                changes = loader.changes if loader else None
+                if changes is not None and self.catalog is loader.previous:
+                    self.apply_catalog_update(result, changes)
+                    added, removed, changed = changes
+                    message = (f"Catalogue actualisé : {len(added)} nouveautés, "
+                               f"{len(removed)} supprimées, {len(changed)} modifiées")
+                else:
+                    self.set_catalog(result, self._loading_sources)
+                    message = f"{len(self.catalog)} entrées ont été chargées avec succès."
+                logger.info(f"{len(self.catalog)} entrées chargées avec succès")
+                if self._background_refresh:
+                    self.statusBar().showMessage(message + self._source_errors_summary(), 5000)
+                elif self._source_errors:
+                    QMessageBox.warning(self, "Attention", message + (
+                        "\n\nSources non actualisées (catalogue en cache utilisé si disponible) :\n"
+                        + "\n".join(self._source_errors)))
+                else:
+                    QMessageBox.information(self, "Succès", message)
         except Exception as e:
             logger.error(f"Erreur lors du traitement des données: {str(e)}", exc_info=True)
             QMessageBox.critical(self, "Erreur", f"Erreur lors du traitement des données: {str(e)}")
@@ -203,13 +301,36 @@ class MainWindow(QMainWindow):
                 self.loader_thread.deleteLater()
                 self.loader_thread = None
 
+    def on_m3u_not_modified(self):
+        """Appelé quand la playlist n'a pas changé depuis la mise en cache"""
+        logger.info("Playlist inchangée, catalogue en cache conservé")
+        self.statusBar().showMessage("Catalogue à jour" + self._source_errors_summary(), 5000)
+        if self.loader_thread:
+            self.loader_thread.deleteLater()
+            self.loader_thread = None
+
+    def _source_errors_summary(self):
+        """Mention courte des sources en échec pour la barre d'état"""
+        if not self._source_errors:
+            return ""
+        return f" ({len(self._source_errors)} source(s) en échec : {', '.join(self._source_errors)})"
+
+    def on_m3u_source_error(self, url, error_message):
+        """Appelé quand une source échoue alors que les autres ont pu être chargées"""
+        logger.warning(f"Échec de la source {url}: {error_message}")
+        self._source_errors.append(f"{source_label(url)} : {error_message}")
+
     def on_m3u_error(self, error_message):
         """Appelé en cas d'erreur lors du chargement du M3U"""
         try:
             logger.error(f"Erreur de chargement M3U: {error_message}")
             if self.loading_dialog:
                 self.loading_dialog.close()
-            QMessageBox.critical(self, "Erreur", error_message)
+            if self._background_refresh:
+                # Le catalogue en cache reste utilisable
+                self.statusBar().showMessage(f"Échec de l'actualisation du catalogue : {error_message}", 10000)
+            else:
+                QMessageBox.critical(self, "Erreur", error_message)
         except Exception as e:
             logger.error(f"Erreur lors de l'affichage du message d'erreur: {str(e)}", exc_info=True)
             QMessageBox.critical(self, "Erreur", f"Erreur lors de l'affichage du message d'erreur: {str(e)}")
@@ -236,6 +357,9 @@ class MainWindow(QMainWindow):
                 self.loader_thread.quit()
                 self.loader_thread.wait()
 
+            # Interrompre la recherche en cours
+            self.download_tab.cancel_search(wait=True)
+
             # Arrêter le thread de vérification des mises à jour s'il existe
             if hasattr(self, 'updater') and self.updater._checker_thread:
                 self.updater._checker_thread.stop()
@@ -243,9 +367,7 @@ class MainWindow(QMainWindow):
 
             # Arrêter les téléchargements en cours
             if hasattr(self, 'download_manager'):
-                if self.download_manager.current_download:
-                    self.download_manager.current_download.stop()
-                    self.download_manager.current_download.wait()
+                self.download_manager.stop_all()
 
             # Sauvegarder la configuration
             save_config(self.config)
@@ -291,20 +413,20 @@ class MainWindow(QMainWindow):
                 }
 
                 /* Listes */
-                QListWidget {
+                QListView {
                     background-color: #252526;
                     border: 1px solid #3d3d3d;
                     color: #ffffff;
                     outline: none;
                 }
-                QListWidget::item {
+                QListView::item {
                     padding: 5px;
                 }
-                QListWidget::item:selected {
+                QListView::item:selected {
                     background-color: #094771;
                     color: #ffffff;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: #2a2d2e;
                 }
 
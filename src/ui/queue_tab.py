@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QListWidget, QPushButton, QGroupBox,
+    QListWidget, QListWidgetItem, QPushButton, QGroupBox,
     QMessageBox
 )
 from PyQt5.QtCore import Qt
@@ -10,6 +10,7 @@ class QueueTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        self.active_items = {}  # entry_id -> élément de active_list
         self.init_ui()
         # Désactiver les boutons par défaut
         self.pause_button.setEnabled(False)
@@ -21,7 +22,7 @@ class QueueTab(QWidget):
         layout = QVBoxLayout()
         
         # Liste des téléchargements actifs
-        active_group = QGroupBox("Téléchargement en cours")
+        active_group = QGroupBox("Téléchargements en cours")
         self.active_list = QListWidget()
         active_layout = QVBoxLayout()
         active_layout.addWidget(self.active_list)
@@ -77,11 +78,10 @@ class QueueTab(QWidget):
 
     def update_buttons_state(self):
         """Mettre à jour l'état des boutons en fonction de la sélection et de l'état du téléchargement"""
-        selected_item = self.active_list.currentItem()
-        if selected_item:
+        thread = self.parent.download_manager.active_downloads.get(self.selected_entry_id())
+        if thread is not None:
             self.cancel_button.setEnabled(True)
-            full_text = selected_item.text()
-            is_paused = "En pause" in full_text
+            is_paused = thread.paused
             self.pause_button.setEnabled(not is_paused)
             self.resume_button.setEnabled(is_paused)
         else:
@@ -97,38 +97,51 @@ class QueueTab(QWidget):
             size_in_bytes /= 1024.0
         return f"{size_in_bytes:.2f} To"
 
-    def update_download_progress(self, name, progress, speed):
-        """Mettre à jour la progression du téléchargement"""
-        items = self.active_list.findItems(f"{name}", Qt.MatchStartsWith)
-        if items and self.parent.download_manager.current_download:
-            # Formater la vitesse avec 2 décimales
-            speed_text = f"{speed:.2f} Ko/s"
-            # Formater la taille totale
-            total_size = self.format_size(self.parent.download_manager.current_download.total_size)
-            # Garder le même format que précédemment pour la compatibilité
-            status = "En pause" if hasattr(self.parent.download_manager.current_download, 'paused') and self.parent.download_manager.current_download.paused else f"{progress}% - {speed_text} - {total_size}"
-            items[0].setText(f"{name} - {status}")
+    def update_download_progress(self, entry_id, progress, speed):
+        """Mettre à jour la progression d'un téléchargement"""
+        item = self.active_items.get(entry_id)
+        thread = self.parent.download_manager.active_downloads.get(entry_id)
+        if item is not None and thread is not None:
+            item.setText(f"{thread.name} - {self.active_status(thread, progress, speed)}")
+
+    def active_status(self, thread, progress=None, speed=None):
+        """Statut affiché d'un téléchargement actif"""
+        total_size = self.format_size(thread.total_size)
+        if thread.paused:
+            return f"En pause - {total_size}"
+        if progress is None:
+            return f"En cours - {total_size}"
+        # Formater la vitesse avec 2 décimales
+        return f"{progress}% - {speed:.2f} Ko/s - {total_size}"
+
+    def selected_entry_id(self):
+        """Identifiant du téléchargement actif sélectionné"""
+        selected_item = self.active_list.currentItem()
+        return selected_item.data(Qt.UserRole) if selected_item else None
 
     def update_queue_display(self):
         """Mettre à jour l'affichage de la file d'attente"""
-        # Mise à jour du téléchargement actif
+        # Mise à jour des téléchargements actifs, en gardant la sélection
+        selected = self.selected_entry_id()
         self.active_list.clear()
-        if self.parent.download_manager.current_download:
-            name = self.parent.download_manager.current_download.name
-            total_size = self.format_size(self.parent.download_manager.current_download.total_size)
-            status = f"En pause - {total_size}" if hasattr(self.parent.download_manager.current_download, 'paused') and self.parent.download_manager.current_download.paused else f"En cours - {total_size}"
-            self.active_list.addItem(f"{name} - {status}")
+        self.active_items = {}
+        for entry_id, thread in self.parent.download_manager.active_downloads.items():
+            item = QListWidgetItem(f"{thread.name} - {self.active_status(thread)}")
+            item.setData(Qt.UserRole, entry_id)
+            self.active_list.addItem(item)
+            self.active_items[entry_id] = item
+            if entry_id == selected:
+                self.active_list.setCurrentItem(item)
         
         # Mise à jour de la file d'attente
         self.queue_list.clear()
-        for name, _, _ in self.parent.download_manager.download_queue:
-            self.queue_list.addItem(f"{name} - En attente")
+        self.queue_list.addItems([f"{name} - En attente" for _, name, _, _ in self.parent.download_manager.download_queue])
         
         # Mise à jour de l'historique
         self.history_list.clear()
-        for name, status, timestamp in sorted(
+        for _, name, status, timestamp in sorted(
             self.parent.download_manager.download_history,
-            key=lambda x: x[2],
+            key=lambda x: x[3],
             reverse=True
         ):
             # Si le statut contient déjà la taille (pour les téléchargements terminés), on le garde tel quel
@@ -143,13 +156,14 @@ class QueueTab(QWidget):
         # Mettre à jour l'état des boutons
         self.update_buttons_state()
 
-    def on_download_finished(self, name):
+    def on_download_finished(self, entry_id):
         """Gérer la fin d'un téléchargement"""
         # Pas de boîte de dialogue, juste mettre à jour l'interface
         self.update_queue_display()
 
-    def on_download_error(self, name, error):
+    def on_download_error(self, entry_id, error):
         """Gérer une erreur de téléchargement"""
+        name = self.parent.download_manager.name_of(entry_id)
         # Pour les erreurs, on garde la boîte de dialogue car c'est important
         QMessageBox.warning(
             self,
@@ -160,27 +174,18 @@ class QueueTab(QWidget):
 
     def cancel_selected_download(self):
         """Annuler le téléchargement sélectionné"""
-        selected_item = self.active_list.currentItem()
-        if selected_item:
-            # Récupérer juste le nom (première partie avant le premier " - ")
-            full_text = selected_item.text()
-            name = full_text.split(" - ")[0]
-            self.parent.download_manager.cancel_download(name)
+        entry_id = self.selected_entry_id()
+        if entry_id is not None:
+            self.parent.download_manager.cancel_download(entry_id)
 
     def pause_selected_download(self):
         """Mettre en pause le téléchargement sélectionné"""
-        selected_item = self.active_list.currentItem()
-        if selected_item:
-            # Récupérer juste le nom (première partie avant le premier " - ")
-            full_text = selected_item.text()
-            name = full_text.split(" - ")[0]
-            self.parent.download_manager.pause_download(name)
+        entry_id = self.selected_entry_id()
+        if entry_id is not None:
+            self.parent.download_manager.pause_download(entry_id)
 
     def resume_selected_download(self):
         """Reprendre le téléchargement sélectionné"""
-        selected_item = self.active_list.currentItem()
-        if selected_item:
-            # Récupérer juste le nom (première partie avant le premier " - ")
-            full_text = selected_item.text()
-            name = full_text.split(" - ")[0]
-            self.parent.download_manager.resume_download(name) 
\ No newline at end of file
+        entry_id = self.selected_entry_id()
+        if entry_id is not None:
+            self.parent.download_manager.resume_download(entry_id) 
\ No newline at end of file
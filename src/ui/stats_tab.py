@@ -1,7 +1,11 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout,
-    QLabel, QGroupBox
+    QLabel, QGroupBox, QListWidget
 )
+from PyQt5.QtCore import QTimer
+
+# Intervalle de rafraîchissement des transferts en cours (ms)
+ACTIVE_REFRESH_INTERVAL = 1000
 
 class StatsTab(QWidget):
     def __init__(self, parent=None):
@@ -27,12 +31,40 @@ class StatsTab(QWidget):
         
         stats_group.setLayout(stats_layout)
         layout.addWidget(stats_group)
+
+        # Transferts en cours
+        active_group = QGroupBox("Transferts en cours")
+        active_layout = QVBoxLayout()
+        self.current_speed_label = QLabel("Débit total: 0 MB/s")
+        self.active_list = QListWidget()
+        active_layout.addWidget(self.current_speed_label)
+        active_layout.addWidget(self.active_list)
+        active_group.setLayout(active_layout)
+        layout.addWidget(active_group)
         
         self.setLayout(layout)
 
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.update_active_display)
+        self.refresh_timer.start(ACTIVE_REFRESH_INTERVAL)
+
     def update_stats_display(self):
         """Mettre à jour l'affichage des statistiques"""
         stats = self.parent.download_manager.stats
         self.total_downloads_label.setText(f"Téléchargements totaux: {stats['total_downloads']}")
         self.total_size_label.setText(f"Taille totale: {stats['total_size'] / (1024*1024):.2f} MB")
-        self.average_speed_label.setText(f"Vitesse moyenne: {stats['average_speed'] / (1024*1024):.2f} MB/s") 
\ No newline at end of file
+        self.average_speed_label.setText(f"Vitesse moyenne: {stats['average_speed'] / (1024*1024):.2f} MB/s")
+
+    def update_active_display(self):
+        """Mettre à jour le débit de chaque transfert en cours et le débit total"""
+        download_manager = self.parent.download_manager
+        self.current_speed_label.setText(f"Débit total: {download_manager.current_speed() / (1024*1024):.2f} MB/s")
+        self.active_list.clear()
+        for thread in download_manager.active_downloads.values():
+            if thread.paused:
+                status = "En pause"
+            else:
+                status = f"{thread.current_speed / (1024*1024):.2f} MB/s"
+            done = f"{thread.downloaded_size / (1024*1024):.1f}"
+            total = f"{thread.total_size / (1024*1024):.1f}" if thread.total_size else "?"
+            self.active_list.addItem(f"{thread.name} - {status} - {done} / {total} MB")
@@ -0,0 +1,112 @@
+from array import array
+from typing import Iterable, Optional
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from src.core.catalog import Catalog
+from src.ui.logo_loader import LogoLoader
+
+# Rôle donnant le numéro de ligne du catalogue d'un élément de la liste
+CatalogRowRole = Qt.UserRole
+# Rôle donnant l'identifiant stable de l'entrée, valable d'un catalogue à l'autre
+EntryIdRole = Qt.UserRole + 1
+# Au-delà de ce nombre de lignes retirées ou insérées, la liste est réinitialisée d'un bloc
+MAX_SEPARATE_CHANGES = 200
+
+class VodListModel(QAbstractListModel):
+    """Liste des VODs affichés, stockée comme un tableau de numéros de ligne du catalogue
+
+    Aucun élément graphique n'est créé par entrée : la vue ne demande à data()
+    que les noms des lignes visibles. Filtrer ou trier revient à remplacer le
+    tableau de lignes. De même, seuls les logos des lignes visibles sont chargés.
+    """
+
+    def __init__(self, catalog: Optional[Catalog] = None, parent=None,
+                 logo_loader: Optional[LogoLoader] = None):
+        super().__init__(parent)
+        self.catalog = catalog or Catalog()
+        self.rows = array('I')
+        self.logo_loader = logo_loader
+        if logo_loader is not None:
+            logo_loader.logo_ready.connect(self._on_logo_ready)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole or role == Qt.ToolTipRole:
+            return self.catalog.names[row]
+        if role == CatalogRowRole:
+            return row
+        if role == EntryIdRole:
+            return self.catalog.entry_ids[row]
+        if role == Qt.DecorationRole and self.logo_loader is not None:
+            url = self.catalog.logos[row]
+            return self.logo_loader.logo(url) if url else None
+        return None
+
+    def _on_logo_ready(self, url):
+        # La vue ne redessine que les lignes visibles, en une seule fois
+        if self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1), [Qt.DecorationRole])
+
+    def catalog_row(self, position) -> int:
+        """Ligne du catalogue affichée à cette position"""
+        return self.rows[position]
+
+    def entry_id(self, position) -> str:
+        return self.catalog.entry_ids[self.rows[position]]
+
+    def name(self, position) -> str:
+        return self.catalog.names[self.rows[position]]
+
+    def set_rows(self, rows: Iterable[int], catalog: Optional[Catalog] = None):
+        """Remplacer tout le contenu de la liste"""
+        self.beginResetModel()
+        if catalog is not None:
+            self.catalog = catalog
+        self.rows = array('I', rows)
+        if self.logo_loader is not None:
+            # Les logos demandés pour l'ancien contenu ne sont plus visibles
+            self.logo_loader.cancel_pending()
+        self.endResetModel()
+
+    def clear(self, catalog: Optional[Catalog] = None):
+        self.set_rows((), catalog)
+
+    def append_rows(self, rows: Iterable[int]):
+        """Ajouter des lignes à la fin de la liste"""
+        rows = array('I', rows)
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def insert_row(self, position, row):
+        """Insérer une ligne du catalogue à une position donnée"""
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, row)
+        self.endInsertRows()
+
+    def replace_catalog(self, catalog: Catalog):
+        """Afficher les mêmes lignes d'un catalogue aux mêmes numéros de ligne (copie actualisée)"""
+        self.catalog = catalog
+
+    def remove_catalog_rows(self, rows: Iterable[int]) -> int:
+        """Retirer de la liste les lignes du catalogue données, en une passe ; retourne leur nombre"""
+        rows = set(rows)
+        positions = [position for position, row in enumerate(self.rows) if row in rows]
+        if len(positions) > MAX_SEPARATE_CHANGES:
+            # Beaucoup de lignes dispersées : une seule réinitialisation plutôt qu'un signal par ligne
+            self.set_rows(row for row in self.rows if row not in rows)
+            return len(positions)
+        for position in reversed(positions):
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self.rows[position]
+            self.endRemoveRows()
+        return len(positions)
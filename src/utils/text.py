@@ -0,0 +1,47 @@
+import re
+from typing import Dict, List
+from unidecode import unidecode
+
+# Tout ce qui n'est ni lettre ni chiffre sépare les mots ("Star.Wars_4" -> "star wars 4")
+_SEPARATORS = re.compile(r'[\W_]+')
+# Translittérations déjà calculées : les mêmes mots accentués reviennent dans des milliers de titres
+_TRANSLITERATIONS: Dict[str, str] = {}
+_MAX_TRANSLITERATIONS = 100000
+# Suites de chiffres comparées comme des nombres dans le tri naturel
+_DIGITS = re.compile(r'\d+')
+
+def transliterate(word: str) -> str:
+    """Équivalent ASCII d'un mot (unidecode mémorisé)"""
+    ascii_word = _TRANSLITERATIONS.get(word)
+    if ascii_word is None:
+        ascii_word = unidecode(word)
+        if len(_TRANSLITERATIONS) < _MAX_TRANSLITERATIONS:
+            _TRANSLITERATIONS[word] = ascii_word
+    return ascii_word
+
+def normalize(text: str) -> str:
+    """Forme de recherche d'un texte : sans accents, en minuscules, mots séparés par une espace"""
+    if not text.isascii():
+        text = ' '.join(word if word.isascii() else transliterate(word) for word in text.split())
+    return _SEPARATORS.sub(' ', text.casefold()).strip()
+
+def tokenize(text: str) -> List[str]:
+    """Mots normalisés d'un texte"""
+    return normalize(text).split()
+
+def _number_key(match) -> str:
+    digits = match.group().lstrip('0') or '0'
+    # Le nombre de chiffres en préfixe range les nombres courts avant les longs
+    return chr(ord('0') + min(len(digits), 40)) + digits
+
+def natural_key(normalized: str) -> str:
+    """Clé de tri naturel d'un texte normalisé : "episode 2" avant "episode 10"
+
+    Chaque nombre est préfixé par son nombre de chiffres, ce qui permet de
+    comparer les clés comme de simples chaînes.
+    """
+    return _DIGITS.sub(_number_key, normalized)
+
+def trigrams(word: str) -> List[str]:
+    """Suites de trois caractères consécutifs d'un mot"""
+    return [word[i:i + 3] for i in range(len(word) - 2)]
@@ -0,0 +1,63 @@
+"""
+Tests du moteur asyncio : écriture du fichier d'état hors de la boucle
+"""
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.async_download import AsyncDownload
+
+MB = 1024 * 1024
+
+class StateWriteTest(unittest.TestCase):
+    HEADERS = {'content-length': str(4 * MB), 'accept-ranges': 'bytes'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.download = AsyncDownload("Film", "http://provider.example.com/movie/1.mp4",
+                                      config={'download_dir': directory.name, 'download_segments': 2})
+        self.writers = []
+        write_state = self.download._write_state
+
+        def record_writer(state):
+            self.writers.append(threading.current_thread().name)
+            write_state(state)
+
+        self.download._write_state = record_writer
+
+    def remaining(self):
+        with open(self.download.state_path) as f:
+            return json.load(f)['remaining']
+
+    def test_progress_state_is_written_by_disk_thread(self):
+        download = self.download
+        # Hors de la boucle (thread de préparation) : écriture directe
+        download.prepare(self.HEADERS)
+        self.assertEqual(self.writers, [threading.current_thread().name])
+
+        async def progress():
+            download.last_state_save = 0
+            download.record_progress(download.segments[0], 0, MB)
+            self.assertEqual(len(self.writers), 1)
+            await download._state_write
+
+        asyncio.run(progress())
+        self.assertTrue(self.writers[1].startswith("download-disk"))
+        self.assertEqual(self.remaining(), [[MB, 2 * MB], [2 * MB, 4 * MB]])
+
+    def test_flush_waits_for_write(self):
+        download = self.download
+        download.prepare(self.HEADERS)
+        download.segments[1].pos = 3 * MB
+        asyncio.run(download._flush_state())
+        self.assertEqual(self.remaining(), [[0, 2 * MB], [3 * MB, 4 * MB]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests du seau à jetons partagé : remplissage au débit configuré et rafale
+"""
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.bandwidth import MIN_BURST, TokenBucket
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimpleNamespace(now=0.0)
+        patcher = mock.patch('src.core.bandwidth.time', SimpleNamespace(monotonic=lambda: self.clock.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refill_at_rate(self):
+        bucket = TokenBucket(rate=1000, burst=500)
+        self.assertGreater(bucket.try_consume(100), 0)
+        self.clock.now += 0.2
+        self.assertEqual(bucket.try_consume(100), 0)
+        self.assertEqual(bucket.try_consume(100), 0)
+        # Plus de jetons : attendre le temps de remplir ce qui manque
+        self.assertAlmostEqual(bucket.try_consume(100), 0.1)
+
+    def test_tokens_are_capped_by_burst(self):
+        bucket = TokenBucket(rate=1000, burst=500)
+        self.clock.now += 10
+        self.assertEqual(bucket.try_consume(500), 0)
+        self.assertGreater(bucket.try_consume(1), 0)
+        # Une demande plus grosse que la rafale n'en prend qu'une
+        self.clock.now += 10
+        self.assertEqual(bucket.try_consume(2000), 0)
+        self.assertEqual(bucket.chunk_size(2000), 500)
+
+    def test_default_burst_and_rate_change(self):
+        bucket = TokenBucket(rate=1024 * 1024)
+        self.assertEqual(bucket.burst, 256 * 1024)
+        bucket.set_rate(1000)
+        self.assertEqual(bucket.burst, MIN_BURST)
+        self.clock.now += 100
+        bucket.set_rate(1000, burst=200)
+        self.assertEqual(bucket.try_consume(200), 0)
+        self.assertGreater(bucket.try_consume(1), 0)
+
+    def test_unlimited(self):
+        bucket = TokenBucket()
+        self.assertFalse(bucket.limited)
+        self.assertEqual(bucket.try_consume(10 ** 9), 0)
+        self.assertTrue(bucket.consume(10 ** 9))
+        self.assertEqual(bucket.chunk_size(10 ** 9), 10 ** 9)
+
+    def test_consume_stops_on_request(self):
+        bucket = TokenBucket(rate=1)
+        self.assertFalse(bucket.consume(10, should_stop=lambda: True))
+
+if __name__ == "__main__":
+    unittest.main()
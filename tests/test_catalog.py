@@ -0,0 +1,115 @@
+"""
+Tests du catalogue : identifiants stables, actualisation par différences, copie et listes de lignes après compactage
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.catalog import Catalog, source_id, url_id
+
+SOURCE = "http://provider.example.com/get.php"
+
+def catalog_of(entries):
+    """Catalogue préparé (index, tri, facettes) à partir de tuples (xui-id, nom, catégorie)"""
+    catalog = Catalog()
+    for xui_id, name, category in entries:
+        catalog.add(name, f"http://provider.example.com/movie/{xui_id}.mp4", xui_id=xui_id,
+                    group_title=category, source=SOURCE)
+    catalog.prepare()
+    return catalog
+
+def movies(first, last):
+    return [(str(i), f"Film {i:03d}", "Films" if i % 2 else "Séries") for i in range(first, last)]
+
+def names(catalog, rows):
+    return [catalog.name(row) for row in rows]
+
+class DiffTest(unittest.TestCase):
+    def test_additions_removals_and_changes(self):
+        old = catalog_of(movies(0, 10))
+        entries = movies(2, 12)
+        entries[0] = ("2", "Film 002 (version longue)", "Films")
+        diff = old.diff(catalog_of(entries))
+        self.assertEqual(names(diff.new, diff.added), ["Film 010", "Film 011"])
+        self.assertEqual(names(old, diff.removed), ["Film 000", "Film 001"])
+        self.assertEqual([(old.name(row), diff.new.name(new_row)) for row, new_row in diff.changed],
+                         [("Film 002", "Film 002 (version longue)")])
+
+    def test_identical_catalogs_have_no_diff(self):
+        self.assertFalse(catalog_of(movies(0, 10)).diff(catalog_of(movies(0, 10))))
+
+    def test_apply_diff_matches_new_catalog(self):
+        catalog = catalog_of(movies(0, 100))
+        entries = movies(10, 110)
+        entries[5] = ("15", "Autre film", "Films")
+        new = catalog_of(entries)
+        added, removed, changed = catalog.apply_diff(catalog.diff(new))
+        self.assertEqual((len(added), len(removed), len(changed)), (10, 10, 1))
+        self.assertEqual(len(catalog), 100)
+        self.assertEqual(sorted(names(catalog, catalog.rows())), sorted(new.names))
+        self.assertEqual(catalog.new_rows, added)
+        # L'entrée modifiée garde son identifiant, les entrées supprimées ne sont plus trouvées
+        self.assertEqual(catalog.name(catalog.find_id(new.entry_id(5))), "Autre film")
+        self.assertIsNone(catalog.find_id(catalog.entry_id(removed[0])))
+        self.assertEqual(catalog.search("autre"), [changed[0][1]])
+
+class CopyTest(unittest.TestCase):
+    def test_copy_is_independent(self):
+        original = catalog_of(movies(0, 20))
+        copy = original.copy()
+        copy.apply_diff(copy.diff(catalog_of(movies(5, 25))))
+        self.assertEqual(len(original), 20)
+        self.assertEqual(names(original, original.sorted_rows()), [f"Film {i:03d}" for i in range(20)])
+        self.assertEqual(len(original.category_rows(original.category_code("Films"))), 10)
+        self.assertEqual(len(original.search("film")), 20)
+        self.assertEqual(names(copy, copy.sorted_rows()), [f"Film {i:03d}" for i in range(5, 25)])
+
+class EntryIdTest(unittest.TestCase):
+    def test_ids_from_source_and_xui_id_or_url(self):
+        catalog = Catalog()
+        catalog.add("Film A", "http://a/1", xui_id="7", source=SOURCE)
+        catalog.add("Film A (copie)", "http://a/2", xui_id="7", source=SOURCE)
+        catalog.add("Film B", "http://a/3", source=SOURCE)
+        catalog.add("Film B (autre nom)", "http://a/3", source=SOURCE)
+        prefix = source_id(SOURCE) + ':'
+        self.assertEqual(catalog.entry_ids, [
+            prefix + "7", prefix + "7#2", prefix + url_id("http://a/3"), prefix + url_id("http://a/3") + "#2"
+        ])
+        self.assertEqual(catalog.find_id(prefix + "7#2"), 1)
+
+    def test_ids_do_not_depend_on_merge_order(self):
+        first, second = Catalog(), Catalog()
+        first.add("Film A", "http://a/1", xui_id="7", source="http://a")
+        second.add("Film A", "http://b/1", xui_id="7", source="http://b")
+        merged = Catalog.merge([("http://a", first), ("http://b", second)])
+        reversed_merge = Catalog.merge([("http://b", second), ("http://a", first)])
+        self.assertNotEqual(merged.entry_id(0), merged.entry_id(1))
+        self.assertEqual(sorted(merged.entry_ids), sorted(reversed_merge.entry_ids))
+        self.assertEqual(merged.entry_id(0), first.entry_id(0))
+
+class CompactTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = catalog_of(movies(0, 100))
+        self.catalog.apply_diff(self.catalog.diff(catalog_of(movies(10, 110))))
+        self.expected = [f"Film {i:03d}" for i in range(10, 110)]
+
+    def test_sorted_rows_after_removals(self):
+        catalog = self.catalog
+        self.assertLess(len(catalog._sort_order), len(catalog.names))
+        self.assertEqual(names(catalog, catalog.sorted_rows()), self.expected)
+        self.assertEqual(names(catalog, catalog.sorted_rows(list(catalog.rows()))), self.expected)
+        self.assertEqual(names(catalog, catalog.sorted_rows(descending=True)), self.expected[::-1])
+
+    def test_category_rows_after_removals(self):
+        catalog = self.catalog
+        code = catalog.category_code("Films")
+        rows = catalog.category_rows(code)
+        self.assertEqual(names(catalog, catalog.sorted_rows(rows)), self.expected[1::2])
+        # Petite sélection : tri par rang plutôt que par filtrage de l'ordre précalculé
+        self.assertEqual(names(catalog, catalog.sorted_rows(rows[:3])), self.expected[1:7:2])
+        self.assertEqual(catalog.category_counts(), [("Films", 50), ("Séries", 50)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests du nombre de connexions par hôte : augmentation tant que le débit progresse, réduction sur stagnation ou refus
+"""
+import os
+import sys
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from src.core.connections import EVALUATION_WINDOW, HOLD_WINDOWS, HostConnectionController, is_throttling_error
+
+HOST = "provider.example.com"
+
+class HostConnectionControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimpleNamespace(now=0.0)
+        patcher = mock.patch('src.core.connections.time', SimpleNamespace(monotonic=lambda: self.clock.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "hosts.json")
+        self.controller = HostConnectionController(self.path)
+
+    def window(self, throughput):
+        """Une mesure complète avec toutes les connexions permises ouvertes"""
+        controller = self.controller
+        while controller.active(HOST) < controller.connections(HOST):
+            controller.acquire(HOST)
+        self.clock.now += EVALUATION_WINDOW
+        controller.record(HOST, int(throughput * EVALUATION_WINDOW))
+
+    def test_increase_while_throughput_grows(self):
+        controller = self.controller
+        self.assertEqual(controller.connections(HOST), 1)
+        self.assertTrue(controller.acquire(HOST, blocking=False))
+        self.assertFalse(controller.acquire(HOST, blocking=False))
+        controller.release(HOST)
+        self.window(1_000_000)
+        self.assertEqual(controller.connections(HOST), 2)
+        # Mesure suivante ignorée : la nouvelle connexion vient de s'ouvrir
+        self.window(1_500_000)
+        self.assertEqual(controller.connections(HOST), 2)
+        self.window(2_000_000)
+        self.assertEqual(controller.connections(HOST), 3)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)[HOST], {'connections': 2, 'throughput': 2_000_000})
+
+    def test_plateau_reduces_connections(self):
+        controller = self.controller
+        self.window(2_000_000)
+        self.assertEqual(controller.connections(HOST), 2)
+        self.window(2_000_000)
+        # Une connexion de plus sans gain de débit : retour au niveau précédent
+        self.window(2_050_000)
+        self.assertEqual(controller.connections(HOST), 1)
+        for _ in range(HOLD_WINDOWS):
+            self.window(2_000_000)
+            self.assertEqual(controller.connections(HOST), 1)
+        self.window(2_000_000)
+        self.assertEqual(controller.connections(HOST), 2)
+
+    def test_unused_connections_teach_nothing(self):
+        controller = self.controller
+        self.window(1_000_000)
+        controller.release(HOST)
+        self.clock.now += EVALUATION_WINDOW
+        controller.record(HOST, 10)
+        self.clock.now += EVALUATION_WINDOW
+        controller.record(HOST, 10)
+        self.assertEqual(controller.connections(HOST), 2)
+
+    def test_throttling_error_halves_connections(self):
+        controller = self.controller
+        for throughput in (1, 2, 2, 3, 3):
+            self.window(throughput * 1_000_000)
+        self.assertEqual(controller.connections(HOST), 4)
+        self.clock.now += EVALUATION_WINDOW
+        controller.record_error(HOST)
+        self.assertEqual(controller.connections(HOST), 2)
+        self.assertTrue(controller.over_limit(HOST))
+        # Refus des connexions ouvertes avant la réduction : pas de nouvelle division
+        controller.record_error(HOST)
+        self.assertEqual(controller.connections(HOST), 2)
+        self.clock.now += EVALUATION_WINDOW
+        controller.record_error(HOST)
+        self.assertEqual(controller.connections(HOST), 1)
+        # Les niveaux refusés ne sont plus proposés aux sessions suivantes
+        self.assertEqual(HostConnectionController(self.path).connections(HOST), 1)
+
+    def test_never_below_one_connection(self):
+        controller = self.controller
+        controller.record_error(HOST)
+        self.assertEqual(controller.connections(HOST), 1)
+
+    def test_throttling_errors(self):
+        response = requests.Response()
+        response.status_code = 509
+        self.assertTrue(is_throttling_error(requests.HTTPError(response=response)))
+        response.status_code = 404
+        self.assertFalse(is_throttling_error(requests.HTTPError(response=response)))
+        self.assertTrue(is_throttling_error(requests.ConnectionError()))
+
+if __name__ == "__main__":
+    unittest.main()
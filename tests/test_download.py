@@ -0,0 +1,164 @@
+"""
+Tests des téléchargements : file d'attente (clés par entrée, doublons, noms de fichiers
+uniques) et reprise des fichiers .part
+"""
+import os
+import sys
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.download import DownloadManager, Segment, TransferState, short_id
+
+MB = 1024 * 1024
+
+class DownloadManagerTest(unittest.TestCase):
+    def setUp(self):
+        # Sans écriture de la configuration de l'utilisateur ni téléchargement réel
+        patcher = mock.patch('src.core.download.save_config')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = self.make_manager({})
+
+    def make_manager(self, config):
+        manager = DownloadManager(config)
+
+        def start_thread(entry_id, name, url, bandwidth_limit):
+            manager.active_downloads[entry_id] = SimpleNamespace(
+                entry_id=entry_id, name=name, url=url, bandwidth_limit=bandwidth_limit,
+                current_speed=0, paused=False
+            )
+            manager._set_status(entry_id, "En cours")
+
+        manager._start_thread = start_thread
+        return manager
+
+    def test_first_item_starts_and_others_wait(self):
+        manager = self.manager
+        added = manager.add_many([("a:1", "Film", "http://a/1", None), ("a:2", "Autre", "http://a/2", None)])
+        self.assertEqual([item[0] for item in added], ["a:1", "a:2"])
+        self.assertTrue(manager.is_active("a:1"))
+        self.assertEqual(manager.download_queue, [("a:2", "Autre", "http://a/2", None)])
+        self.assertEqual(manager.config['download_queue'],
+                         [["a:1", "Film", "http://a/1", None], ["a:2", "Autre", "http://a/2", None]])
+
+    def test_entries_already_queued_or_active_are_skipped(self):
+        manager = self.manager
+        manager.add_to_queue("a:1", "Film", "http://a/1")
+        manager.add_to_queue("a:2", "Autre", "http://a/2")
+        self.assertIsNone(manager.add_to_queue("a:1", "Film", "http://a/1"))
+        self.assertIsNone(manager.add_to_queue("a:2", "Autre", "http://a/2"))
+        added = manager.add_many([("a:3", "Suite", "http://a/3", None), ("a:3", "Suite", "http://a/3", None)])
+        self.assertEqual(len(added), 1)
+        self.assertEqual([item[0] for item in manager.download_queue], ["a:2", "a:3"])
+
+    def test_same_name_gets_a_stable_suffix(self):
+        manager = self.manager
+        manager.add_to_queue("a:1", "Film", "http://a/1")
+        queued = manager.add_to_queue("b:1", "Film", "http://b/1")
+        self.assertEqual(queued[1], f"Film [{short_id('b:1')}]")
+        self.assertEqual(short_id('b:1'), short_id('b:1'))
+        self.assertEqual(len(short_id('b:1')), 6)
+        self.assertEqual(manager.name_of("b:1"), queued[1])
+        self.assertEqual(manager.name_of("a:1"), "Film")
+        # Même titre dans un seul lot : seul le second est renommé
+        added = manager.add_many([("c:1", "Série", "http://c/1", None), ("c:2", "Série", "http://c/2", None)])
+        self.assertEqual([name for _, name, _, _ in added], ["Série", f"Série [{short_id('c:2')}]"])
+
+    def test_legacy_queue_is_keyed_by_url(self):
+        manager = self.make_manager({'download_queue': [["Film", "http://a/1", None]]})
+        self.assertEqual(manager.download_queue, [("http://a/1", "Film", "http://a/1", None)])
+        self.assertEqual(manager.name_of("http://a/1"), "Film")
+
+class Transfer(TransferState):
+    def __init__(self, config):
+        self.init_transfer("Film", "http://provider.example.com/movie/1.mp4", config=config)
+        self.progress = mock.Mock()
+
+class ResumeStateTest(unittest.TestCase):
+    HEADERS = {'content-length': str(4 * MB), 'accept-ranges': 'bytes', 'etag': '"v1"'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config = {'download_dir': directory.name, 'download_segments': 2}
+
+    def interrupted(self):
+        """Téléchargement arrêté après 1 Mo de chaque plage, état enregistré"""
+        transfer = Transfer(self.config)
+        transfer.prepare(self.HEADERS)
+        self.assertEqual([(s.pos, s.end) for s in transfer.segments], [(0, 2 * MB), (2 * MB, 4 * MB)])
+        for segment in transfer.segments:
+            transfer.record_progress(segment, segment.pos, MB)
+        transfer.save_state()
+        return transfer
+
+    def test_resume_remaining_ranges(self):
+        previous = self.interrupted()
+        transfer = Transfer(self.config)
+        transfer.prepare(self.HEADERS)
+        self.assertEqual([(s.pos, s.end) for s in transfer.segments], [(MB, 2 * MB), (3 * MB, 4 * MB)])
+        self.assertEqual(transfer.resumed_size, 2 * MB)
+        self.assertEqual(transfer.downloaded_size, 2 * MB)
+        self.assertEqual(transfer.state_path, previous.state_path)
+
+    def assert_restarts(self, headers=HEADERS):
+        transfer = Transfer(self.config)
+        transfer.prepare(headers)
+        self.assertEqual(transfer.resumed_size, 0)
+        self.assertEqual([(s.pos, s.end) for s in transfer.segments], [(0, 2 * MB), (2 * MB, 4 * MB)])
+
+    def test_changed_remote_file_restarts(self):
+        self.interrupted()
+        self.assert_restarts(dict(self.HEADERS, etag='"v2"'))
+
+    def test_corrupt_state_restarts(self):
+        transfer = self.interrupted()
+        with open(transfer.state_path, 'w') as f:
+            f.write('{"url": ')
+        self.assert_restarts()
+
+    def test_malformed_ranges_restart(self):
+        transfer = self.interrupted()
+        with open(transfer.state_path) as f:
+            state = json.load(f)
+        state['remaining'] = [["x", 1]]
+        with open(transfer.state_path, 'w') as f:
+            json.dump(state, f)
+        self.assert_restarts()
+
+    def test_truncated_part_restarts(self):
+        transfer = self.interrupted()
+        with open(transfer.part_path, 'r+b') as f:
+            f.truncate(MB)
+        self.assert_restarts()
+
+    def test_complete_removes_state(self):
+        transfer = Transfer(self.config)
+        filename = transfer.prepare(self.HEADERS)
+        with self.assertRaises(Exception):
+            transfer.complete(filename)
+        for segment in transfer.segments:
+            transfer.record_progress(segment, segment.pos, segment.remaining)
+        transfer.complete(filename)
+        self.assertTrue(os.path.exists(filename))
+        self.assertFalse(os.path.exists(transfer.part_path))
+        self.assertFalse(os.path.exists(transfer.state_path))
+
+    def test_late_block_is_not_counted_twice(self):
+        transfer = Transfer(self.config)
+        transfer.prepare(self.HEADERS)
+        segment = Segment(0, MB)
+        transfer.record_progress(segment, 0, MB // 2)
+        # Bloc déjà compté, puis bloc qui dépasse la fin de la plage
+        transfer.record_progress(segment, 0, MB // 2)
+        transfer.record_progress(segment, MB // 2, MB)
+        self.assertEqual(segment.pos, MB)
+        self.assertEqual(transfer.downloaded_size, MB)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests du client HTTP commun : cache DNS (expiration, taille bornée) et préchauffage des connexions
+"""
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import http
+from src.core.http import DnsCache, get_session
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+class DnsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('src.core.http.time', SimpleNamespace(monotonic=lambda: self.clock.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+        self.cache = DnsCache(self.resolve, ttl=60, max_entries=3)
+
+    def resolve(self, host, port, *args, **kwargs):
+        self.calls.append(host)
+        return [(host, port, len(self.calls))]
+
+    def test_results_are_kept_until_expiration(self):
+        first = self.cache("a.example.com", 80)
+        self.assertIs(self.cache("a.example.com", 80), first)
+        self.cache("a.example.com", 443)
+        self.assertEqual(self.calls, ["a.example.com", "a.example.com"])
+        self.clock.now += 61
+        self.assertIsNot(self.cache("a.example.com", 80), first)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_expired_entry_is_removed(self):
+        self.cache("a.example.com", 80)
+        self.clock.now += 61
+        self.cache.resolve = mock.Mock(side_effect=OSError("résolution impossible"))
+        with self.assertRaises(OSError):
+            self.cache("a.example.com", 80)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        for host in ("a", "b", "c"):
+            self.cache(host, 80)
+        self.cache("a", 80)
+        self.cache("d", 80)
+        self.assertEqual(len(self.cache), 3)
+        self.cache("a", 80)
+        self.cache("b", 80)
+        self.assertEqual(self.calls, ["a", "b", "c", "d", "b"])
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', self.client_address))
+        self.send_response(200)
+        self.send_header('Content-Length', '5')
+        self.end_headers()
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.client_address))
+        self.send_response(200)
+        self.send_header('Content-Length', '5')
+        self.end_headers()
+        self.wfile.write(b'films')
+
+    def log_message(self, *args):
+        pass
+
+class PrewarmTest(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        self.url = f"http://127.0.0.1:{server.server_address[1]}/movie/1.mp4"
+
+    def test_download_reuses_prewarmed_connection(self):
+        http._open_connection(self.url)
+        response = get_session().get(self.url)
+        self.assertEqual(response.content, b'films')
+        methods = [method for method, _ in self.server.requests]
+        clients = {client for _, client in self.server.requests}
+        self.assertEqual(methods, ['HEAD', 'GET'])
+        self.assertEqual(len(clients), 1)
+
+    def test_same_host_is_prewarmed_once_per_interval(self):
+        with mock.patch.object(http._prewarm_executor, 'submit') as submit:
+            http.prewarm(self.url)
+            http.prewarm(self.url.replace('/1.mp4', '/2.mp4'))
+            http.prewarm("ftp://127.0.0.1/film.mp4")
+        self.assertEqual(submit.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
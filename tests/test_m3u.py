@@ -0,0 +1,96 @@
+"""
+Tests du parsing M3U : dispositions d'attributs et en-têtes #EXTINF malformés
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.m3u import M3UParser, tokenize_extinf
+
+USUAL = '#EXTINF:-1 xui-id="7" tvg-name="Film A" tvg-logo="http://img/a.jpg" group-title="Films FR",Film A'
+SHUFFLED = '#EXTINF:-1 group-title="Films FR" tvg-logo="http://img/a.jpg" xui-id="7" tvg-name="Film A",Film A'
+EXTRA = '#EXTINF:-1 tvg-id="" xui-id="7" tvg-name="Film A" tvg-logo="http://img/a.jpg" group-title="Films FR",Film A'
+
+MALFORMED = [
+    '#EXTINF:-1 tvg-name="abc,Title',
+    '#EXTINF:-1 xui-id="1" tvg-name="abc,Title',
+    '#EXTINF:-1 tvg-name="a" group-title="G,Title "quoted',
+    '#EXTINF:-1 tvg-name="',
+    '#EXTINF:-1 "',
+    '#EXTINF:-1 no comma at all',
+    '#EXTINF:',
+]
+
+def playlist(*headers):
+    lines = ["#EXTM3U"]
+    for i, header in enumerate(headers):
+        lines.append(header)
+        lines.append(f"http://provider.example.com/movie/{i}.mp4")
+    return "\n".join(lines) + "\n"
+
+class TokenizeExtinfTest(unittest.TestCase):
+    def test_attributes_in_any_order(self):
+        for header in (USUAL, SHUFFLED):
+            attributes, title = tokenize_extinf(header[8:])
+            self.assertEqual(title, 'Film A')
+            self.assertEqual(attributes['group-title'], 'Films FR')
+            self.assertEqual(attributes['xui-id'], '7')
+
+    def test_quotes_in_title(self):
+        attributes, title = tokenize_extinf('-1 tvg-name="a",Le "Film"')
+        self.assertEqual(attributes, {'tvg-name': 'a'})
+        self.assertEqual(title, 'Le "Film"')
+
+    def test_unbalanced_quote_falls_back_to_title(self):
+        attributes, title = tokenize_extinf('-1 tvg-name="abc,Title')
+        self.assertEqual(attributes, {})
+        self.assertEqual(title, 'Title')
+
+    def test_malformed_headers_do_not_raise(self):
+        for header in MALFORMED:
+            tokenize_extinf(header[8:])
+
+class ParserTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = M3UParser()
+
+    def parse_both(self, content):
+        """Résultats de parse_content et du mode streaming, qui doivent être identiques"""
+        full = self.parser.parse_content(content)
+        streamed = self.parser.parse_stream(content.splitlines())
+        self.assertEqual(full.names, streamed.names)
+        self.assertEqual(full.urls, streamed.urls)
+        return full
+
+    def test_layouts_give_same_fields(self):
+        for header in (USUAL, SHUFFLED, EXTRA):
+            catalog = self.parse_both(playlist(header))
+            self.assertEqual(len(catalog), 1)
+            self.assertEqual((catalog.name(0), catalog.xui_id(0), catalog.category(0)), ('Film A', '7', 'Films FR'))
+            self.assertEqual(catalog.logo(0), 'http://img/a.jpg')
+        self.assertEqual(self.parser.parse_content(playlist(EXTRA)).attributes(0), {'tvg-id': ''})
+
+    def test_headers_without_attributes_and_crlf(self):
+        headers = ['#EXTINF:-1,Sans attributs', '#EXTINF:-1 group-title="G",Sans nom', USUAL]
+        content = playlist(*headers).replace('\n', '\r\n')
+        catalog = self.parse_both(content)
+        self.assertEqual(catalog.names, ['Sans attributs', 'Sans nom', 'Film A'])
+        self.assertEqual([catalog.category(row) for row in catalog.rows()], [None, 'G', 'Films FR'])
+        self.assertEqual(catalog.url(0), 'http://provider.example.com/movie/0.mp4')
+
+    def test_url_must_follow_header(self):
+        content = '#EXTM3U\n#EXTINF:-1,A\n#EXTVLCOPT:x\nhttp://a\n#EXTINF:-1,B\n\nhttp://b\n'
+        self.assertEqual(self.parse_both(content).names, ['B'])
+
+    def test_malformed_entries_are_kept_or_skipped(self):
+        headers = [USUAL] + MALFORMED + [SHUFFLED.replace('Film A', 'Film B')]
+        catalog = self.parse_both(playlist(*headers))
+        names = [catalog.name(row) for row in catalog.rows()]
+        self.assertEqual(names[0], 'Film A')
+        self.assertEqual(names[1], 'Title')
+        self.assertEqual(names[-1], 'Film B')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests de la recherche : index mots et trigrammes, recherche approximative, facettes et saisons
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.catalog import Catalog
+from src.core.metadata import LANGUAGES, QUALITIES
+from src.core.search import SearchIndex, edit_distance, max_typos
+
+NAMES = [
+    "Le Seigneur des Anneaux (2001)",
+    "Harry Potter à l'école des sorciers",
+    "Pokémon 2000",
+    "Star.Wars_4 Un nouvel espoir",
+    "Les Anneaux de Saturne",
+]
+
+def index_of(names):
+    index = SearchIndex(names)
+    for row, name in enumerate(names):
+        index.add(row, name)
+    return index
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = index_of(list(NAMES))
+
+    def test_tokens_are_normalized(self):
+        self.assertEqual(self.index.search("POKEMON"), [2])
+        self.assertEqual(self.index.search("école"), [1])
+        self.assertEqual(self.index.search("star wars"), [3])
+        self.assertIsNone(self.index.search(" ,. "))
+
+    def test_fragments_inside_words(self):
+        self.assertEqual(sorted(self.index.matching_tokens("nne")), ["anneaux"])
+        self.assertEqual(sorted(self.index.matching_tokens("gn")), ["seigneur"])
+        self.assertEqual(self.index.search("anne"), [0, 4])
+        self.assertEqual(self.index.search("anne sat"), [4])
+        self.assertEqual(self.index.search("anneaux zorro"), [])
+
+    def test_removed_rows_are_ignored_then_compacted(self):
+        index = self.index
+        index.remove(0, NAMES[0])
+        self.assertEqual(index.search("anneaux"), [4])
+        index.compact()
+        self.assertEqual(index.search("anneaux"), [4])
+        self.assertEqual(index.matching_tokens("seig"), [])
+        index.add(0, NAMES[0])
+        self.assertEqual(index.search("anneaux"), [0, 4])
+
+    def test_state_round_trip(self):
+        copy = SearchIndex.__new__(SearchIndex)
+        copy.__setstate__(self.index.__getstate__())
+        for query in ("anne", "potter", "2000", "nouvel espoir"):
+            self.assertEqual(copy.search(query), self.index.search(query))
+
+class FuzzySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.index = index_of(list(NAMES))
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("potter", "poter", 2), 1)
+        self.assertEqual(edit_distance("harri", "harry", 2), 1)
+        # Inversion de deux lettres : une seule faute
+        self.assertEqual(edit_distance("siegneur", "seigneur", 2), 1)
+        self.assertEqual(edit_distance("saturne", "anneaux", 2), 3)
+
+    def test_typos_allowed_by_length(self):
+        self.assertEqual([max_typos(word) for word in ("pot", "poter", "seigneurs", "2001")], [0, 1, 2, 0])
+
+    def test_rows_with_typo_count(self):
+        self.assertEqual(self.index.fuzzy_search("siegneur"), {0: 1})
+        self.assertEqual(self.index.fuzzy_search("harri poter"), {1: 2})
+        self.assertEqual(self.index.fuzzy_search("pokemn 2000"), {2: 1})
+        self.assertEqual(self.index.fuzzy_search("pokemn 2001"), {})
+        self.assertEqual(self.index.fuzzy_search("anneaux"), {0: 0, 4: 0})
+
+class CatalogFacetTest(unittest.TestCase):
+    def setUp(self):
+        catalog = Catalog()
+        entries = [
+            ("Dune (2021) 4K MULTI", "Films"),
+            ("Lupin S02E05 1080p", "Séries FR"),
+            ("Lupin S02E01", "Séries FR"),
+            ("Lupin S01E01", "Séries FR"),
+            ("FR - Lupin S02E03 720p", "Séries FR"),
+            ("Oppenheimer (2023) 1080p VOSTFR", "Films"),
+        ]
+        for i, (name, category) in enumerate(entries):
+            catalog.add(name, f"http://a.example.com/{i}", group_title=category, source="http://a.example.com")
+        # Même épisode dans une seconde source : retenu une seule fois dans la saison
+        catalog.add("Lupin S02E01", "http://b.example.com/1", group_title="Séries FR", source="http://b.example.com")
+        catalog.prepare()
+        self.catalog = catalog
+
+    def test_search_through_catalog(self):
+        self.assertEqual(self.catalog.search("lupin s02e01"), [2, 6])
+        self.assertEqual(self.catalog.fuzzy_search("openheimer"), {5: 1})
+
+    def test_facet_rows_and_counts(self):
+        catalog = self.catalog
+        self.assertEqual(list(catalog.facet_rows('quality', QUALITIES.index("1080p"))), [1, 5])
+        self.assertEqual(catalog.facet_counts('year'), [(2021, 1), (2023, 1)])
+        self.assertEqual(list(catalog.facet_rows('language', LANGUAGES.index("FR"))), [1, 2, 3, 4, 6])
+        self.assertEqual(catalog.metadata(4).episode, 3)
+
+    def test_season_rows(self):
+        catalog = self.catalog
+        self.assertEqual(catalog.season_rows(1), [2, 4, 1])
+        self.assertEqual(catalog.season_rows(3), [3])
+        self.assertEqual(catalog.season_rows(0), [])
+        catalog.remove(2)
+        catalog.compact()
+        self.assertEqual(catalog.season_rows(1), [6, 4, 1])
+
+if __name__ == "__main__":
+    unittest.main()